@@ -1,17 +1,25 @@
+import functools
 import importlib
+import json
 from pathlib import Path
 import pkgutil
 import inspect
 from types import ModuleType
-from typing import Callable, Optional, Union
-from collections.abc import Iterator
-from .test_suite import TestSuite
+from typing import Callable, Optional, Union, TYPE_CHECKING
+from collections.abc import Iterable, Iterator
+
+if TYPE_CHECKING:
+    # Imports the app parser and its dependencies, only needed once suites are run
+    from .test_suite import TestSuite
 
 # The following constant is a dynamic import of all the tests we have in this test runner
 # all scripts that rely on a dynamic loading of tests should use the iterate_all_tests function, which relies on
 # the modules in this package
 _TEST_MODULES: Optional[list[ModuleType]] = None
 
+# Static description of every test, so that listing tests doesn't require importing the suites
+TEST_REGISTRY_PATH = Path(__file__).parent / "test_registry.json"
+
 
 def test_modules() -> list[ModuleType]:
     global _TEST_MODULES
@@ -32,7 +40,21 @@ def _get_pkg_name(attr: Union[type, ModuleType]) -> str:
         return attr.__module__.rsplit(".", 1)[-1]
 
 
-def get_test_suites() -> Iterator[type[TestSuite]]:
+def get_test_suites(test_names: Optional[Iterable[str]] = None) -> Iterator[type["TestSuite"]]:
+    """
+    Yields every test suite or, given test names, only the suites of these tests, importing
+    none of the others.
+    """
+    if test_names is not None:
+        test_names = set(test_names)
+        for suite in load_test_registry():
+            if any(test["name"] in test_names for test in suite["tests"]):
+                module = importlib.import_module(f".{suite['module']}", __package__)
+                yield getattr(module, suite["class"])
+        return
+
+    from .test_suite import TestSuite
+
     for module in test_modules():
         for _, klass in inspect.getmembers(module, inspect.isclass):
             if _get_pkg_name(klass) == _get_pkg_name(module) and issubclass(klass, TestSuite):
@@ -52,3 +74,37 @@ def tests_by_name() -> dict[str, Callable]:
     Returns a dictionary of all tests by their name
     """
     return {test.pretty_name: test for test in iterate_all_tests()}
+
+
+def generate_test_registry() -> list[dict]:
+    """
+    Describes every test of every suite, in the order they run
+    """
+    return [
+        {
+            "module": _get_pkg_name(suite),
+            "class": suite.__name__,
+            "tests": [
+                {
+                    "name": test.pretty_name,
+                    "doc": (test.__doc__ or "").strip(),
+                    "critical": test.critical,
+                    "skip": test.skip,
+                }
+                for test in suite.get_tests()
+            ],
+        }
+        for suite in get_test_suites()
+    ]
+
+
+def write_test_registry() -> None:
+    TEST_REGISTRY_PATH.write_text(json.dumps(generate_test_registry(), indent=4) + "\n")
+
+
+@functools.cache
+def load_test_registry() -> list[dict]:
+    """
+    Returns the registry generated by write_test_registry, without importing any suite
+    """
+    return json.loads(TEST_REGISTRY_PATH.read_text())
@@ -0,0 +1,10 @@
+"""
+Regenerates the test registry after tests are added, removed or changed:
+
+    python -m local_hooks.app_tests
+"""
+
+from . import write_test_registry
+
+if __name__ == "__main__":
+    write_test_registry()
@@ -7,6 +7,7 @@ from .utils.phantom_constants import (
     TEST_PASS_MESSAGE,
 )
 from .utils import create_test_result_response
+from .utils.app_parser import AppParser
 import re
 from lxml import etree
 from pathlib import Path
@@ -193,8 +194,8 @@ class ContextVisitor(ast.NodeVisitor):
 
 
 class CodeTests(TestSuite):
-    def __init__(self, repo_location: Path) -> None:
-        super().__init__(repo_location)
+    def __init__(self, repo_location: Path, parser: Optional[AppParser] = None) -> None:
+        super().__init__(repo_location, parser)
         self._app_consts_fp = (glob.glob(os.path.join(self._app_code_dir, "*consts.py")) or [""])[0]
         self._app_connector_fp = self._parser.connector_filepath
 
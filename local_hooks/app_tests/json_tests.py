@@ -1,11 +1,13 @@
+import functools
 import requests
 from .test_suite import TestSuite
 import json
 import textwrap
-from typing import Any
+from typing import Any, Optional
 from jsonschema import exceptions
 from jsonschema.validators import Draft202012Validator as JsonSchemaValidator
 from .utils import create_test_result_response
+from .utils.app_parser import AppParser
 from .utils.phantom_constants import (
     APPID_TO_PACKAGE_NAME_URL,
     TEST_PASS_MESSAGE,
@@ -30,9 +32,19 @@ CONNECTOR_TEMPLATE_IDENTITY = {
 }
 
 
+@functools.cache
+def app_schema_validator() -> JsonSchemaValidator:
+    """
+    Validator of the app JSON schema, loaded once per process.
+    """
+    schema_path = Path(__file__).parent.resolve() / "app_schema.json"
+    with open(schema_path) as app_schema_file:
+        return JsonSchemaValidator(json.load(app_schema_file))
+
+
 class JSONTests(TestSuite):
-    def __init__(self, repo_location: Path) -> None:
-        super().__init__(repo_location)
+    def __init__(self, repo_location: Path, parser: Optional[AppParser] = None) -> None:
+        super().__init__(repo_location, parser)
         self._app_json = self._parser.app_json
 
         self._app_is_certified = self._parser.app_json["publisher"] == "Splunk"
@@ -75,15 +87,10 @@ class JSONTests(TestSuite):
         if self._parser.uv_lock_filepath:
             return SKIP_SDK_APP
 
-        APP_TESTS_DIR = Path(__file__).parent.resolve()
-        schema_path = APP_TESTS_DIR / "app_schema.json"
         verbose = []
         message = TEST_PASS_MESSAGE
 
-        with open(schema_path) as app_schema_file:
-            app_schema = json.load(app_schema_file)
-
-        validator = JsonSchemaValidator(app_schema)
+        validator = app_schema_validator()
         for err in sorted(validator.iter_errors(self._app_json), key=exceptions.relevance):
             msg = textwrap.dedent(
                 f"""
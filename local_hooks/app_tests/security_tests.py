@@ -1,5 +1,7 @@
 from pathlib import Path
+from typing import Optional
 from .test_suite import TestSuite
+from .utils.app_parser import AppParser
 import re
 from .utils.phantom_constants import XSS_INJECTIONS, TEST_PASS_MESSAGE
 from .utils.django_renderer import render_template
@@ -7,8 +9,8 @@ from .utils import create_test_result_response
 
 
 class SecurityTests(TestSuite):
-    def __init__(self, repo_location: Path) -> None:
-        super().__init__(repo_location)
+    def __init__(self, repo_location: Path, parser: Optional[AppParser] = None) -> None:
+        super().__init__(repo_location, parser)
 
     @TestSuite.test
     def check_xss_custom_views(self):
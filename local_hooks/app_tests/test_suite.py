@@ -3,7 +3,7 @@ from pathlib import Path
 import re
 
 from traceback import format_exc
-from typing import Callable
+from typing import Callable, Optional
 
 from .utils.app_parser import AppParser, ParserError
 
@@ -16,9 +16,9 @@ class TestSuite:
     # Common method name prefixes for tests. Currently only used for tests' pretty names
     test_prefix = re.compile(r"^_?(check|phantom|test)_")
 
-    def __init__(self, repo_location: Path) -> None:
+    def __init__(self, repo_location: Path, parser: Optional[AppParser] = None) -> None:
         self._app_code_dir = repo_location
-        self._parser = AppParser(self._app_code_dir)
+        self._parser = parser if parser is not None else AppParser(self._app_code_dir)
         self._app_name = self._parser.app_json["name"].lower()
 
     @classmethod
@@ -27,7 +27,10 @@ class TestSuite:
         Returns a list of test functions in this suite
         :return list of test functions in this suite
         """
-        return [getattr(cls, func) for func in dir(cls) if cls._is_test(func)]
+        # Looked up once per suite, rather than scanning the class on every call
+        if "_tests" not in cls.__dict__:
+            cls._tests = [getattr(cls, func) for func in dir(cls) if cls._is_test(func)]
+        return cls._tests
 
     @classmethod
     def _is_test(cls, method):
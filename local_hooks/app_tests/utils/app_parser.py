@@ -11,6 +11,8 @@ from pathlib import Path
 from typing import Optional
 from local_hooks.helpers import (
     find_uv_lock_file,
+    load_cached_sdk_app_manifest,
+    sdk_manifest_digest,
     load_sdk_apps_environment,
     generate_sdk_app_manifest,
 )
@@ -113,8 +115,12 @@ class AppParser:
     @cached_property
     def sdk_app_json(self) -> Path:
         uv_lock_dir = self.uv_lock_filepath.parent
-        load_sdk_apps_environment(uv_lock_dir)
-        return generate_sdk_app_manifest(uv_lock_dir)
+        digest = sdk_manifest_digest(uv_lock_dir)
+        manifest = load_cached_sdk_app_manifest(uv_lock_dir, digest)
+        if manifest is None:
+            load_sdk_apps_environment(uv_lock_dir)
+            manifest = generate_sdk_app_manifest(uv_lock_dir, digest)
+        return manifest
 
     @cached_property
     def uv_lock_filepath(self) -> Optional[Path]:
@@ -0,0 +1,111 @@
+"""
+Benchmarks of the hooks, run on demand rather than as part of the test suite, eg:
+
+    python -m local_hooks.benchmarks.startup
+    python -m local_hooks.benchmarks.hooks
+
+Each benchmark compares its results with a JSON baseline, recorded by an earlier run, and fails
+when they regressed.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from local_hooks.helpers import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOLERANCE = 0.25
+
+
+class Regression(NamedTuple):
+    name: str
+    metric: str
+    # None when the metric wasn't in the baseline, eg a package newly imported
+    baseline: Optional[float]
+    current: float
+    unit: str = "s"
+
+    def _format(self, value: float) -> str:
+        return f"{value:.3f}{self.unit}" if isinstance(value, float) else f"{value}{self.unit}"
+
+    def __str__(self) -> str:
+        if self.baseline is None:
+            return f"{self.name}: {self.metric} is new ({self._format(self.current)})"
+        return (
+            f"{self.name}: {self.metric} went from {self._format(self.baseline)} "
+            f"to {self._format(self.current)}"
+        )
+
+
+def regressed(previous: float, current: float, tolerance: float, min_delta: float) -> bool:
+    """
+    Whether a metric grew by both a ratio and an absolute amount over its baseline, so that noise
+    on small measurements isn't reported.
+    """
+    return current > previous * (1 + tolerance) and current - previous > min_delta
+
+
+def default_baseline_path(name: str) -> Path:
+    # Timings depend on the machine, so baselines are kept in its cache
+    return get_cache_dir("benchmarks") / f"{name}_baseline.json"
+
+
+def add_baseline_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        help="Baseline file, defaults to one in the hooks cache directory",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Relative growth over the baseline reported as a regression",
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Record the results as the new baseline"
+    )
+    parser.add_argument("--output", type=Path, help="Also write the results to this JSON file")
+
+
+def check_baseline(
+    args: argparse.Namespace,
+    name: str,
+    results: dict,
+    find_regressions: Callable[[dict, dict, float], list[Regression]],
+) -> int:
+    """
+    Compares results with the baseline of the benchmark, and records them as the baseline when
+    asked to or when there's none yet. Returns 1 if they regressed, 0 otherwise.
+    """
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=4) + "\n")
+
+    baseline_path = args.baseline or default_baseline_path(name)
+    try:
+        baseline = json.loads(baseline_path.read_text())
+    except FileNotFoundError:
+        baseline = None
+
+    exit_code = 0
+    if baseline is None:
+        logger.info("No baseline at %s", baseline_path)
+    else:
+        regressions = find_regressions(baseline, results, args.tolerance)
+        for regression in regressions:
+            logger.error("Regression: %s", regression)
+        if regressions:
+            exit_code = 1
+        else:
+            logger.info("No regression against %s", baseline_path)
+
+    if args.update_baseline or baseline is None:
+        # Entries that weren't measured this time keep their baseline
+        baseline_path.write_text(json.dumps({**(baseline or {}), **results}, indent=4) + "\n")
+        logger.info("Recorded baseline at %s", baseline_path)
+    return exit_code
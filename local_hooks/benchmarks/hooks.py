@@ -0,0 +1,252 @@
+"""
+Runs every hook against synthetic apps of growing size, and reports their latency and peak memory.
+
+One dimension of the app size (see local_hooks.benchmarks.synthetic_app.AppSize) is scaled over
+the given values, eg `--scale actions=10,100,1000`, the others keep their `--size` or default
+value. Every hook runs in its own process, through `soar-hooks run`, on a fresh copy of each app,
+and records:
+
+- wall_time: the median wall time of the hook run
+- max_rss: the peak resident memory of the run, in MiB
+
+Synthetic apps pass every hook, so a hook failing on one is reported as an error rather than
+timed: a change of behavior is never mistaken for a speedup. Their appid isn't registered, so the
+static tests checking the app registries are skipped.
+
+Requests to the network are refused through an unreachable proxy, so that static-tests falls back
+to the app registries shipped with the hooks and timings don't depend on the network. Results are
+compared with the baseline of an earlier run, see local_hooks.benchmarks.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from local_hooks.benchmarks import (
+    DEFAULT_TOLERANCE,
+    Regression,
+    add_baseline_arguments,
+    check_baseline,
+    regressed,
+)
+from local_hooks.benchmarks.synthetic_app import AppSize, generate_app
+from local_hooks.driver import HOOKS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPEAT = 3
+DEFAULT_SCALE = "actions=10,100,500"
+# Growth below which measurements are considered noise
+MIN_TIME_REGRESSION = 0.05
+MIN_RSS_REGRESSION = 10.0
+OFFLINE_PROXY = "http://127.0.0.1:9"
+# Static tests looking the app up in the registries of published apps
+SKIPPED_STATIC_TESTS = ("valid_app_name_and_guid", "app_package_name")
+# Lines of the output of a failing hook to report
+ERROR_LINES = 20
+
+
+def _hook_env() -> dict[str, str]:
+    env = {**os.environ, "HTTP_PROXY": OFFLINE_PROXY, "HTTPS_PROXY": OFFLINE_PROXY}
+    env.pop("NO_PROXY", None)
+    env.pop("no_proxy", None)
+    return env
+
+
+def _hook_command(hook_id: str, app_dir: Path) -> list[str]:
+    command = [sys.executable, "-m", "local_hooks.driver", "run", str(app_dir), "--hook", hook_id]
+    for test in SKIPPED_STATIC_TESTS:
+        command += ["--skip-static-test", test]
+    return command
+
+
+def run_hook(hook_id: str, app_dir: Path) -> dict:
+    """
+    Runs a hook against an app in a new process, and returns its wall time and peak memory.
+    Raises a RuntimeError with the end of its output if the hook fails.
+    """
+    with tempfile.TemporaryFile() as output:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            _hook_command(hook_id, app_dir),
+            env=_hook_env(),
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+        _, status, rusage = os.wait4(process.pid, 0)
+        wall_time = time.perf_counter() - start
+        # Let Popen know the process was reaped
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        if process.returncode != 0:
+            output.seek(0)
+            lines = output.read().decode(errors="replace").splitlines()[-ERROR_LINES:]
+            raise RuntimeError(
+                f"{hook_id} exited with {process.returncode} on {app_dir}:\n" + "\n".join(lines)
+            )
+
+    return {
+        "wall_time": wall_time,
+        # ru_maxrss is in KiB on Linux
+        "max_rss": rusage.ru_maxrss / 1024,
+    }
+
+
+def measure_app(app_dir: Path, hook_ids: list[str], repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Latency and peak memory of each hook on copies of an app, since hooks modify the apps they
+    run on. Raises a RuntimeError if a hook fails on it.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for hook_id in hook_ids:
+            runs = []
+            for run in range(repeat):
+                run_dir = Path(work_dir, f"{hook_id}-{run}", app_dir.name)
+                shutil.copytree(app_dir, run_dir)
+                runs.append(run_hook(hook_id, run_dir))
+            results[hook_id] = {
+                "wall_time": round(statistics.median(run["wall_time"] for run in runs), 6),
+                "max_rss": round(max(run["max_rss"] for run in runs), 1),
+            }
+    return results
+
+
+def scale_sizes(base: AppSize, dimension: str, values: list[int]) -> dict[str, AppSize]:
+    """
+    App sizes by result key, eg "actions=100".
+    """
+    return {f"{dimension}={value}": base._replace(**{dimension: value}) for value in values}
+
+
+def run_benchmark(
+    sizes: dict[str, AppSize], hook_ids: list[str], repeat: int = DEFAULT_REPEAT
+) -> dict:
+    """
+    Results by hook and app size, eg results["build-docs"]["actions=100"].
+    """
+    results: dict[str, dict] = {hook_id: {} for hook_id in hook_ids}
+    with tempfile.TemporaryDirectory() as apps_dir:
+        for key, size in sizes.items():
+            app_dir = generate_app(Path(apps_dir, key, "synthetic"), size)
+            for hook_id, result in measure_app(app_dir, hook_ids, repeat).items():
+                results[hook_id][key] = result
+            logger.info("Measured %s", key)
+    return results
+
+
+def find_regressions(
+    baseline: dict, results: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> list[Regression]:
+    """
+    Compares the results of hooks and app sizes that are also in the baseline.
+    """
+    regressions = []
+    for hook_id, sizes in results.items():
+        for key, current in sizes.items():
+            previous = baseline.get(hook_id, {}).get(key)
+            if previous is None:
+                continue
+
+            name = f"{hook_id} ({key})"
+            if regressed(
+                previous["wall_time"], current["wall_time"], tolerance, MIN_TIME_REGRESSION
+            ):
+                regressions.append(
+                    Regression(name, "wall_time", previous["wall_time"], current["wall_time"])
+                )
+            if regressed(previous["max_rss"], current["max_rss"], tolerance, MIN_RSS_REGRESSION):
+                regressions.append(
+                    Regression(name, "max_rss", previous["max_rss"], current["max_rss"], "MiB")
+                )
+    return regressions
+
+
+def summary(results: dict) -> str:
+    """
+    Table of the scaling curve of each hook, one column per app size.
+    """
+    keys = list(next(iter(results.values()), {}))
+    rows = [("hook", *keys)]
+    for hook_id, sizes in results.items():
+        rows.append(
+            (
+                hook_id,
+                *(f"{sizes[key]['wall_time']:.2f}s {sizes[key]['max_rss']:.0f}MiB" for key in keys),
+            )
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    )
+
+
+def _size_argument(value: str) -> tuple[str, str]:
+    dimension, _, values = value.partition("=")
+    if dimension not in AppSize._fields or not values:
+        raise argparse.ArgumentTypeError(
+            f"Expected <dimension>=<value>, with a dimension among {', '.join(AppSize._fields)}"
+        )
+    return dimension, values
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--hook",
+        dest="hooks",
+        action="append",
+        choices=list(HOOKS),
+        help="Hook to run, can be repeated. Defaults to every hook",
+    )
+    parser.add_argument(
+        "--scale",
+        type=_size_argument,
+        default=_size_argument(DEFAULT_SCALE),
+        help=f"App size dimension to scale, and its comma separated values. Defaults to {DEFAULT_SCALE}",
+    )
+    parser.add_argument(
+        "--size",
+        type=_size_argument,
+        action="append",
+        default=[],
+        help="Size of a dimension that isn't scaled, eg outputs=50. Can be repeated",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs of each hook")
+    add_baseline_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args(argv)
+
+    base = AppSize()._replace(**{dimension: int(value) for dimension, value in args.size})
+    dimension, values = args.scale
+    sizes = scale_sizes(base, dimension, [int(value) for value in values.split(",")])
+
+    try:
+        results = run_benchmark(sizes, args.hooks or list(HOOKS), args.repeat)
+    except RuntimeError as e:
+        # Never recorded, a failing run would become the baseline
+        logger.error("%s", e)
+        return 2
+    print(summary(results))
+    return check_baseline(args, "hooks", results, find_regressions)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Measures how long each console script takes to start, and which imports that time goes to.
+
+Every hook runs on every commit, so its startup latency is paid over and over: its modules
+import django (and set it up), lxml, jsonschema, jinja2 and friends, and configure
+logging. For each console script of the package this runs `<script> --help` in fresh interpreters,
+in-process rather than through the hooks daemon, and records:
+
+- wall_time: the median wall time of a cold start
+- import_time: the total import time reported by `python -X importtime`
+- packages: the import time of each top level package imported, for those above a threshold
+
+Results are compared with the baseline of an earlier run, see local_hooks.benchmarks.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from importlib.metadata import distribution
+from typing import Optional
+
+from local_hooks.benchmarks import (
+    DEFAULT_TOLERANCE,
+    Regression,
+    add_baseline_arguments,
+    check_baseline,
+    regressed,
+)
+from local_hooks.daemon import NO_DAEMON_ENV_VAR
+
+logger = logging.getLogger(__name__)
+
+DISTRIBUTION_NAME = "local-hooks"
+DEFAULT_REPEAT = 5
+# Growth in seconds below which timings are considered noise
+MIN_REGRESSION = 0.05
+# Packages taking less than this to import are left out of the breakdown
+PACKAGE_THRESHOLD = 0.005
+
+
+def console_scripts() -> dict[str, str]:
+    """
+    Console scripts of the installed package, and the functions they run.
+    """
+    return {
+        entry_point.name: entry_point.value
+        for entry_point in distribution(DISTRIBUTION_NAME).entry_points
+        if entry_point.group == "console_scripts"
+    }
+
+
+def _script_command(entry_point: str, *python_args: str) -> list[str]:
+    # Same code as the console script wrappers pip generates
+    module, function = entry_point.split(":")
+    code = f"import sys\nfrom {module} import {function}\nsys.exit({function}())"
+    return [sys.executable, *python_args, "-c", code, "--help"]
+
+
+def _script_env() -> dict[str, str]:
+    return {**os.environ, NO_DAEMON_ENV_VAR: "1"}
+
+
+def parse_importtime(output: str) -> tuple[float, dict[str, float]]:
+    """
+    Returns the total import time in seconds, and the time spent importing each top level package,
+    from the stderr of `python -X importtime`.
+    """
+    total = 0.0
+    packages: dict[str, float] = defaultdict(float)
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        try:
+            self_time, cumulative = int(self_time) / 1e6, int(cumulative) / 1e6
+        except ValueError:
+            # Header line
+            continue
+        # The name follows a single space, nested imports are further indented under their parent
+        name = name[1:]
+        packages[name.strip().split(".")[0]] += self_time
+        if not name.startswith(" "):
+            total += cumulative
+    return round(total, 6), dict(packages)
+
+
+def measure_script(name: str, entry_point: str, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Cold start and import time breakdown of a console script.
+    """
+    command = _script_command(entry_point)
+    # The first run may compile bytecode, and isn't counted
+    subprocess.run(command, env=_script_env(), capture_output=True, check=True)
+
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=_script_env(), capture_output=True, check=True)
+        wall_times.append(time.perf_counter() - start)
+
+    result = subprocess.run(
+        _script_command(entry_point, "-X", "importtime"),
+        env=_script_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_time, packages = parse_importtime(result.stderr)
+    logger.info("Measured %s", name)
+    return {
+        "wall_time": round(statistics.median(wall_times), 6),
+        "import_time": import_time,
+        "packages": {
+            package: round(seconds, 6)
+            for package, seconds in sorted(packages.items(), key=lambda item: -item[1])
+            if seconds >= PACKAGE_THRESHOLD
+        },
+    }
+
+
+def find_regressions(
+    baseline: dict, results: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> list[Regression]:
+    """
+    Compares the results of scripts that are also in the baseline.
+    """
+    regressions = []
+    for script, current in results.items():
+        if script not in baseline:
+            continue
+
+        previous = baseline[script]
+        for metric in ("wall_time", "import_time"):
+            if regressed(previous[metric], current[metric], tolerance, MIN_REGRESSION):
+                regressions.append(Regression(script, metric, previous[metric], current[metric]))
+
+        # A package newly imported at startup, eg django by --help, regresses every run
+        for package, seconds in current["packages"].items():
+            if package not in previous["packages"] and seconds > MIN_REGRESSION:
+                regressions.append(Regression(script, f"import of {package}", None, seconds))
+    return regressions
+
+
+def summary(results: dict, top: int = 3) -> str:
+    rows = [("script", "wall (s)", "imports (s)", "heaviest imports")]
+    for script, result in results.items():
+        heaviest = ", ".join(
+            f"{package} {seconds:.3f}"
+            for package, seconds in list(result["packages"].items())[:top]
+        )
+        rows.append(
+            (script, f"{result['wall_time']:.3f}", f"{result['import_time']:.3f}", heaviest)
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.rjust(width) if i in (1, 2) else cell.ljust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        ).rstrip()
+        for row in rows
+    )
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--script",
+        dest="scripts",
+        action="append",
+        help="Console script to measure, can be repeated. Defaults to every script",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Cold starts to time")
+    add_baseline_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args(argv)
+
+    scripts = console_scripts()
+    unknown = set(args.scripts or ()) - set(scripts)
+    if unknown:
+        logger.error("Unknown console scripts: %s", ", ".join(sorted(unknown)))
+        return 2
+
+    results = {
+        name: measure_script(name, entry_point, args.repeat)
+        for name, entry_point in scripts.items()
+        if not args.scripts or name in args.scripts
+    }
+    print(summary(results))
+    return check_baseline(args, "startup", results, find_regressions)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Generates synthetic legacy connectors of a configurable size, to benchmark the hooks on apps far
+larger than the test fixtures.
+
+The app is a regular connector: an app JSON with `actions` actions of `outputs` data paths each,
+the first `views` of them rendered by custom HTML views, a connector module with one handler per
+action, a consts module of `consts` constants, and a tree of helper packages `depth` levels deep
+with `modules` modules per level. Generating the same size twice gives the same app.
+"""
+
+import json
+import uuid
+from pathlib import Path
+from typing import NamedTuple
+
+APP_NAME = "synthetic"
+LICENSE_HEADER = """\
+# File: {file_name}
+#
+# Copyright (c) 2023 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""
+LOGO = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10" fill="{color}"/></svg>\n'
+VIEW_TEMPLATE = """\
+<!-- File: {file_name} -->
+<!-- Copyright (c) 2023 Splunk Inc. -->
+{{% extends 'widgets/widget_template.html' %}}
+{{% load custom_template %}}
+{{% block widget_content %}}
+<table class="synthetic-table">
+  <tr>{headers}</tr>
+  {{% for result in results %}}
+  {{% for data in result.data %}}
+  <tr>{cells}</tr>
+  {{% endfor %}}
+  {{% endfor %}}
+</table>
+{{% endblock %}}
+"""
+
+
+class AppSize(NamedTuple):
+    actions: int = 10
+    outputs: int = 10
+    views: int = 2
+    consts: int = 100
+    depth: int = 2
+    modules: int = 3
+
+
+def _action_identifier(index: int) -> str:
+    return f"get_object_{index}"
+
+
+def _action_json(index: int, size: AppSize) -> dict:
+    identifier = _action_identifier(index)
+    outputs = [
+        {
+            "data_path": "action_result.status",
+            "data_type": "string",
+            "example_values": ["success", "failed"],
+        },
+        {"data_path": "action_result.message", "data_type": "string"},
+        {
+            "data_path": "action_result.parameter.object_id",
+            "data_type": "string",
+            "contains": ["synthetic object id"],
+        },
+        {"data_path": "action_result.parameter.limit", "data_type": "numeric"},
+        {"data_path": "summary.total_objects", "data_type": "numeric", "example_values": [1]},
+        {"data_path": "summary.total_objects_successful", "data_type": "numeric"},
+    ]
+    for field in range(size.outputs):
+        output = {
+            "data_path": f"action_result.data.*.field_{field}",
+            "data_type": "string",
+            "example_values": [f"value {field}"],
+        }
+        if field < 5:
+            output.update(column_name=f"Field {field}", column_order=field)
+        outputs.append(output)
+
+    if index < size.views:
+        render = {"type": "custom", "view": f"{APP_NAME}_view.display_view_{index}"}
+    else:
+        render = {"type": "table", "title": f"Object {index}"}
+
+    return {
+        "action": f"get object {index}",
+        "identifier": identifier,
+        "description": f"Get object number {index}",
+        "verbose": f"Retrieves the objects of type {index}, with all of their fields.",
+        "type": "investigate",
+        "read_only": True,
+        "parameters": {
+            "object_id": {
+                "description": "Object ID",
+                "data_type": "string",
+                "required": True,
+                "primary": True,
+                "contains": ["synthetic object id"],
+                "order": 0,
+            },
+            "limit": {
+                "description": "Maximum number of objects to return",
+                "data_type": "numeric",
+                "default": 100,
+                "order": 1,
+            },
+        },
+        "output": outputs,
+        "render": render,
+        "versions": "EQ(*)",
+    }
+
+
+def _app_json(size: AppSize) -> dict:
+    return {
+        "appid": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{APP_NAME}/{size}")),
+        "name": f"Synthetic {size.actions} actions",
+        "description": "Synthetic connector generated for benchmarks",
+        "type": "information",
+        "product_vendor": "Splunk",
+        "logo": f"logo_{APP_NAME}.svg",
+        "logo_dark": f"logo_{APP_NAME}_dark.svg",
+        "product_name": "Synthetic",
+        "python_version": "3",
+        "latest_tested_versions": ["Cloud, October 30, 2024"],
+        "product_version_regex": ".*",
+        "publisher": "Splunk",
+        "license": "Copyright (c) 2023 Splunk Inc.",
+        "app_version": "1.0.0",
+        "utctime_updated": "2025-01-17T22:32:42.000000Z",
+        "package_name": f"phantom_{APP_NAME}",
+        "main_module": f"{APP_NAME}_connector.py",
+        "min_phantom_version": "6.3.0",
+        "fips_compliant": False,
+        "app_wizard_version": "1.0.0",
+        "configuration": {
+            "base_url": {
+                "description": "Base URL of the service",
+                "data_type": "string",
+                "required": True,
+                "order": 0,
+            },
+            "api_key": {
+                "description": "API key",
+                "data_type": "password",
+                "required": True,
+                "order": 1,
+            },
+        },
+        "actions": [
+            {
+                "action": "test connectivity",
+                "identifier": "test_connectivity",
+                "description": "Validate the asset configuration for connectivity",
+                "type": "test",
+                "read_only": True,
+                "parameters": {},
+                "output": [],
+                "versions": "EQ(*)",
+            },
+            *(_action_json(index, size) for index in range(size.actions)),
+        ],
+    }
+
+
+def _connector_module(size: AppSize) -> str:
+    file_name = f"{APP_NAME}_connector.py"
+    handlers = "".join(
+        f"""
+    def _handle_{_action_identifier(index)}(self, param):
+        action_result = self.add_action_result(ActionResult(dict(param)))
+        ret_val, response = self._make_rest_call(
+            ENDPOINT_{index % max(size.consts, 1)}, action_result, params={{"limit": param.get("limit")}}
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        for item in response:
+            action_result.add_data(item)
+        action_result.update_summary({{"total_objects": len(response)}})
+        return action_result.set_status(phantom.APP_SUCCESS)
+"""
+        for index in range(size.actions)
+    )
+    dispatch = "".join(
+        f'            "{_action_identifier(index)}": self._handle_{_action_identifier(index)},\n'
+        for index in range(size.actions)
+    )
+    return (
+        LICENSE_HEADER.format(file_name=file_name)
+        + f"""
+import json
+import sys
+
+import phantom.app as phantom
+import requests
+from phantom.action_result import ActionResult
+from phantom.base_connector import BaseConnector
+
+from {APP_NAME}_consts import *  # noqa: F403
+
+
+class SyntheticConnector(BaseConnector):
+    def __init__(self):
+        super().__init__()
+        self._base_url = None
+
+    def initialize(self):
+        config = self.get_config()
+        self._base_url = config["base_url"]
+        return phantom.APP_SUCCESS
+
+    def _make_rest_call(self, endpoint, action_result, params=None):
+        try:
+            response = requests.get(f"{{self._base_url}}{{endpoint}}", params=params, timeout=30)
+            return phantom.APP_SUCCESS, response.json()
+        except Exception as e:
+            return action_result.set_status(phantom.APP_ERROR, str(e)), None
+
+    def _handle_test_connectivity(self, param):
+        action_result = self.add_action_result(ActionResult(dict(param)))
+        self.save_progress("Test Connectivity Passed")
+        return action_result.set_status(phantom.APP_SUCCESS)
+{handlers}
+    def handle_action(self, param):
+        handlers = {{
+            "test_connectivity": self._handle_test_connectivity,
+{dispatch}        }}
+        return handlers[self.get_action_identifier()](param)
+
+
+def main():
+    with open(sys.argv[1]) as f:
+        in_json = json.load(f)
+
+    connector = SyntheticConnector()
+    connector.print_progress_message = True
+    print(json.dumps(json.loads(connector._handle_action(json.dumps(in_json), None)), indent=4))
+
+
+if __name__ == "__main__":
+    main()
+"""
+    )
+
+
+def _consts_module(size: AppSize) -> str:
+    file_name = f"{APP_NAME}_consts.py"
+    lines = [LICENSE_HEADER.format(file_name=file_name)]
+    for index in range(max(size.consts, 1)):
+        lines.append(f'ENDPOINT_{index} = "/api/v1/objects/{index}"')
+        lines.append(f'ERROR_MESSAGE_{index} = "Unable to retrieve object {index}: {{error}}"')
+    return "\n".join(lines) + "\n"
+
+
+def _view_module(size: AppSize) -> str:
+    file_name = f"{APP_NAME}_view.py"
+    views = "".join(
+        f'''
+
+def display_view_{index}(provides, all_app_runs, context):
+    context["results"] = [
+        {{"data": result.get_data()}} for summary, results in all_app_runs for result in results
+    ]
+    return "{APP_NAME}_view_{index}.html"
+'''
+        for index in range(size.views)
+    )
+    return LICENSE_HEADER.format(file_name=file_name) + views
+
+
+def _view_template(index: int, size: AppSize) -> str:
+    fields = range(min(size.outputs, 5))
+    return VIEW_TEMPLATE.format(
+        file_name=f"{APP_NAME}_view_{index}.html",
+        headers="".join(f"<th>Field {field}</th>" for field in fields),
+        cells="".join(f"<td>{{{{ data.field_{field} }}}}</td>" for field in fields),
+    )
+
+
+def _helper_tree(app_dir: Path, size: AppSize) -> None:
+    package_dir = app_dir / "lib"
+    for level in range(size.depth):
+        package_dir = package_dir / f"level_{level}"
+        package_dir.mkdir(parents=True)
+        (package_dir / "__init__.py").write_text("")
+        for module in range(size.modules):
+            file_name = f"helper_{module}.py"
+            (package_dir / file_name).write_text(
+                LICENSE_HEADER.format(file_name=file_name)
+                + f"\n\ndef helper_{module}(value):\n    return str(value) * {module + 1}\n"
+            )
+
+
+def generate_app(app_dir: Path, size: AppSize = AppSize()) -> Path:
+    """
+    Writes a synthetic connector of the given size to app_dir, which must not exist yet.
+    """
+    app_dir.mkdir(parents=True)
+    (app_dir / f"{APP_NAME}.json").write_text(json.dumps(_app_json(size), indent=4) + "\n")
+    (app_dir / f"{APP_NAME}_connector.py").write_text(_connector_module(size))
+    (app_dir / f"{APP_NAME}_consts.py").write_text(_consts_module(size))
+    (app_dir / "__init__.py").write_text("")
+    (app_dir / f"logo_{APP_NAME}.svg").write_text(LOGO.format(color="black"))
+    (app_dir / f"logo_{APP_NAME}_dark.svg").write_text(LOGO.format(color="white"))
+    if size.views:
+        (app_dir / f"{APP_NAME}_view.py").write_text(_view_module(size))
+    for index in range(size.views):
+        (app_dir / f"{APP_NAME}_view_{index}.html").write_text(_view_template(index, size))
+    (app_dir / "release_notes").mkdir()
+    (app_dir / "release_notes" / "unreleased.md").write_text(
+        "**Unreleased**\n\n* Added the get object actions\n"
+    )
+    _helper_tree(app_dir, size)
+    return app_dir
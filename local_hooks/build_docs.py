@@ -8,6 +8,7 @@ author notes (legacy README.md).
 import argparse
 import dataclasses
 import datetime
+import functools
 import logging
 import re
 from pathlib import Path
@@ -23,6 +24,8 @@ from jinja2.ext import Extension
 from jinja2.lexer import Token, TokenStream
 from local_hooks.helpers import (
     find_uv_lock_file,
+    load_cached_sdk_app_manifest,
+    sdk_manifest_digest,
     load_sdk_apps_environment,
     generate_sdk_app_manifest,
 )
@@ -98,13 +101,16 @@ def get_app_json(app_json_dir, json_name):
     if uv_lock_path := find_uv_lock_file(app_json_dir):
         uv_lock_dir = uv_lock_path.parent
         logging.info("SDK app detected, generating manifest: UV_LOCK_DIR=%s", uv_lock_dir)
+        digest = sdk_manifest_digest(uv_lock_dir)
+        if (manifest := load_cached_sdk_app_manifest(uv_lock_dir, digest)) is not None:
+            return manifest
 
         # Install dependencies from pyproject.toml using uv
         load_sdk_apps_environment(uv_lock_dir)
 
         # Generate the SDK manifest in a temporary directory
         logging.info("Generating SDK app manifest in temporary directory")
-        return generate_sdk_app_manifest(uv_lock_dir)
+        return generate_sdk_app_manifest(uv_lock_dir, digest)
 
     # Handle non-SDK apps - file-based JSON loading
     if not json_name:
@@ -146,7 +152,12 @@ def load_file(file_path: Path) -> Optional[str]:
     return None
 
 
-def render_docs(json_content: dict[str, Any]) -> str:
+@functools.cache
+def jinja_environment() -> Environment:
+    """
+    The Jinja environment rendering the docs, created once so that its templates are only
+    compiled once per process.
+    """
     env = Environment(
         loader=FileSystemLoader(TEMPLATE_DIR),
         extensions=[EscapeMDFilterVarsExtension],
@@ -157,7 +168,11 @@ def render_docs(json_content: dict[str, Any]) -> str:
     env.filters["generate_gh_fragment"] = generate_gh_fragment
     env.filters["generate_action_heading_text"] = generate_action_heading_text
     env.filters["escape_markdown"] = escape_markdown
+    return env
 
+
+def render_docs(json_content: dict[str, Any]) -> str:
+    env = jinja_environment()
     logging.info(f"Rendering with template: {TEMPLATE_NAME} from {TEMPLATE_DIR}")
     t = env.get_template(TEMPLATE_NAME)
     return mdformat.text(t.render(connector=json_content, year=datetime.datetime.now().year))
@@ -179,9 +194,13 @@ def write_docs(output_readme_path: Path, content: str) -> bool:
 
 
 def build_docs(
-    connector_path: Path, json_name: Optional[str] = None, app_version: Optional[str] = None
+    connector_path: Path,
+    json_name: Optional[str] = None,
+    app_version: Optional[str] = None,
+    app_json: Optional[dict[str, Any]] = None,
 ) -> dict[str, str]:
-    json_content = get_app_json(connector_path, json_name)
+    # The app JSON may be given by the caller, eg an SDK manifest that was already generated
+    json_content = app_json if app_json is not None else get_app_json(connector_path, json_name)
     if app_version:
         json_content["app_version"] = app_version
 
@@ -8,10 +8,14 @@
 # - Text files
 # - LICENSE files/generation
 
+import logging
 import os
 import re
+import subprocess
+from collections.abc import Iterable, Iterator
 from datetime import datetime
 from pathlib import Path
+from typing import Optional, Union
 
 from jinja2 import Environment, FileSystemLoader
 
@@ -154,7 +158,57 @@ def update_file_copyright(file_path: Path, copyright_register: str) -> bool:
     return updated
 
 
-def update_copyrights(app_dir: str, copyright_str: str, copyright_register: str) -> dict[str, str]:
+def _all_source_files(app_dir: Path) -> Iterator[Path]:
+    for root, _, files in os.walk(app_dir):
+        for file in files:
+            yield Path(root, file)
+
+
+def _changed_source_files(app_dir: Path, changed_files: Iterable[Union[str, Path]]) -> list[Path]:
+    # The app JSON holds a license as well, and is checked even if it didn't change
+    file_paths = {path.resolve() for path in app_dir.glob("*.json")}
+    for changed_file in changed_files:
+        file_path = Path(changed_file).resolve()
+        # Deleted files, and files of other apps of the repo, are left alone
+        if file_path.is_file() and file_path.is_relative_to(app_dir):
+            file_paths.add(file_path)
+    return sorted(file_paths)
+
+
+def git_changed_files(app_dir: str, base_ref: str) -> Optional[list[Path]]:
+    """
+    Files of the app that changed since a git ref, including staged and untracked files, or None if
+    git can't tell, eg outside of a git repository or for an unknown ref.
+    """
+    commands = (
+        ["git", "diff", "--name-only", "--relative", "--diff-filter=d", base_ref, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    )
+    changed_files = []
+    for command in commands:
+        result = subprocess.run(command, cwd=app_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            logging.warning(
+                "Unable to list files changed since %s, updating every file: %s",
+                base_ref,
+                result.stderr.strip(),
+            )
+            return None
+        changed_files.extend(Path(app_dir, line) for line in result.stdout.splitlines() if line)
+    return changed_files
+
+
+def update_copyrights(
+    app_dir: str,
+    copyright_str: str,
+    copyright_register: str,
+    changed_files: Optional[Iterable[Union[str, Path]]] = None,
+) -> dict[str, str]:
+    """
+    Updates the copyright of the files of an app. Given the files that changed, eg the files staged
+    for a commit, only these files and the app JSON and LICENSE are updated, rather than every
+    file of the app.
+    """
     updated_files = {}
 
     # Handle LICENSE file specially (generation)
@@ -168,20 +222,22 @@ def update_copyrights(app_dir: str, copyright_str: str, copyright_register: str)
         updated_files["LICENSE"] = license_content
 
     # All other files check
-    for root, _, files in os.walk(app_dir):
-        for file in files:
-            if file == "LICENSE":
-                continue
+    app_path = Path(app_dir).resolve()
+    if changed_files is None:
+        file_paths = _all_source_files(app_path)
+    else:
+        file_paths = _changed_source_files(app_path, changed_files)
 
-            file_path = Path(root, file)
-            relative_path = str(file_path.relative_to(app_dir))
+    for file_path in file_paths:
+        if file_path.name == "LICENSE":
+            continue
 
-            # Skip unsupported extensions
-            if not file.endswith(SUPPORTED_SOURCE_FILE_EXTENSIONS):
-                continue
+        # Skip unsupported extensions
+        if not file_path.name.endswith(SUPPORTED_SOURCE_FILE_EXTENSIONS):
+            continue
 
-            if update_file_copyright(file_path, copyright_register):
-                updated_files[relative_path] = file_path.read_text()
+        if update_file_copyright(file_path, copyright_register):
+            updated_files[str(file_path.relative_to(app_path))] = file_path.read_text()
 
     return updated_files
 
@@ -191,12 +247,28 @@ def main():
 
     parser = argparse.ArgumentParser()
     parser.add_argument("directory")
+    parser.add_argument(
+        "filenames",
+        nargs="*",
+        help="Files that changed, eg passed by pre-commit. Defaults to every file of the app",
+    )
     parser.add_argument("--copyright", default="Splunk Inc.")
-
-    args = parser.parse_args()
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only update the files changed since this git ref, eg origin/main",
+    )
+
+    # pre-commit passes the file names after the hook arguments
+    args = parser.parse_intermixed_args()
     copyright_register = args.copyright
     copyright_str = f"Copyright (c) {copyright_register}"
-    update_copyrights(args.directory, copyright_str, copyright_register)
+
+    # Without any change information, every file is updated
+    changed_files = args.filenames or None
+    if changed_files is None and args.changed_since:
+        changed_files = git_changed_files(args.directory, args.changed_since)
+    update_copyrights(args.directory, copyright_str, copyright_register, changed_files)
 
 
 if __name__ == "__main__":
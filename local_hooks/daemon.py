@@ -0,0 +1,303 @@
+"""
+Optional long lived daemon running hooks without paying for their startup.
+
+Most of the time of a short hook run goes to imports (django, which is also set up at import,
+lxml, jsonschema, requests, jinja2, mdformat) and to compiling the docs templates and the app JSON
+schema. `soar-hooks serve` does all of that once, then listens on a Unix socket. The console
+scripts of the hooks are thin clients: when a daemon is listening they pass their argv, working
+directory, environment and standard streams (as file descriptors) to it, and exit with the exit
+code of the hook. Otherwise they run the hook in-process, as before.
+
+The daemon forks a child for every request, so that each run starts from the freshly preloaded
+state: nothing an app run reads or caches (app JSON, file lists, uv.lock lookups, SDK manifests)
+survives it, and persistent caches are keyed by content digests. The daemon exits when the hooks
+code it preloaded changes on disk, so that an upgrade never runs against stale modules, and after
+an idle timeout.
+"""
+
+import importlib
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Optional
+
+from local_hooks.helpers import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+SOCKET_ENV_VAR = "SOAR_HOOKS_DAEMON_SOCKET"
+NO_DAEMON_ENV_VAR = "SOAR_HOOKS_NO_DAEMON"
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+
+# Console scripts that can be served by the daemon, and the functions they run
+ENTRY_POINTS = {
+    "build-docs": "local_hooks.build_docs:main",
+    "copyright-updates": "local_hooks.copyright_updates:main",
+    "generate-notice": "local_hooks.generate_notice:main",
+    "release-notes": "local_hooks.release_notes:main",
+    "static-tests": "local_hooks.static_tests:main",
+    "soar-hooks": "local_hooks.driver:main",
+}
+PRELOADED_MODULES = [
+    "local_hooks.build_docs",
+    "local_hooks.copyright_updates",
+    "local_hooks.driver",
+    "local_hooks.generate_notice",
+    "local_hooks.release_notes",
+    "local_hooks.static_tests",
+]
+PACKAGE_DIR = Path(__file__).parent.resolve()
+
+
+def socket_path() -> Path:
+    path = os.environ.get(SOCKET_ENV_VAR)
+    return Path(path) if path else get_cache_dir("daemon") / "hooks.sock"
+
+
+def _load_entry_point(name: str) -> Callable:
+    module, function = ENTRY_POINTS[name].split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def _exit_status(code) -> int:
+    # Same conversion as sys.exit
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def call_daemon(name: str, argv: list[str]) -> Optional[int]:
+    """
+    Runs a console script in the daemon, with the standard streams of this process. Returns its
+    exit code, or None if no daemon could take the request.
+    """
+    path = socket_path()
+    if os.environ.get(NO_DAEMON_ENV_VAR) or not path.exists():
+        return None
+
+    request = {"entry_point": name, "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(path))
+            socket.send_fds(sock, [b"R"], [0, 1, 2])
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile() as f:
+                response = f.readline()
+    except OSError as e:
+        logger.debug("Hooks daemon unavailable at %s: %s", path, e)
+        return None
+
+    if not response:
+        # The hook may have had side effects already, so it isn't run again
+        print("The hooks daemon stopped while running the hook", file=sys.stderr)
+        return 1
+    return json.loads(response).get("exit_code")
+
+
+def _client(name: str) -> Callable[[], int]:
+    def main():
+        exit_code = call_daemon(name, sys.argv)
+        if exit_code is not None:
+            return exit_code
+        return _load_entry_point(name)()
+
+    main.__doc__ = f"Runs {name}, in the hooks daemon if one is listening."
+    return main
+
+
+build_docs = _client("build-docs")
+copyright_updates = _client("copyright-updates")
+generate_notice = _client("generate-notice")
+release_notes = _client("release-notes")
+static_tests = _client("static-tests")
+_soar_hooks = _client("soar-hooks")
+
+
+def soar_hooks():
+    """
+    Runs soar-hooks, in the hooks daemon if one is listening, unless it's starting one.
+    """
+    if sys.argv[1:2] == ["serve"]:
+        return _load_entry_point("soar-hooks")()
+    return _soar_hooks()
+
+
+def _preload() -> None:
+    for module in PRELOADED_MODULES:
+        importlib.import_module(module)
+
+    from local_hooks.app_tests import test_modules
+    from local_hooks.app_tests.json_tests import app_schema_validator
+    from local_hooks.build_docs import TEMPLATE_NAME, jinja_environment
+
+    test_modules()
+    jinja_environment().get_template(TEMPLATE_NAME)
+    app_schema_validator().is_valid({})
+    # mdformat loads its parser extensions on first use
+    importlib.import_module("mdformat").text("# docs\n")
+
+
+def _source_fingerprint() -> dict[str, int]:
+    """
+    Modification times of the preloaded hooks code and data.
+    """
+    paths = [
+        Path(module.__file__)
+        for module in list(sys.modules.values())
+        if getattr(module, "__file__", None) and Path(module.__file__).is_relative_to(PACKAGE_DIR)
+    ]
+    paths.append(PACKAGE_DIR / "app_tests" / "app_schema.json")
+    paths.append(PACKAGE_DIR / "app_tests" / "test_registry.json")
+    paths.extend((PACKAGE_DIR / "templates").glob("*"))
+
+    fingerprint = {}
+    for path in paths:
+        try:
+            fingerprint[str(path)] = path.stat().st_mtime_ns
+        except OSError:
+            fingerprint[str(path)] = -1
+    return fingerprint
+
+
+def _receive_request(conn: socket.socket) -> tuple[dict, list[int]]:
+    _, fds, _, _ = socket.recv_fds(conn, 1, 3)
+    with conn.makefile("rb") as f:
+        request = json.loads(f.readline())
+    if len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        raise ValueError(f"Expected 3 file descriptors, received {len(fds)}")
+    return request, fds
+
+
+def _run_request(conn: socket.socket, request: dict, fds: list[int]) -> None:
+    """
+    Runs a request in a forked child, with the client's streams, working directory and
+    environment.
+    """
+    logger.disabled = True
+    for target_fd, fd in enumerate(fds):
+        os.dup2(fd, target_fd)
+        os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    sys.argv = request["argv"]
+
+    try:
+        exit_code = _load_entry_point(request["entry_point"])()
+    except SystemExit as e:
+        exit_code = e.code
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    exit_code = _exit_status(exit_code)
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    conn.sendall(json.dumps({"exit_code": exit_code}).encode() + b"\n")
+
+
+def _reap_children(block: bool = False) -> None:
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, 0 if block else os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def _bind(path: Path) -> socket.socket:
+    if path.exists():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(path))
+            except OSError:
+                # Left behind by a daemon that didn't exit cleanly
+                path.unlink()
+            else:
+                raise RuntimeError(f"A hooks daemon is already listening on {path}")
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(str(path))
+    finally:
+        os.umask(old_umask)
+    server.listen()
+    return server
+
+
+def serve(path: Optional[Path] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> int:
+    """
+    Preloads the hooks and serves requests until the hooks code changes or no request came for
+    :param: idle_timeout seconds.
+    """
+    path = path or socket_path()
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    start = time.perf_counter()
+    _preload()
+    fingerprint = _source_fingerprint()
+    logger.info("Preloaded hooks in %.2fs", time.perf_counter() - start)
+
+    server = _bind(path)
+    server.settimeout(idle_timeout)
+    logger.info("Hooks daemon listening on %s", path)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                logger.info("No request for %ss, exiting", idle_timeout)
+                return 0
+            _reap_children()
+
+            with conn:
+                conn.settimeout(None)
+                uid = struct.unpack(
+                    "3i", conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, 12)
+                )[1]
+                if uid != os.getuid():
+                    logger.warning("Rejecting a request from uid %s", uid)
+                    continue
+                try:
+                    request, fds = _receive_request(conn)
+                except (OSError, ValueError) as e:
+                    logger.warning("Invalid request: %s", e)
+                    continue
+
+                if _source_fingerprint() != fingerprint:
+                    for fd in fds:
+                        os.close(fd)
+                    conn.sendall(json.dumps({"exit_code": None}).encode() + b"\n")
+                    logger.info("Hooks code changed, exiting")
+                    return 0
+
+                if os.fork() == 0:
+                    server.close()
+                    try:
+                        _run_request(conn, request, fds)
+                    finally:
+                        os._exit(0)
+                for fd in fds:
+                    os.close(fd)
+    finally:
+        server.close()
+        path.unlink(missing_ok=True)
+        _reap_children(block=True)
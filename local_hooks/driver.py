@@ -0,0 +1,210 @@
+"""
+Runs several hooks against an app in a single process.
+
+Each hook is normally its own pre-commit entry point, and so its own Python process that imports
+its dependencies, rediscovers the app and, for SDK apps, syncs the app environment with uv and
+generates its manifest again. `soar-hooks run` builds a single AppContext instead and runs the
+selected hooks against it, in the same order as .pre-commit-hooks.yaml, with the same side
+effects and exit codes as their own entry points.
+"""
+
+import argparse
+import copy
+import logging
+import sys
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AppContext:
+    """
+    App state shared by the hooks of a run, each part computed at most once and only when a hook
+    needs it.
+
+    Only state that hooks don't modify is shared: the app JSON of legacy apps and the file tree
+    are read again by each hook, since earlier hooks update them (eg copyright updates the license
+    in the app JSON, and adds a LICENSE file).
+    """
+
+    def __init__(self, app_dir: Path) -> None:
+        self.app_dir = app_dir.resolve()
+
+    @cached_property
+    def parser(self):
+        # Imported lazily, like every hook module, so that a run only imports what it needs
+        from local_hooks.app_tests.utils.app_parser import AppParser
+
+        return AppParser(self.app_dir)
+
+    @cached_property
+    def uv_lock_path(self) -> Optional[Path]:
+        return self.parser.uv_lock_filepath
+
+    @cached_property
+    def sdk_manifest(self) -> Optional[dict]:
+        """
+        Manifest of an SDK app, generated once in its synced uv environment, or None for legacy
+        apps.
+        """
+        if self.uv_lock_path is None:
+            return None
+        return self.parser.app_json
+
+
+def _run_build_docs(context: AppContext, args: argparse.Namespace) -> int:
+    from local_hooks.build_docs import build_docs
+
+    json_name = args.json_name
+    if json_name is not None and not json_name.endswith(".json"):
+        json_name = json_name + ".json"
+
+    # build_docs adds its own keys to the app JSON
+    app_json = copy.deepcopy(context.sdk_manifest)
+    build_docs(context.app_dir, json_name=json_name, app_json=app_json)
+    return 0
+
+
+def _run_copyright(context: AppContext, args: argparse.Namespace) -> int:
+    from local_hooks.copyright_updates import git_changed_files, update_copyrights
+
+    changed_files = None
+    if args.changed_since:
+        changed_files = git_changed_files(str(context.app_dir), args.changed_since)
+    update_copyrights(
+        str(context.app_dir), f"Copyright (c) {args.copyright}", args.copyright, changed_files
+    )
+    return 0
+
+
+def _run_notice_file(context: AppContext, args: argparse.Namespace) -> int:
+    from local_hooks.generate_notice import generate_notice
+
+    generate_notice(context.app_dir, context.uv_lock_path)
+    return 0
+
+
+def _run_release_notes(context: AppContext, args: argparse.Namespace) -> int:
+    from local_hooks.release_notes import check_release_notes
+
+    check_release_notes(str(context.app_dir))
+    return 0
+
+
+def _run_static_tests(context: AppContext, args: argparse.Namespace) -> int:
+    from local_hooks.app_tests import load_test_registry
+    from local_hooks.static_tests import run_static_tests
+
+    tests = None
+    if args.skip_static_tests:
+        tests = [
+            test["name"]
+            for suite in load_test_registry()
+            for test in suite["tests"]
+            if test["name"] not in args.skip_static_tests
+        ]
+    return run_static_tests(context.app_dir, tests=tests, parser=context.parser)
+
+
+# Hook ids of .pre-commit-hooks.yaml, in the order they run
+HOOKS: dict[str, Callable[[AppContext, argparse.Namespace], int]] = {
+    "build-docs": _run_build_docs,
+    "copyright": _run_copyright,
+    "notice-file": _run_notice_file,
+    "release-notes": _run_release_notes,
+    "static-tests": _run_static_tests,
+}
+
+
+def run_hooks(context: AppContext, hook_ids: list[str], args: argparse.Namespace) -> int:
+    """
+    Runs the hooks against the app, even if some of them fail.
+
+    Returns the exit code of the first failing hook, or 0 if they all passed. An exception raised
+    by a hook counts as exit code 1, like for an uncaught exception in its entry point.
+    """
+    exit_codes = {}
+    for hook_id in HOOKS:
+        if hook_id not in hook_ids:
+            continue
+
+        logger.info("Running %s", hook_id)
+        try:
+            exit_codes[hook_id] = HOOKS[hook_id](context, args)
+        except Exception:
+            logger.exception("%s failed", hook_id)
+            exit_codes[hook_id] = 1
+        except SystemExit as e:
+            # Some hooks exit directly, with the same exit code as sys.exit() would give
+            if e.code is None:
+                exit_codes[hook_id] = 0
+            else:
+                exit_codes[hook_id] = e.code if isinstance(e.code, int) else 1
+
+    for hook_id, exit_code in exit_codes.items():
+        logger.info("%-15s %s", hook_id, "Passed" if exit_code == 0 else f"Failed ({exit_code})")
+    return next((code for code in exit_codes.values() if code != 0), 0)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="soar-hooks", description=__doc__.strip().splitlines()[0])
+    sub_parsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub_parsers.add_parser("run", help="Run hooks against an app")
+    run_parser.add_argument("app_dir", type=Path, nargs="?", default=".", help="Path to the app")
+    run_parser.add_argument(
+        "--hook",
+        dest="hooks",
+        action="append",
+        choices=list(HOOKS),
+        help="Hook to run, can be repeated. Defaults to every hook",
+    )
+    run_parser.add_argument("--json-name", help="App JSON file name, for build-docs")
+    run_parser.add_argument(
+        "--copyright", default="Splunk Inc.", help="Copyright holder, for copyright"
+    )
+    run_parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only update the files changed since this git ref, for copyright",
+    )
+    run_parser.add_argument(
+        "--skip-static-test",
+        dest="skip_static_tests",
+        action="append",
+        default=[],
+        metavar="TEST",
+        help="Static test not to run, eg valid_app_name_and_guid. Can be repeated, for static-tests",
+    )
+
+    serve_parser = sub_parsers.add_parser(
+        "serve", help="Start a daemon serving the hooks' console scripts, see local_hooks.daemon"
+    )
+    serve_parser.add_argument("--socket", type=Path, help="Unix socket to listen on")
+    serve_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=30 * 60,
+        help="Exit after this many seconds without a request",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run" and not args.app_dir.is_dir():
+        parser.error(f"App directory {args.app_dir} does not exist or is not a directory")
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    logging.getLogger().setLevel(logging.INFO)
+    args = parse_args(argv)
+    if args.command == "serve":
+        from local_hooks.daemon import serve
+
+        return serve(args.socket, args.idle_timeout)
+    return run_hooks(AppContext(args.app_dir), args.hooks or list(HOOKS), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -401,9 +401,14 @@ def main():
     logging.getLogger().setLevel(logging.INFO)
     args = parse_args()
     connector_path = Path(args.connector_path)
+    generate_notice(connector_path, find_uv_lock_file(connector_path))
 
-    uv_lock_path = find_uv_lock_file(connector_path)
 
+def generate_notice(connector_path: Path, uv_lock_path: Optional[Path]):
+    """
+    Generates the NOTICE file of an app, delegating to the SDK for SDK apps, ie apps with the
+    given uv.lock file.
+    """
     if uv_lock_path:
         sdk_version = get_sdk_version_from_lock(uv_lock_path)
         if sdk_version is None or sdk_version < Version("3.20.0"):
@@ -1,12 +1,142 @@
+import functools
+import hashlib
 import logging
+import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 import subprocess
 import tempfile
 import json
 import shutil
 import os
 
+CACHE_DIR_ENV_VAR = "SOAR_HOOKS_CACHE_DIR"
+# Host directories of the directories mounted in a container, eg /src=/home/me/app
+HOST_DIRS_ENV_VAR = "SOAR_HOOKS_HOST_DIRS"
+# Directories never holding app sources, besides hidden ones like .git and .venv
+NON_SOURCE_DIRS = frozenset(["__pycache__", "node_modules", "wheels"])
+# Directories that never hold the project of an app, searched for uv.lock files
+UV_LOCK_PRUNED_DIRS = frozenset(["build", "dist", "site-packages", "test", "tests", "venv"])
+UV_LOCK_MAX_DEPTH = 3
+HASH_CHUNK_SIZE = 1024 * 1024
+# ioctl request cloning the extents of one file into another (Linux btrfs/xfs/overlayfs)
+FICLONE = 0x40049409
+
+
+def get_cache_dir(*sub_dirs: str) -> Path:
+    """
+    Return a directory in the persistent cache shared by all hooks, creating it if needed.
+
+    The cache lives under $XDG_CACHE_HOME/soar-hooks (~/.cache/soar-hooks by default) and can
+    be relocated by setting SOAR_HOOKS_CACHE_DIR.
+    """
+    cache_root = os.environ.get(CACHE_DIR_ENV_VAR)
+    if not cache_root:
+        xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        cache_root = os.path.join(xdg_cache_home, "soar-hooks")
+
+    cache_dir = Path(cache_root, *sub_dirs)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def host_path(path: Union[str, Path]) -> str:
+    """
+    Real path of a file on the host, for a path in a container whose directory is mapped by
+    $SOAR_HOOKS_HOST_DIRS, eg /src=/home/me/app (several mappings are separated by colons).
+    Other paths are only resolved.
+    """
+    real_path = os.path.realpath(path)
+    for mapping in filter(None, os.environ.get(HOST_DIRS_ENV_VAR, "").split(os.pathsep)):
+        container_dir, _, host_dir = mapping.partition("=")
+        container_dir = container_dir.rstrip("/")
+        if real_path == container_dir or real_path.startswith(f"{container_dir}/"):
+            return host_dir.rstrip("/") + real_path[len(container_dir) :]
+    return real_path
+
+
+def path_cache_key(path: Union[str, Path]) -> str:
+    """
+    Key of the persistent cache entries of a directory, eg an app. Containers mount every app at
+    the same path, so the key identifies the directory on the host.
+    """
+    return hashlib.sha256(host_path(path).encode()).hexdigest()[:16]
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """
+    Return the hex encoded sha256 digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def place_file(src: Union[str, Path], dst: Union[str, Path], move: bool = False) -> str:
+    """
+    Atomically makes the content of src available at dst, avoiding copying any data if possible.
+
+    src is renamed to dst if :param: move is set, and hardlinked or reflinked otherwise. The data
+    is only streamed to dst when none of these work, eg across devices. Returns the method used:
+    "rename", "hardlink", "reflink" or "copy".
+    """
+    dst = Path(dst)
+    if move:
+        try:
+            os.replace(src, dst)
+            return "rename"
+        except OSError:
+            pass
+
+    tmp_dst = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(src, tmp_dst)
+            method = "hardlink"
+        except OSError:
+            with open(src, "rb") as fsrc, open(tmp_dst, "wb") as fdst:
+                try:
+                    import fcntl
+
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                    method = "reflink"
+                except (ImportError, OSError):
+                    shutil.copyfileobj(fsrc, fdst, HASH_CHUNK_SIZE)
+                    method = "copy"
+        os.replace(tmp_dst, dst)
+    finally:
+        if tmp_dst.exists():
+            tmp_dst.unlink()
+
+    if move:
+        os.remove(src)
+    return method
+
+
+def cached_file_sha256(path: Union[str, Path]) -> str:
+    """
+    Like file_sha256, but remembers digests in the persistent cache keyed by the file's path,
+    size, modification time and inode, so that unchanged files are only ever hashed once.
+    """
+    stat = os.stat(path)
+    stat_key = f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{stat.st_ino}"
+    record_path = get_cache_dir("file-hashes") / hashlib.sha256(stat_key.encode()).hexdigest()
+    try:
+        return record_path.read_text()
+    except OSError:
+        pass
+
+    digest = file_sha256(path)
+    try:
+        tmp_record_path = record_path.with_name(f".{record_path.name}.{os.getpid()}.tmp")
+        tmp_record_path.write_text(digest)
+        os.replace(tmp_record_path, record_path)
+    except OSError as e:
+        logging.debug("Unable to cache the digest of %s: %s", path, e)
+    return digest
+
 
 def ensure_uv_available():
     """
@@ -47,25 +177,123 @@ def ensure_uv_available():
         raise RuntimeError(f"uv installation failed: {e}")
 
 
+def _is_pruned_from_uv_lock_search(dir_name: str) -> bool:
+    return dir_name.startswith(".") or dir_name in NON_SOURCE_DIRS | UV_LOCK_PRUNED_DIRS
+
+
+@functools.cache
+def _find_uv_lock_relpath(root: str) -> Optional[str]:
+    fallback = None
+    level = [""]
+    for _ in range(UV_LOCK_MAX_DEPTH + 1):
+        next_level = []
+        for rel_dir in level:
+            try:
+                entries = list(os.scandir(os.path.join(root, rel_dir)))
+            except OSError:
+                continue
+            names = {entry.name for entry in entries}
+            if "uv.lock" in names:
+                uv_lock = os.path.join(rel_dir, "uv.lock")
+                if "pyproject.toml" in names:
+                    return uv_lock
+                fallback = fallback or uv_lock
+            next_level.extend(
+                os.path.join(rel_dir, entry.name)
+                for entry in sorted(entries, key=lambda e: e.name)
+                if entry.is_dir(follow_symlinks=False)
+                and not _is_pruned_from_uv_lock_search(entry.name)
+            )
+        level = next_level
+    return fallback
+
+
 def find_uv_lock_file(connector_path: Path) -> Optional[Path]:
     """
     Find uv.lock file in the connector_path or its subdirectories.
     Returns the path to the uv.lock file if found, None otherwise.
+
+    Directories are searched breadth first, at most UV_LOCK_MAX_DEPTH levels deep and skipping
+    those that can't hold the app's project, and the search stops at the shallowest uv.lock next
+    to a pyproject.toml. The result is remembered for the rest of the process, see
+    forget_uv_lock_files.
     """
     # By convention, SDK apps are managed by uv and old apps are not
-    for uv_lock_path in connector_path.rglob("uv.lock"):
-        logging.info("Found uv.lock at: %s", uv_lock_path)
-        return uv_lock_path
+    uv_lock_relpath = _find_uv_lock_relpath(os.path.realpath(connector_path))
+    if uv_lock_relpath is None:
+        return None
+
+    uv_lock_path = Path(connector_path, uv_lock_relpath)
+    logging.info("Found uv.lock at: %s", uv_lock_path)
+    return uv_lock_path
+
+
+def forget_uv_lock_files():
+    """
+    Forget the uv.lock files found so far, eg between runs of a long lived process.
+    """
+    _find_uv_lock_relpath.cache_clear()
+
+
+SYNC_STAMP_NAME = ".soar-hooks-sync-stamp"
+
+
+def _sdk_environment_stamp(uv_lock_dir: Path) -> Optional[str]:
+    """
+    Identify the state a synced environment was built from: uv.lock, pyproject.toml and the
+    interpreter of the app's .venv. Returns None if there is no .venv yet.
+    """
+    venv_dir = uv_lock_dir / ".venv"
+    try:
+        interpreter = {
+            "pyvenv_cfg": (venv_dir / "pyvenv.cfg").read_text(),
+            "python": os.path.realpath(venv_dir / "bin" / "python"),
+            "uv_python": os.environ.get("UV_PYTHON"),
+        }
+    except OSError:
+        return None
+
+    inputs = {
+        name: cached_file_sha256(uv_lock_dir / name) if (uv_lock_dir / name).is_file() else None
+        for name in ("uv.lock", "pyproject.toml")
+    }
+    return json.dumps({**inputs, "interpreter": interpreter}, sort_keys=True)
+
+
+def _is_sdk_environment_synced(uv_lock_dir: Path) -> bool:
+    stamp = _sdk_environment_stamp(uv_lock_dir)
+    try:
+        return stamp is not None and (uv_lock_dir / ".venv" / SYNC_STAMP_NAME).read_text() == stamp
+    except OSError:
+        return False
 
 
 def load_sdk_apps_environment(uv_lock_dir: Path):
     """
     Load the SDK app's environment.
+
+    Syncing is skipped when the .venv was last synced from the current uv.lock, pyproject.toml
+    and interpreter. Concurrent hooks serialize on a lock, so that only one of them syncs.
     """
+    pyproject_path = uv_lock_dir / "pyproject.toml"
+    if not pyproject_path.exists():
+        raise ValueError("No pyproject.toml found in %s", uv_lock_dir)
+    if _is_sdk_environment_synced(uv_lock_dir):
+        logging.info("SDK app environment is up to date")
+        return
+
     ensure_uv_available()
 
-    pyproject_path = uv_lock_dir / "pyproject.toml"
-    if pyproject_path.exists():
+    import fcntl
+
+    lock_name = hashlib.sha256(os.path.realpath(uv_lock_dir).encode()).hexdigest()[:16]
+    with open(get_cache_dir("uv-sync") / f"{lock_name}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Another hook may have synced while we were waiting for the lock
+        if _is_sdk_environment_synced(uv_lock_dir):
+            logging.info("SDK app environment is up to date")
+            return
+
         logging.info("Installing dependencies from pyproject.toml")
         try:
             subprocess.run(
@@ -76,13 +304,64 @@ def load_sdk_apps_environment(uv_lock_dir: Path):
         except subprocess.CalledProcessError as e:
             logging.error("Failed to install dependencies: %s", e)
             raise e
-    else:
-        raise ValueError("No pyproject.toml found in %s", uv_lock_dir)
 
+        # uv sync may have updated uv.lock, so the stamp is only computed now
+        stamp = _sdk_environment_stamp(uv_lock_dir)
+        if stamp is not None:
+            stamp_path = uv_lock_dir / ".venv" / SYNC_STAMP_NAME
+            tmp_stamp_path = stamp_path.with_name(f"{stamp_path.name}.{os.getpid()}.tmp")
+            tmp_stamp_path.write_text(stamp)
+            os.replace(tmp_stamp_path, stamp_path)
+
+
+def sdk_manifest_digest(uv_lock_dir: Path) -> str:
+    """
+    Digest of the inputs of an SDK app manifest: uv.lock, pyproject.toml and the app's Python
+    sources. Computed once per lookup, and passed on to generate_sdk_app_manifest on a miss.
+    """
+    inputs = {}
+    for name in ("uv.lock", "pyproject.toml"):
+        path = uv_lock_dir / name
+        inputs[name] = cached_file_sha256(path) if path.is_file() else None
+
+    for root, dirs, files in os.walk(uv_lock_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d not in NON_SOURCE_DIRS]
+        for file in files:
+            if file.endswith(".py"):
+                path = Path(root, file)
+                inputs[str(path.relative_to(uv_lock_dir))] = cached_file_sha256(path)
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def _sdk_manifest_cache_path(uv_lock_dir: Path, digest: Optional[str] = None) -> Path:
+    digest = digest or sdk_manifest_digest(uv_lock_dir)
+    return get_cache_dir("sdk-manifests") / f"{digest}.json"
 
-def generate_sdk_app_manifest(uv_lock_dir: Path) -> dict:
+
+def load_cached_sdk_app_manifest(uv_lock_dir: Path, digest: Optional[str] = None) -> Optional[dict]:
+    """
+    Return the manifest previously generated for the current sources of an SDK app, if any.
+    """
+    try:
+        with open(_sdk_manifest_cache_path(uv_lock_dir, digest)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    logging.info("Using the cached SDK app manifest")
+    return manifest
+
+
+def generate_sdk_app_manifest(uv_lock_dir: Path, digest: Optional[str] = None) -> dict:
+    """
+    Generate the manifest of an SDK app, and cache it until its sources change. Given the digest
+    of the sources computed for the cache lookup, they aren't hashed again.
+    """
     ensure_uv_available()
 
+    # Computed beforehand, so that sources edited meanwhile are picked up by the next run
+    cache_path = _sdk_manifest_cache_path(uv_lock_dir, digest)
+
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_manifest_path = Path(temp_dir) / "sdk_app_manifest.json"
         try:
@@ -103,7 +382,14 @@ def generate_sdk_app_manifest(uv_lock_dir: Path) -> dict:
             logging.info("Successfully generated SDK manifest in temp directory")
 
             with open(temp_manifest_path) as f:
-                return json.load(f)
+                manifest = json.load(f)
+            try:
+                tmp_cache_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+                shutil.copyfile(temp_manifest_path, tmp_cache_path)
+                os.replace(tmp_cache_path, cache_path)
+            except OSError as e:
+                logging.debug("Unable to cache the SDK app manifest: %s", e)
+            return manifest
 
         except subprocess.CalledProcessError as e:
             logging.error("Failed to generate SDK manifest: %s", e)
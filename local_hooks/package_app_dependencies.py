@@ -8,21 +8,49 @@ a manylinux2014_x86_64 container https://github.com/pypa/manylinux
 """
 
 import argparse
+import concurrent.futures
+import contextlib
+import fcntl
+import hashlib
 import itertools
 import json
 import os
 import pathlib
-import random
 import re
 import shutil
-import string
 import subprocess
 import sys
+import tempfile
+import urllib.parse
+import urllib.request
+import zipfile
 from collections import namedtuple
 from enum import Enum, unique
 
 import logging
 
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, Version
+
+from local_hooks.helpers import (
+    cached_file_sha256,
+    file_sha256,
+    get_cache_dir,
+    path_cache_key,
+    place_file,
+)
+from local_hooks.timing import PhaseRecorder, run_child
+from local_hooks.wheel_cache import RepairCache, WheelCache
+from local_hooks.wheel_index import WheelIndex
+from local_hooks.wheel_inspect import WheelVerdict, compatible_platform_tags, inspect_wheel
+from local_hooks.wheel_metadata import (
+    marker_environment,
+    reachable_distributions,
+    read_requires_dist,
+)
+from local_hooks.wheel_slim import SlimWheelCache
+
 logging.basicConfig(
     level=logging.INFO,
     format="{levelname:8} - {message}",
@@ -31,6 +59,13 @@ logging.basicConfig(
 logger = logging.getLogger()
 
 PLATFORM = "manylinux_2_28_x86_64"
+STAGING_DIR_ENV_VAR = "SOAR_HOOKS_STAGING_DIR"
+# Optional constraints file pinning the versions of the distributions SOAR provides, eg
+# `pip freeze` output. No such file ships with the hooks: without one, SOAR provided distributions
+# are resolved like any other and only filtered from the pins afterwards
+PLATFORM_CONSTRAINTS_ENV_VAR = "SOAR_HOOKS_PLATFORM_CONSTRAINTS"
+# Exit code of a --native run that needs to be completed by building wheels in a container
+NATIVE_FALLBACK_EXIT_CODE = 3
 REPAIRED_WHEELS_REL_PATH = "repaired-wheels"
 
 WHEEL_PATTERN = re.compile(
@@ -60,7 +95,7 @@ IGNORED_WHEELS = [
 ]
 
 Wheel = namedtuple("Wheel", ["file_name", "distribution", "python_version", "platform"])
-AppJsonWheelEntry = namedtuple("AppJsonWheel", ["module", "input_file"])
+AppJsonWheelEntry = namedtuple("AppJsonWheelEntry", ["module", "input_file"])
 
 
 @unique
@@ -156,56 +191,178 @@ def _should_package_pip_dependency_key(app_dir, pip_dependencies_key):
     return runtime_dependency_keys.get(python_version, pip_dependencies_key) == pip_dependencies_key
 
 
-def _repair_wheels(wheels_to_check, all_wheels, wheels_dir):
+def _check_and_repair_wheel(
+    whl, wheels_dir, repaired_wheels_dir, check=True, repair_cache=None, sha256=None, details=None
+):
+    """
+    Checks a single wheel with auditwheel and repairs it if it's a platform wheel. The check is
+    skipped when :param: check is False, ie the wheel is already known to need a repair.
+
+    Each wheel is repaired into its own sub dir of repaired_wheels_dir, so that concurrent repairs
+    never mix up their outputs. Returns the paths of the repaired wheels, or None if the original
+    wheel should be kept as is. auditwheel output is captured and logged once the wheel is done,
+    so that the output of concurrent checks isn't interleaved. Conclusive outcomes are recorded in
+    :param: repair_cache under the :param: sha256 of the wheel. The resources used by auditwheel are
+    added to the :param: details of the timing record of the wheel.
+    """
+    whl_path = os.path.join(wheels_dir, whl.file_name)
+    if check:
+        show_result = run_child(["auditwheel", "show", whl_path], details)
+        if show_result.returncode != 0:
+            logger.info("Skipping non-platform wheel %s", whl)
+            if repair_cache is not None:
+                repair_cache.put(sha256, RepairCache.KEEP)
+            return None
+
+    whl_repaired_dir = os.path.join(repaired_wheels_dir, whl.file_name)
+    repair_result = run_child(
+        ["auditwheel", "repair", whl_path, "--plat", PLATFORM, "-w", whl_repaired_dir], details
+    )
+    if repair_result.returncode != 0:
+        logger.warning("Failed to repair platform wheel %s:\n%s", whl, repair_result.stderr.strip())
+        return None
+
+    logger.info("Repaired platform wheel %s", whl)
+    repaired_wheel_paths = [
+        os.path.join(whl_repaired_dir, f) for f in sorted(os.listdir(whl_repaired_dir))
+    ]
+    if repair_cache is not None:
+        repair_cache.put(sha256, RepairCache.REPAIRED, repaired_wheel_paths)
+    return repaired_wheel_paths
+
+
+def _record_wheel(recorder, wheel_path, phase):
+    """
+    Records the resources spent on a wheel with :param: recorder, if any. Yields the details of the
+    record either way.
+    """
+    if recorder is None:
+        return contextlib.nullcontext({})
+    return recorder.wheel(wheel_path, phase)
+
+
+def _repair_wheels(
+    wheels_to_check, all_wheels, wheels_dir, jobs=None, recorder=None, repair_cache=None
+):
     """
     Uses auditwheel to 1) check for platform wheels depending on external binary dependencies
     and 2) bundle external binary dependencies into the platform wheels in necessary. Repaired
     wheels are placed in a sub dir of wheels_dir by auditwheel, which we then use to replace
     the original wheels at the root level of wheels_dir.
 
-    https://github.com/pypa/auditwheel
-    """
-    if subprocess.run(["auditwheel", "-V"]).returncode != 0:
-        logger.warning(
-            "auditwheel is not installed or is not supported on the given platform. "
-            "Skipping wheel repairs."
-        )
-        return
+    Wheels are first inspected in-process, so that auditwheel only runs for the wheels that
+    actually need a repair, or that couldn't be classified without it. Up to :param: jobs wheels
+    (the CPU count by default) are then checked and repaired concurrently. Results are merged back
+    into :param: all_wheels in wheel name order once every wheel is done, regardless of the order
+    in which they completed. The time spent on each wheel is recorded with :param: recorder.
 
-    repaired_wheels_dir = os.path.join(wheels_dir, REPAIRED_WHEELS_REL_PATH)
+    With a :param: repair_cache, auditwheel doesn't run at all for wheels it has already checked
+    or repaired, in this run or any previous one.
 
+    https://github.com/pypa/auditwheel
+    """
+    wheels_for_auditwheel = []
     for whl in wheels_to_check:
         logger.info("Checking %s", whl)
-        whl_path = os.path.join(wheels_dir, whl.file_name)
-        if subprocess.run(["auditwheel", "show", whl_path]).returncode != 0:
+        wheel_path = os.path.join(wheels_dir, whl.file_name)
+        with _record_wheel(recorder, wheel_path, "inspect") as details:
+            verdict = inspect_wheel(wheel_path, PLATFORM)
+            details["verdict"] = verdict.value if verdict else None
+        if verdict is WheelVerdict.PURE:
             logger.info("Skipping non-platform wheel %s", whl)
+        elif verdict is WheelVerdict.COMPLIANT:
+            logger.info("Skipping platform wheel %s already compliant with %s", whl, PLATFORM)
         else:
-            repair_result = subprocess.run(
-                ["auditwheel", "repair", whl_path, "--plat", PLATFORM, "-w", repaired_wheels_dir]
-            )
-            if repair_result.returncode != 0:
-                logger.warning("Failed to repair platform wheel %s", whl)
-                continue
+            wheels_for_auditwheel.append((whl, verdict is None))
 
-            # original wheel will be replaced by repaired wheels written to repaired-wheels/
-            os.remove(whl_path)
-            all_wheels.remove(whl)
+    if not wheels_for_auditwheel:
+        return
 
-    if os.path.exists(repaired_wheels_dir):
-        for whl in os.listdir(repaired_wheels_dir):
-            shutil.copyfile(os.path.join(repaired_wheels_dir, whl), os.path.join(wheels_dir, whl))
-            match = WHEEL_PATTERN.match(whl)
+    repaired_wheels_dir = os.path.join(wheels_dir, REPAIRED_WHEELS_REL_PATH)
+    repaired_wheel_paths, wheel_hashes = {}, {}
+    if repair_cache is not None:
+        uncached_wheels = []
+        for whl, check in wheels_for_auditwheel:
+            wheel_hashes[whl] = file_sha256(os.path.join(wheels_dir, whl.file_name))
+            cached = repair_cache.get(wheel_hashes[whl])
+            if cached is None:
+                uncached_wheels.append((whl, check))
+                continue
+
+            verdict, cached_wheel_paths = cached
+            logger.info("Reusing the previous auditwheel outcome for %s: %s", whl, verdict)
+            repaired_wheel_paths[whl] = None
+            if verdict == RepairCache.REPAIRED:
+                whl_repaired_dir = os.path.join(repaired_wheels_dir, whl.file_name)
+                os.makedirs(whl_repaired_dir)
+                repaired_wheel_paths[whl] = []
+                for cached_wheel_path in cached_wheel_paths:
+                    path = os.path.join(whl_repaired_dir, cached_wheel_path.name)
+                    place_file(cached_wheel_path, path)
+                    repaired_wheel_paths[whl].append(path)
+        wheels_for_auditwheel = uncached_wheels
+
+    if wheels_for_auditwheel and subprocess.run(["auditwheel", "-V"]).returncode != 0:
+        logger.warning(
+            "auditwheel is not installed or is not supported on the given platform. "
+            "Skipping wheel repairs."
+        )
+        wheels_for_auditwheel = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(
+                _timed_check_and_repair_wheel,
+                whl,
+                wheels_dir,
+                repaired_wheels_dir,
+                check,
+                recorder,
+                repair_cache,
+                wheel_hashes.get(whl),
+            ): whl
+            for whl, check in wheels_for_auditwheel
+        }
+        for future in concurrent.futures.as_completed(futures):
+            repaired_wheel_paths[futures[future]] = future.result()
+
+    for whl in sorted(repaired_wheel_paths):
+        if repaired_wheel_paths[whl] is None:
+            continue
+
+        # original wheel will be replaced by repaired wheels written to repaired-wheels/
+        os.remove(os.path.join(wheels_dir, whl.file_name))
+        all_wheels.remove(whl)
+
+        for repaired_wheel_path in repaired_wheel_paths[whl]:
+            repaired_whl = os.path.basename(repaired_wheel_path)
+            place_file(repaired_wheel_path, os.path.join(wheels_dir, repaired_whl), move=True)
+            match = WHEEL_PATTERN.match(repaired_whl)
             all_wheels.add(
                 Wheel(
-                    whl,
+                    repaired_whl,
                     match.group("distribution"),
                     match.group("python_version"),
                     match.group("platform"),
                 )
             )
+
+    if os.path.exists(repaired_wheels_dir):
         shutil.rmtree(repaired_wheels_dir)
 
 
+def _timed_check_and_repair_wheel(
+    whl, wheels_dir, repaired_wheels_dir, check, recorder, repair_cache=None, sha256=None
+):
+    wheel_path = os.path.join(wheels_dir, whl.file_name)
+    with _record_wheel(recorder, wheel_path, "auditwheel") as details:
+        repaired_wheel_paths = _check_and_repair_wheel(
+            whl, wheels_dir, repaired_wheels_dir, check, repair_cache, sha256, details
+        )
+        details["repaired"] = repaired_wheel_paths is not None
+    return repaired_wheel_paths
+
+
 def _remove_platform_wheels(all_built_wheels, new_wheels_dir, existing_app_json_wheel_entries):
     """
     Removes all platform wheels in :param: all_built_wheels from :param: new_wheels_dir
@@ -236,7 +393,7 @@ def _remove_platform_wheels(all_built_wheels, new_wheels_dir, existing_app_json_
     return existing_wheels_entries_to_keep
 
 
-def _update_app_json(app_json, pip_dependencies_key, wheel_entries, app_dir):
+def _update_app_json(app_json, pip_dependencies_key, wheel_entries):
     """
     Updates the app's JSON config to specify that the wheels under the
     repo's wheel/ folder be installed as dependencies.
@@ -250,9 +407,23 @@ def _update_app_json(app_json, pip_dependencies_key, wheel_entries, app_dir):
 
     app_json.content[pip_dependencies_key] = {"wheel": wheel_paths}
 
-    with open(os.path.join(app_dir, app_json.file_name), "w") as out:
-        json.dump(app_json.content, out, indent=APP_JSON_INDENT)
-        out.write("\n")
+
+@contextlib.contextmanager
+def _locked_app_json(app_dir):
+    """
+    Loads the app JSON while holding an exclusive lock on it, and writes back any changes made to
+    its content once the block exits without error.
+    """
+    file_name = _load_app_json(app_dir).file_name
+    with open(os.path.join(app_dir, file_name), "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        app_json = AppJson(file_name, json.load(f))
+        yield app_json
+
+        f.seek(0)
+        json.dump(app_json.content, f, indent=APP_JSON_INDENT)
+        f.write("\n")
+        f.truncate()
 
 
 def _parse_pip_dependency_wheels(app_json, pip_dependency_key):
@@ -262,9 +433,116 @@ def _parse_pip_dependency_wheels(app_json, pip_dependency_key):
     ]
 
 
-def _copy_new_wheels(new_wheels, new_wheels_dir, app_dir):
+def _requirement_roots(requirements_file, environment):
+    """
+    Returns the requirements of requirements.txt applying to the marker environment, or None if
+    some line isn't a plain requirement.
+    """
+    roots = []
+    for line in _normalized_requirements(requirements_file):
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            return None
+        if requirement.marker is None or requirement.marker.evaluate({**environment, "extra": ""}):
+            roots.append(requirement)
+    return roots
+
+
+def _is_soar_provided(distribution):
+    return canonicalize_name(distribution) in set(map(canonicalize_name, IGNORED_WHEELS))
+
+
+def _platform_constraints_args():
+    """
+    pip arguments constraining the distributions SOAR provides to the versions it ships, if
+    those were given.
+    """
+    constraints_file = os.environ.get(PLATFORM_CONSTRAINTS_ENV_VAR)
+    return ["-c", constraints_file] if constraints_file else []
+
+
+def _prune_unreachable_wheels(wheels, wheels_dir, requirements_file, pip_dependencies_key):
+    """
+    Removes the wheels that requirements.txt only pulls in through distributions SOAR already
+    provides, eg the dependencies of requests, by walking the Requires-Dist graph of the built
+    wheels for the runtime's Python version.
+
+    Nothing is pruned if requirements.txt or the metadata of any wheel can't be fully understood.
+    """
+    python_version = RUNTIME_PYTHON_VERSIONS.get(pip_dependencies_key)
+    if python_version is None:
+        return
+
+    environment = marker_environment(python_version)
+    roots = _requirement_roots(requirements_file, environment)
+    if roots is None:
+        return
+
+    requires_by_distribution = {}
+    for whl in wheels:
+        requires = read_requires_dist(os.path.join(wheels_dir, whl.file_name))
+        if requires is None:
+            return
+        requires_by_distribution[canonicalize_name(whl.distribution)] = requires
+
+    reachable = reachable_distributions(
+        roots, requires_by_distribution, environment, excluded=IGNORED_WHEELS
+    )
+    for whl in sorted(wheels):
+        if canonicalize_name(whl.distribution) not in reachable:
+            logger.info(
+                "Dropping %s, only required through distributions provided by SOAR", whl.file_name
+            )
+            os.remove(os.path.join(wheels_dir, whl.file_name))
+            wheels.remove(whl)
+
+
+def _slim_wheels(wheels, wheels_dir, existing_wheel_paths, recorder=None):
+    """
+    Replaces the new wheels with slimmed versions, without tests, docs, type stubs, bytecode or
+    debug symbols, and logs how much each of them shrank. Wheels already in the app are left
+    as they are.
+    """
+    slim_wheel_cache = SlimWheelCache()
+    existing_wheel_file_names = set(os.path.basename(p) for p in existing_wheel_paths)
+    size_before, size_after = 0, 0
+    for whl in sorted(wheels):
+        if whl.file_name in existing_wheel_file_names:
+            continue
+
+        wheel_path = os.path.join(wheels_dir, whl.file_name)
+        with _record_wheel(recorder, wheel_path, "slim") as details:
+            try:
+                result = slim_wheel_cache.slim(wheel_path)
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                logger.warning("Unable to slim %s: %s", whl.file_name, e)
+                continue
+            details.update(size_before=result.size_before, size_after=result.size_after)
+
+        size_before += result.size_before
+        size_after += result.size_after
+        logger.info(
+            "Slimmed %s: %d KiB -> %d KiB%s",
+            whl.file_name,
+            result.size_before // 1024,
+            result.size_after // 1024,
+            " (cached)" if result.removed_members is None else "",
+        )
+
+    if size_before:
+        logger.info(
+            "Slimmed new wheels from %d KiB to %d KiB", size_before // 1024, size_after // 1024
+        )
+
+
+def _copy_new_wheels(new_wheels, new_wheels_dir, app_dir, recorder=None):
     """
     Copies new wheels to the wheels/ directory of the app dir.
+
+    Wheels are hardlinked or reflinked from the staging dir when possible, and only streamed
+    when the staging dir is on another device. Wheels already present in the wheels/ directory
+    are never rewritten.
     """
     new_wheel_paths = []
 
@@ -273,11 +551,21 @@ def _copy_new_wheels(new_wheels, new_wheels_dir, app_dir):
         new_wheel_paths.append(os.path.join("wheels", dst_path))
         full_dst_path = os.path.join(app_dir, new_wheel_paths[-1])
         if not os.path.exists(full_dst_path):
-            logger.info("Writing new wheel %s --> %s", wheel_name, new_wheel_paths[-1])
-            shutil.copyfile(src_fp, full_dst_path)
+            # Runtimes are packaged concurrently and may write the same shared wheel, so
+            # place_file never exposes a partially written file
+            with _record_wheel(recorder, src_fp, "copy") as details:
+                details["method"] = place_file(src_fp, full_dst_path)
+            logger.info(
+                "Writing new wheel %s --> %s (%s)",
+                wheel_name,
+                new_wheel_paths[-1],
+                details["method"],
+            )
         else:
+            # Wheels built from sdists aren't byte for byte reproducible, and hashing both just to
+            # tell is wasted I/O: the existing wheel is kept either way
             logger.info(
-                "Found wheel %s to already exist in %s",
+                "Found wheel %s to already exist in %s, keeping it",
                 wheel_name,
                 os.path.dirname(new_wheel_paths[-1]),
             )
@@ -322,18 +610,420 @@ def _remove_unreferenced_wheel_paths(
             os.remove(os.path.join(app_dir, path))
 
 
-def main():
+def _load_wheel_cache(wheel_cache_dir, no_wheel_cache):
     """
-    Main entrypoint.
+    Opens the persistent wheel cache requested on the command line, if any.
     """
-    args = parse_args()
+    if no_wheel_cache:
+        return None
+
+    try:
+        if wheel_cache_dir:
+            return WheelCache(wheel_cache_dir)
+        return WheelCache.default()
+    except OSError as e:
+        logger.warning("Wheel cache is unavailable, building without it: %s", e)
+        return None
+
+
+def _load_repair_cache(no_wheel_cache):
+    """
+    Opens the persistent cache of auditwheel outcomes, unless caching was disabled.
+    """
+    if no_wheel_cache:
+        return None
+
+    try:
+        return RepairCache.default(PLATFORM)
+    except OSError as e:
+        logger.warning("auditwheel cache is unavailable, checking every wheel: %s", e)
+        return None
 
-    app_dir, pip_path, repair_wheels, pip_dependencies_key = (
-        args.app_dir,
-        args.pip_path,
-        args.repair_wheels,
-        args.pip_dependencies_key,
+
+def _update_wheel_cache(wheel_cache, wheels, wheels_dir):
+    """
+    Stores the final set of built (and possibly repaired) wheels in the wheel cache so that other
+    apps, and later runs for this app, can reuse them instead of building them again.
+    """
+    reused, stored = 0, 0
+    try:
+        for whl in sorted(wheels):
+            if wheel_cache.add(os.path.join(wheels_dir, whl.file_name)):
+                stored += 1
+            else:
+                reused += 1
+        wheel_cache.evict()
+    except OSError as e:
+        logger.warning("Failed to update the wheel cache: %s", e)
+        return
+
+    logger.info("Wheel cache: %d wheels reused, %d wheels stored", reused, stored)
+
+
+def _lock_file_path(app_dir, pip_dependencies_key):
+    """
+    Lockfile of a runtime section of an app, kept in the persistent cache.
+    """
+    return get_cache_dir("locks", path_cache_key(app_dir)) / f"{pip_dependencies_key}.txt"
+
+
+def _universal_resolution_path(app_dir):
+    """
+    Universal resolution of an app, kept in the persistent cache. It's specific to the app, which
+    may provide its own wheels, and so keyed by its host path like lockfiles.
+    """
+    return get_cache_dir("resolutions", path_cache_key(app_dir)) / "universal.txt"
+
+
+def _native_partial_dir(app_dir, pip_dependencies_key):
+    """
+    Prebuilt wheels a --native run downloaded for a runtime section of an app, and the pins left
+    to build in a manylinux container, kept in the persistent cache for the container run.
+    """
+    return get_cache_dir("native", path_cache_key(app_dir)) / pip_dependencies_key
+
+
+def _requirements_digest(requirements_file):
+    """
+    Digest of requirements.txt identifying the resolution recorded in a lockfile, or None if it
+    contains options, URLs or other lines that can't be replayed from pinned versions.
+    """
+    requirement_lines = _normalized_requirements(requirements_file)
+    for line in requirement_lines:
+        try:
+            if Requirement(line).url:
+                return None
+        except InvalidRequirement:
+            return None
+
+    # Resolutions depend on the versions SOAR provides, when those are pinned
+    constraints_file = os.environ.get(PLATFORM_CONSTRAINTS_ENV_VAR)
+    if constraints_file:
+        requirement_lines = [*requirement_lines, "-c", *_normalized_requirements(constraints_file)]
+    return hashlib.sha256(json.dumps(requirement_lines).encode()).hexdigest()
+
+
+def _is_lock_current(lock_file, requirements_digest):
+    try:
+        with open(lock_file) as f:
+            return f"# requirements-digest: {requirements_digest}\n" in itertools.islice(f, 2)
+    except OSError:
+        return False
+
+
+def _write_lock_file(
+    lock_file, pip_dependencies_key, requirements_digest, artifact_hashes, app_dir, wheel_entries
+):
+    """
+    Records the pinned version and hashes of every distribution packaged for a runtime, annotated
+    with the wheels/ path satisfying it.
+
+    Each pin accepts both the hash of the artifact pip downloaded, which is an sdist for the
+    distributions built from source, and the hash of the final wheel in the wheels/ folder, which
+    differs for built, repaired and slimmed wheels.
+    """
+    final_wheels = {}
+    for entry in wheel_entries:
+        path = os.path.join(app_dir, entry.input_file)
+        if os.path.exists(path):
+            final_wheels[canonicalize_name(entry.module)] = (
+                entry.input_file,
+                cached_file_sha256(path),
+            )
+
+    lines = [
+        f"# Locked {pip_dependencies_key} of requirements.txt, generated by package-app-dependencies",
+        f"# requirements-digest: {requirements_digest}",
+    ]
+    for name, (version, artifact_hash) in sorted(artifact_hashes.items()):
+        hashes = {artifact_hash}
+        input_file = None
+        if name in final_wheels:
+            input_file, final_hash = final_wheels[name]
+            hashes.add(final_hash)
+
+        lines.append(f"{name}=={version} \\")
+        lines.append(" \\\n".join(f"    --hash=sha256:{h}" for h in sorted(hashes)))
+        if input_file:
+            lines.append(f"    # {input_file}")
+
+    tmp_file = lock_file.with_name(f".{lock_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text("\n".join(lines) + "\n")
+    os.replace(tmp_file, lock_file)
+
+
+def _locked_artifact_hashes(resolution, distributions):
+    """
+    Hashes of the artifacts pip downloaded for the given distributions, by canonical name, or None
+    if any of them wasn't downloaded by the resolution or has no known hash.
+    """
+    artifact_hashes = {}
+    for name in sorted(distributions):
+        version, artifact_hash = resolution.artifact_hashes.get(name, (None, None))
+        if artifact_hash is None:
+            logger.info("Not locking the requirements: no hash of the artifact of %s", name)
+            return None
+        artifact_hashes[name] = (version, artifact_hash)
+    return artifact_hashes
+
+
+def _native_pip_args(pip_dependencies_key):
+    """
+    pip arguments selecting prebuilt wheels for the target platform and the runtime's CPython
+    version, regardless of the interpreter running pip.
+    """
+    python_version = RUNTIME_PYTHON_VERSIONS[pip_dependencies_key]
+    abi = f"cp{python_version.replace('.', '')}"
+    return [
+        "--only-binary=:all:",
+        *itertools.chain.from_iterable(
+            ("--platform", tag) for tag in compatible_platform_tags(PLATFORM)
+        ),
+        "--implementation",
+        "cp",
+        "--python-version",
+        python_version,
+        *("--abi", abi, "--abi", "abi3", "--abi", "none"),
+    ]
+
+
+def _pip_wheel(job, wheel_dir, requirement_args, local_wheel_args):
+    """
+    Builds wheels for the requirements with the runtime's pip or, in native mode, downloads
+    prebuilt wheels for the runtime with the pip of the current interpreter.
+    """
+    if job.native:
+        command = [
+            sys.executable,
+            "-m",
+            "pip",
+            "download",
+            *_native_pip_args(job.pip_dependencies_key),
+            "-d",
+            wheel_dir,
+        ]
+    else:
+        command = [job.pip_path, "wheel", "-w", wheel_dir]
+
+    return subprocess.run([*command, *requirement_args, *local_wheel_args], env=_pip_env())
+
+
+def _pinned_requirements(pins_file):
+    """
+    Returns the pins of a lockfile or a universal resolution, without their hashes.
+    """
+    pins = []
+    with open(pins_file) as f:
+        for line in f:
+            # Hashes continue the pin on indented lines
+            if line.strip() and not line.startswith(("#", "-", " ")):
+                pins.append(line.strip().rstrip("\\").strip())
+    return pins
+
+
+def _download_native_wheels(job, pins_file, wheel_dir, local_wheel_args):
+    """
+    Downloads the prebuilt wheels of the pins of a lockfile or a universal resolution that apply
+    to the runtime one at a time, and returns the pins that have none, or None if the pins can't
+    be read.
+    """
+    environment = marker_environment(RUNTIME_PYTHON_VERSIONS[job.pip_dependencies_key])
+    try:
+        requirements = [Requirement(pin) for pin in _pinned_requirements(pins_file)]
+    except (OSError, InvalidRequirement) as e:
+        logger.warning("Unable to read the pins of %s: %s", pins_file, e)
+        return None
+
+    pins = [
+        f"{r.name}{r.specifier}"
+        for r in requirements
+        if not _is_soar_provided(r.name) and (r.marker is None or r.marker.evaluate(environment))
+    ]
+
+    def download(pin):
+        return _pip_wheel(job, wheel_dir, ["--no-deps", pin], local_wheel_args).returncode == 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=job.jobs) as executor:
+        downloaded = list(executor.map(download, pins))
+    return [pin for pin, ok in zip(pins, downloaded) if not ok]
+
+
+def _record_native_partial(partial_dir, requirements_digest, wheel_dir, leftovers):
+    """
+    Keeps the wheels a --native run downloaded, and the pins left to build, for the next run in
+    a manylinux container. The leftovers file is written last, and marks the record complete.
+    """
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    (partial_dir / "wheels").mkdir(parents=True)
+    for file_name in os.listdir(wheel_dir):
+        shutil.move(os.path.join(wheel_dir, file_name), partial_dir / "wheels" / file_name)
+
+    leftovers_file = partial_dir / "leftovers.txt"
+    tmp_file = leftovers_file.with_name(f".{leftovers_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(
+        "# Requirements without prebuilt wheels, generated by package-app-dependencies --native\n"
+        f"# requirements-digest: {requirements_digest}\n" + "".join(f"{pin}\n" for pin in leftovers)
+    )
+    os.replace(tmp_file, leftovers_file)
+
+
+def _pip_env():
+    env = _subprocess_env_without_pythonpath()
+    # Downloads are shared by every app and runtime, including across container runs
+    env.setdefault("PIP_CACHE_DIR", str(get_cache_dir("pip")))
+    return env
+
+
+def _artifact_hash(download_info):
+    """
+    sha256 of the artifact pip downloads for a distribution of a resolution report, or None if it
+    isn't known.
+    """
+    archive_info = download_info.get("archive_info", {})
+    if "sha256" in archive_info.get("hashes", {}):
+        return archive_info["hashes"]["sha256"]
+    algorithm, _, digest = archive_info.get("hash", "").partition("=")
+    if algorithm == "sha256":
+        return digest
+
+    url = urllib.parse.urlsplit(download_info.get("url", ""))
+    if url.scheme == "file" and "dir_info" not in download_info:
+        with contextlib.suppress(OSError):
+            return file_sha256(urllib.request.url2pathname(url.path))
+    return None
+
+
+Resolution = namedtuple("Resolution", ["requirements_file", "artifact_hashes"])
+
+
+def _resolve_requirements(job, requirements_file, local_wheel_args, resolution_dir):
+    """
+    Resolves requirements.txt for the runtime without building anything, and returns a Resolution
+    with a requirements file pinning the distributions to build and the version and sha256 of the
+    artifact pip downloads for each of them, or None if pip can't resolve it.
+
+    Distributions SOAR provides, and the distributions only required through them, are filtered
+    out of the pins after the resolution, so that they are never built into wheels for the app.
+    The resolution itself still covers them: pip fetches their metadata, and may build an sdist
+    to get it, unless $SOAR_HOOKS_PLATFORM_CONSTRAINTS pins them to the versions SOAR ships.
+    """
+    python_version = RUNTIME_PYTHON_VERSIONS.get(job.pip_dependencies_key)
+    if python_version is None:
+        return None
+    environment = marker_environment(python_version)
+    roots = _requirement_roots(requirements_file, environment)
+    if roots is None:
+        return None
+
+    report_file = os.path.join(resolution_dir, "report.json")
+    if job.native:
+        command = [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            *_native_pip_args(job.pip_dependencies_key),
+            # Required by pip along with platform options, nothing is installed in a dry run
+            "--target",
+            os.path.join(resolution_dir, "target"),
+        ]
+    else:
+        command = [job.pip_path, "install"]
+    result = subprocess.run(
+        [
+            *command,
+            "--dry-run",
+            "--ignore-installed",
+            "--quiet",
+            "--report",
+            report_file,
+            *_platform_constraints_args(),
+            "-r",
+            requirements_file,
+            *local_wheel_args,
+        ],
+        env=_pip_env(),
+    )
+    if result.returncode != 0:
+        logger.warning("Unable to resolve requirements.txt for %s", job.pip_dependencies_key)
+        return None
+
+    try:
+        with open(report_file) as f:
+            report = json.load(f)["install"]
+        resolved = {
+            canonicalize_name(item["metadata"]["name"]): item["metadata"] for item in report
+        }
+        artifact_hashes = {
+            canonicalize_name(item["metadata"]["name"]): (
+                item["metadata"]["version"],
+                _artifact_hash(item.get("download_info", {})),
+            )
+            for item in report
+        }
+        requires_by_distribution = {
+            name: [Requirement(r) for r in metadata.get("requires_dist", [])]
+            for name, metadata in resolved.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, InvalidRequirement) as e:
+        logger.warning("Unable to read the pip resolution report %s: %s", report_file, e)
+        return None
+
+    reachable = reachable_distributions(
+        roots, requires_by_distribution, environment, excluded=IGNORED_WHEELS
     )
+    skipped = sorted(set(resolved) - reachable)
+    if skipped:
+        logger.info("Not building distributions provided by SOAR: %s", ", ".join(skipped))
+
+    resolved_file = os.path.join(resolution_dir, "requirements.txt")
+    with open(resolved_file, "w") as f:
+        for name in sorted(reachable & set(resolved)):
+            f.write(f"{name}=={resolved[name]['version']}\n")
+    return Resolution(resolved_file, artifact_hashes)
+
+
+# Default pip executables for each runtime section, as installed in the manylinux image
+DEFAULT_RUNTIME_PIP_PATHS = {
+    PipDependency.PYTHON3_9.value: "pip3.9",
+    PipDependency.PYTHON3_13.value: "pip3.13",
+}
+
+RuntimeJob = namedtuple(
+    "RuntimeJob",
+    [
+        "app_dir",
+        "pip_path",
+        "pip_dependencies_key",
+        "repair_wheels",
+        "wheel_cache_dir",
+        "no_wheel_cache",
+        "jobs",
+        "staging_dir",
+        "native",
+        "resolved_requirements",
+        "slim_wheels",
+    ],
+    defaults=[False, None, False],
+)
+RuntimeResult = namedtuple(
+    "RuntimeResult",
+    ["pip_dependencies_key", "wheel_entries", "existing_wheel_paths", "timings"],
+    defaults=[None],
+)
+
+
+def package_runtime(job):
+    """
+    Builds the wheels for a single runtime section of the app JSON and copies them into the
+    wheels/ folder of the app.
+
+    The app JSON itself is left untouched: the wheel entries for the section are returned so that
+    the results of every runtime can be merged into the app JSON in a single write. Returns None
+    if the wheels could not be built.
+    """
+    app_dir, pip_dependencies_key = job.app_dir, job.pip_dependencies_key
+    wheel_cache = _load_wheel_cache(job.wheel_cache_dir, job.no_wheel_cache)
 
     wheels_dir, requirements_file = f"{app_dir}/wheels", f"{app_dir}/requirements.txt"
     pathlib.Path(wheels_dir).mkdir(exist_ok=True)
@@ -344,19 +1034,140 @@ def main():
         wheels_dir,
     )
 
-    temp_dir = os.path.join(app_dir, "".join(random.choices(string.digits, k=10)))
-    os.mkdir(temp_dir)
+    # Wheels are built in a staging dir, by default inside the app dir so that they can be
+    # hardlinked into wheels/. A local disk or tmpfs is faster when the app dir is a slow mount.
+    staging_dir = job.staging_dir or os.environ.get(STAGING_DIR_ENV_VAR) or app_dir
+    pathlib.Path(staging_dir).mkdir(parents=True, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix=f"{pip_dependencies_key}-", dir=staging_dir)
+    recorder = PhaseRecorder(runtime=pip_dependencies_key)
 
     try:
-        local_wheel_dirs = []
-        for sub_dir in os.listdir(wheels_dir):
-            local_wheel_dirs.extend(["-f", os.path.join(wheels_dir, sub_dir)])
+        # Runtimes packaged concurrently share the index, updating it is serialized by a lock
+        local_wheel_index = WheelIndex.for_wheels_dir(wheels_dir)
+        with recorder.phase("update_index"):
+            local_wheel_index.update()
+        local_wheel_args = local_wheel_index.index_url_args()
+        if wheel_cache is not None:
+            local_wheel_args.extend(wheel_cache.find_links_args())
+
+        requirements_digest = _requirements_digest(requirements_file)
+        lock_file = _lock_file_path(app_dir, pip_dependencies_key)
+        build_result, resolution = None, None
+
+        # Only build the dependencies a --native run found no prebuilt wheels for, along with the
+        # wheels it downloaded
+        partial_dir = _native_partial_dir(app_dir, pip_dependencies_key)
+        leftovers_file = partial_dir / "leftovers.txt"
+        if (
+            not job.native
+            and requirements_digest is not None
+            and _is_lock_current(leftovers_file, requirements_digest)
+        ):
+            logger.info("Building wheels for %s from %s", pip_dependencies_key, leftovers_file)
+            with recorder.phase("pip_wheel_leftovers"):
+                build_result = _pip_wheel(
+                    job, temp_dir, ["--no-deps", "-r", str(leftovers_file)], local_wheel_args
+                )
+            if build_result.returncode == 0:
+                for file_name in os.listdir(partial_dir / "wheels"):
+                    shutil.copy2(partial_dir / "wheels" / file_name, temp_dir)
+            else:
+                logger.warning("Unable to build wheels from %s", leftovers_file)
+                for file_name in os.listdir(temp_dir):
+                    os.remove(os.path.join(temp_dir, file_name))
+                build_result = None
+            shutil.rmtree(partial_dir, ignore_errors=True)
+
+        # Replay the previous resolution unless requirements.txt changed since, or else use the
+        # resolution shared by every runtime
+        pinned_requirements = []
+        if (
+            build_result is None
+            and requirements_digest is not None
+            and _is_lock_current(lock_file, requirements_digest)
+        ):
+            pinned_requirements.append(
+                ("locked", lock_file, ["--no-deps", "--require-hashes", "-r", str(lock_file)])
+            )
+        if build_result is None and job.resolved_requirements:
+            pinned_requirements.append(
+                (
+                    "universal",
+                    job.resolved_requirements,
+                    ["--no-deps", "-r", job.resolved_requirements],
+                )
+            )
 
-        build_result = subprocess.run(
-            [pip_path, "wheel", "-w", temp_dir, "-r", requirements_file, *local_wheel_dirs],
-            env=_subprocess_env_without_pythonpath(),
-        )
+        for source, pinned_file, requirement_args in pinned_requirements:
+            logger.info("Building wheels for %s from %s", pip_dependencies_key, pinned_file)
+            with recorder.phase(f"pip_wheel_{source}"):
+                build_result = _pip_wheel(job, temp_dir, requirement_args, local_wheel_args)
+            if build_result.returncode == 0:
+                break
+
+            logger.warning("Unable to build wheels from %s", pinned_file)
+            for file_name in os.listdir(temp_dir):
+                os.remove(os.path.join(temp_dir, file_name))
+            build_result = None
+
+        if build_result is None and requirements_digest is not None:
+            # Resolve first, so that only the distributions SOAR doesn't provide are built
+            with tempfile.TemporaryDirectory(dir=staging_dir) as resolution_dir:
+                with recorder.phase("resolve"):
+                    resolution = _resolve_requirements(
+                        job, requirements_file, local_wheel_args, resolution_dir
+                    )
+                if resolution is not None:
+                    with recorder.phase("pip_wheel_resolved"):
+                        build_result = _pip_wheel(
+                            job,
+                            temp_dir,
+                            ["--no-deps", "-r", resolution.requirements_file],
+                            local_wheel_args,
+                        )
+                    if build_result.returncode != 0:
+                        logger.warning("Unable to build wheels from the resolved requirements")
+                        for file_name in os.listdir(temp_dir):
+                            os.remove(os.path.join(temp_dir, file_name))
+                        build_result, resolution = None, None
+
+        if build_result is None:
+            # Resolution, downloads and sdist builds all happen within this pip run
+            with recorder.phase("pip_wheel"):
+                build_result = _pip_wheel(
+                    job,
+                    temp_dir,
+                    [*_platform_constraints_args(), "-r", requirements_file],
+                    local_wheel_args,
+                )
 
+        if build_result.returncode != 0 and job.native and pinned_requirements:
+            # Tell the pins without prebuilt wheels apart, so that only those are left to build
+            _, pins_file, _ = pinned_requirements[0]
+            for file_name in os.listdir(temp_dir):
+                os.remove(os.path.join(temp_dir, file_name))
+            with recorder.phase("pip_download_pins"):
+                leftovers = _download_native_wheels(job, pins_file, temp_dir, local_wheel_args)
+            if leftovers == []:
+                build_result = subprocess.CompletedProcess(build_result.args, 0)
+            elif leftovers:
+                _record_native_partial(partial_dir, requirements_digest, temp_dir, leftovers)
+                logger.warning(
+                    "No prebuilt %s wheels of %s for %s, they need to be built in a manylinux "
+                    "container",
+                    PLATFORM,
+                    ", ".join(leftovers),
+                    pip_dependencies_key,
+                )
+                return None
+        if build_result.returncode != 0 and job.native:
+            logger.warning(
+                "Unable to download prebuilt %s wheels for every dependency of %s, some are "
+                "likely only available as sdists and need to be built in a manylinux container",
+                PLATFORM,
+                pip_dependencies_key,
+            )
+            return None
         if build_result.returncode != 0:
             logger.error(
                 "Failed to build wheels from requirements.txt. "
@@ -367,7 +1178,7 @@ def main():
                 "container, making sure to first install any required development libraries. If you are unable "
                 "to build a required dependency for your app, please raise an issue in the app repo for further assistance."
             )
-            return
+            return None
 
         # Some apps may have different dependencies for Python3 versions, and
         # we don't want to override the wheels for the Python version we aren't building for
@@ -386,13 +1197,25 @@ def main():
             for m in (WHEEL_PATTERN.match(f) for f in wheel_file_names)
         )
 
-        # At this point, `all_built_wheels` has every dependency from requirements.txt, and all of their dependencies.
-        # This is the perfect time to filter out all of the wheels that we don't want to include.
-        all_built_wheels = set(w for w in all_built_wheels if w.distribution not in IGNORED_WHEELS)
+        # Distributions SOAR provides are normally filtered from the resolved pins, but lockfiles
+        # from earlier runs and the unresolved fallback build may still include them
+        all_built_wheels = set(w for w in all_built_wheels if not _is_soar_provided(w.distribution))
+        with recorder.phase("prune"):
+            _prune_unreachable_wheels(
+                all_built_wheels, temp_dir, requirements_file, pip_dependencies_key
+            )
+
+        # Only a resolution knows the artifacts pip downloads, the hashes of the built wheels
+        # don't match the sdists they're built from when replaying the lock
+        locked_artifact_hashes = None
+        if requirements_digest is not None and resolution is not None:
+            locked_artifact_hashes = _locked_artifact_hashes(
+                resolution, set(canonicalize_name(w.distribution) for w in all_built_wheels)
+            )
 
         updated_app_json_wheel_entries = []
 
-        if repair_wheels:
+        if job.repair_wheels:
             logger.info("Repairing new platform wheels...")
             wheels_to_repair, existing_wheel_file_names = (
                 [],
@@ -402,7 +1225,15 @@ def main():
                 if wheel.file_name not in existing_wheel_file_names:
                     wheels_to_repair.append(wheel)
 
-            _repair_wheels(wheels_to_repair, all_built_wheels, temp_dir)
+            with recorder.phase("repair"):
+                _repair_wheels(
+                    wheels_to_repair,
+                    all_built_wheels,
+                    temp_dir,
+                    jobs=job.jobs,
+                    recorder=recorder,
+                    repair_cache=_load_repair_cache(job.no_wheel_cache),
+                )
         else:
             logger.warning("New platform wheels will not be repaired but removed.")
             # Remove any platform wheels for dependencies that we just built, but check for any
@@ -415,50 +1246,704 @@ def main():
             updated_app_json_wheel_entries.extend(existing_platform_wheel_entries)
             existing_wheel_paths -= set(w.input_file for w in existing_platform_wheel_entries)
 
-        # Add the newly built wheels and remove the wheels no longer needed from the wheels folder
-        new_wheel_paths = _copy_new_wheels(all_built_wheels, temp_dir, app_dir)
+        if wheel_cache is not None:
+            with recorder.phase("wheel_cache"):
+                _update_wheel_cache(wheel_cache, all_built_wheels, temp_dir)
+
+        if job.slim_wheels:
+            with recorder.phase("slim"):
+                _slim_wheels(all_built_wheels, temp_dir, existing_wheel_paths, recorder)
+
+        # Add the newly built wheels to the wheels folder
+        with recorder.phase("copy"):
+            new_wheel_paths = _copy_new_wheels(
+                all_built_wheels, temp_dir, app_dir, recorder=recorder
+            )
+        for pair in zip(all_built_wheels, new_wheel_paths):
+            updated_app_json_wheel_entries.append(AppJsonWheelEntry(pair[0].distribution, pair[1]))
 
+        if locked_artifact_hashes is not None:
+            with recorder.phase("write_lock"):
+                _write_lock_file(
+                    lock_file,
+                    pip_dependencies_key,
+                    requirements_digest,
+                    locked_artifact_hashes,
+                    app_dir,
+                    updated_app_json_wheel_entries,
+                )
+
+        return RuntimeResult(
+            pip_dependencies_key,
+            updated_app_json_wheel_entries,
+            existing_wheel_paths,
+            recorder.report(),
+        )
+    except Exception:
+        # Keep a failure in one runtime from discarding the results of the others
+        logger.exception("Unexpected error while packaging %s", pip_dependencies_key)
+        return None
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def _merge_runtime_results(app_dir, results):
+    """
+    Records the wheels built for every runtime in the app JSON with a single locked write, and
+    removes the wheels no longer referenced by any runtime section from the wheels folder.
+    """
+    with _locked_app_json(app_dir) as app_json:
+        packaged_keys = set(r.pip_dependencies_key for r in results)
         wheels_for_other_py_versions = list(
             itertools.chain.from_iterable(
                 _parse_pip_dependency_wheels(app_json, pip_dep.value)
                 for pip_dep in PipDependency
-                if pip_dep.value != pip_dependencies_key
+                if pip_dep.value not in packaged_keys
             )
         )
 
         _remove_unreferenced_wheel_paths(
             app_dir=app_dir,
-            new_wheel_paths=new_wheel_paths,
-            existing_wheel_paths=existing_wheel_paths,
+            new_wheel_paths=set(w.input_file for r in results for w in r.wheel_entries),
+            existing_wheel_paths=set().union(*(r.existing_wheel_paths for r in results)),
             wheel_entries_for_other_py_versions=wheels_for_other_py_versions,
         )
 
         logger.info("Updating app json with latest dependencies...")
-        for pair in zip(all_built_wheels, new_wheel_paths):
-            updated_app_json_wheel_entries.append(AppJsonWheelEntry(pair[0].distribution, pair[1]))
-        _update_app_json(app_json, pip_dependencies_key, updated_app_json_wheel_entries, app_dir)
+        for result in results:
+            _update_app_json(app_json, result.pip_dependencies_key, result.wheel_entries)
+
+
+# Python version of each runtime section, used to evaluate environment markers in requirements.txt
+RUNTIME_PYTHON_VERSIONS = {
+    PipDependency.PYTHON3_9.value: "3.9",
+    PipDependency.PYTHON3_13.value: "3.13",
+}
+
+
+def _normalized_requirements(requirements_file):
+    """
+    Returns the requirement lines of requirements.txt without comments or blank lines, sorted,
+    so that comment edits and reordering (eg, by requirements-txt-fixer) don't count as changes.
+    """
+    lines = set()
+    if not os.path.exists(requirements_file):
+        return []
+    with open(requirements_file) as f:
+        for line in f:
+            # Whitespace starts an inline comment in requirements files, unlike '#' in URLs
+            line = re.split(r"(^|\s+)#", line, maxsplit=1)[0].strip()
+            if line:
+                lines.add(line)
+    return sorted(lines)
+
+
+def _dependencies_fingerprint(app_dir, pip_dependency_keys, repair_wheels):
+    """
+    Digest of every input and output of a packaging run: requirements.txt, the pip dependency
+    sections of the app JSON, the content of the wheels/ folder and the packaging settings.
+    """
+    app_json = _load_app_json(app_dir)
+    wheels_dir = os.path.join(app_dir, "wheels")
+    wheel_hashes = {}
+    for root, _, files in os.walk(wheels_dir):
+        for f in files:
+            path = os.path.join(root, f)
+            wheel_hashes[os.path.relpath(path, wheels_dir)] = cached_file_sha256(path)
+
+    fingerprint = {
+        "requirements": _normalized_requirements(os.path.join(app_dir, "requirements.txt")),
+        "pip_dependencies": {
+            pip_dep.value: app_json.content.get(pip_dep.value) for pip_dep in PipDependency
+        },
+        "wheels": wheel_hashes,
+        "platform": PLATFORM,
+        "ignored_wheels": sorted(IGNORED_WHEELS),
+        "platform_constraints": _normalized_requirements(
+            os.environ.get(PLATFORM_CONSTRAINTS_ENV_VAR, "")
+        ),
+        "runtimes": sorted(pip_dependency_keys),
+        "repair_wheels": repair_wheels,
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+
+def _fingerprint_marker_path(fingerprint):
+    return get_cache_dir("fingerprints") / fingerprint
+
+
+def _parse_version(version):
+    """
+    The version as a packaging Version, or as it is if it isn't a valid one, eg 1.0.*
+    """
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return version
+
+
+def _find_requirements_drift(app_dir, pip_dependency_keys):
+    """
+    Returns a description of every pinned requirement whose version doesn't match the wheels
+    referenced by the app JSON, eg after requirements.txt was edited without re-packaging.
+    """
+    app_json = _load_app_json(app_dir)
+    drift = []
+    for requirement_line in _normalized_requirements(os.path.join(app_dir, "requirements.txt")):
+        try:
+            requirement = Requirement(requirement_line)
+        except InvalidRequirement:
+            continue
+
+        pinned_versions = [s.version for s in requirement.specifier if s.operator == "=="]
+        name = canonicalize_name(requirement.name)
+        if len(pinned_versions) != 1 or _is_soar_provided(name):
+            continue
+
+        for pip_dependencies_key in pip_dependency_keys:
+            python_version = RUNTIME_PYTHON_VERSIONS.get(pip_dependencies_key)
+            if requirement.marker and not requirement.marker.evaluate(
+                {"python_version": python_version, "python_full_version": f"{python_version}.0"}
+            ):
+                continue
+
+            referenced_versions = set(
+                os.path.basename(w.input_file).split("-")[1]
+                for w in _parse_pip_dependency_wheels(app_json, pip_dependencies_key)
+                if canonicalize_name(w.module) == name
+            )
+            # Versions are compared as versions, so that eg 1.0 matches a 1.0.0 wheel
+            if {_parse_version(v) for v in referenced_versions} != {
+                _parse_version(pinned_versions[0])
+            }:
+                drift.append(
+                    f"{requirement.name}=={pinned_versions[0]} is pinned in requirements.txt, "
+                    f"but {pip_dependencies_key} references "
+                    f"{', '.join(sorted(referenced_versions)) or 'no wheel'}"
+                )
+    return drift
+
+
+def _is_up_to_date(app_dir, pip_dependency_keys, repair_wheels):
+    """
+    Whether a previous packaging run produced exactly the current state of the app, in which case
+    there's nothing to do.
+    """
+    fingerprint = _dependencies_fingerprint(app_dir, pip_dependency_keys, repair_wheels)
+    if not _fingerprint_marker_path(fingerprint).exists():
+        return False
+
+    drift = _find_requirements_drift(app_dir, pip_dependency_keys)
+    for message in drift:
+        logger.warning("Dependency drift detected: %s", message)
+    return not drift
+
+
+def _find_uv():
+    uv = shutil.which("uv")
+    if uv:
+        return uv
+    try:
+        from uv import find_uv_bin
+
+        return find_uv_bin()
+    except (ImportError, FileNotFoundError):
+        return None
+
+
+def _resolve_universal(app_dir, pip_dependency_keys, wheel_cache_dir=None):
+    """
+    Resolves requirements.txt once for every runtime with uv, and returns a requirements file
+    pinning every transitive dependency, with environment markers where the runtimes differ.
+    Building each runtime from it with --no-deps keeps their pins consistent.
+
+    The resolution is kept in the persistent cache until requirements.txt changes. Returns None
+    if requirements.txt can't be resolved this way, or uv isn't available.
+    """
+    requirements_file = os.path.join(app_dir, "requirements.txt")
+    requirements_digest = _requirements_digest(requirements_file)
+    if requirements_digest is None:
+        return None
+
+    python_versions = sorted(
+        (RUNTIME_PYTHON_VERSIONS[key] for key in pip_dependency_keys), key=Version
+    )
+    digest = hashlib.sha256(f"{requirements_digest}:{python_versions}".encode()).hexdigest()
+    resolution_file = _universal_resolution_path(app_dir)
+    if _is_lock_current(resolution_file, digest):
+        return resolution_file
+
+    uv = _find_uv()
+    if uv is None:
+        logger.info("uv is not available, resolving every runtime separately")
+        return None
+
+    find_links = [os.path.join(app_dir, "wheels", cp_tag.wheels_dir) for cp_tag in CPythonTag]
+    if wheel_cache_dir:
+        find_links.append(os.path.join(wheel_cache_dir, "links"))
+    env = _subprocess_env_without_pythonpath()
+    # Resolve against the same indexes as pip
+    for pip_var, uv_var in (
+        ("PIP_INDEX_URL", "UV_INDEX_URL"),
+        ("PIP_EXTRA_INDEX_URL", "UV_EXTRA_INDEX_URL"),
+    ):
+        if pip_var in env:
+            env.setdefault(uv_var, env[pip_var])
+
+    command = [
+        uv,
+        "pip",
+        "compile",
+        "--universal",
+        "--python-version",
+        python_versions[0],
+        "--no-header",
+        "--no-annotate",
+        "--quiet",
+        *itertools.chain.from_iterable(("--find-links", d) for d in find_links if os.path.isdir(d)),
+        # The distributions SOAR provides are still resolved, only left out of the pins
+        *itertools.chain.from_iterable(("--no-emit-package", n) for n in IGNORED_WHEELS),
+        *_platform_constraints_args(),
+        requirements_file,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, env=env)
+    except OSError as e:
+        # eg a uv binary for another architecture than the container's
+        logger.warning("Unable to run uv, resolving every runtime separately: %s", e)
+        return None
+    if result.returncode != 0:
+        logger.warning(
+            "Universal resolution failed, resolving every runtime separately:\n%s", result.stderr
+        )
+        return None
+
+    tmp_file = resolution_file.with_name(f".{resolution_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(
+        f"# Universal resolution of requirements.txt for Python {', '.join(python_versions)}\n"
+        f"# requirements-digest: {digest}\n{result.stdout}"
+    )
+    os.replace(tmp_file, resolution_file)
+    return resolution_file
+
+
+def _with_universal_resolution(app_dir, jobs, args):
+    """
+    Makes every runtime job build from a single universal resolution, when there are several or
+    in native mode.
+    """
+    # A --native run needs the pins of a single runtime as well, to tell the dependencies
+    # without prebuilt wheels apart
+    if not args.universal or (len(jobs) < 2 and not args.native):
+        return jobs
+
+    wheel_cache_dir = None
+    if not args.no_wheel_cache:
+        wheel_cache_dir = args.wheel_cache_dir or str(get_cache_dir("wheels"))
+    resolution_file = _resolve_universal(
+        app_dir, [job.pip_dependencies_key for job in jobs], wheel_cache_dir
+    )
+    if resolution_file is None:
+        return jobs
+
+    wheel_cache = _load_wheel_cache(args.wheel_cache_dir, args.no_wheel_cache)
+    if wheel_cache is not None and not args.native:
+        _build_shared_pure_wheels(resolution_file, jobs[0], wheel_cache)
+    return [job._replace(resolved_requirements=str(resolution_file)) for job in jobs]
+
+
+def _build_shared_pure_wheels(resolution_file, job, wheel_cache):
+    """
+    Builds the pins of a universal resolution that apply to every runtime once, with the pip of
+    :param: job, and stores the pure wheels among them in :param: wheel_cache, where every runtime
+    then finds them instead of downloading or building them again. Platform wheels are left for
+    each runtime to build.
+    """
+    shared_pins = [
+        line
+        for line in pathlib.Path(resolution_file).read_text().splitlines()
+        if line.strip() and not line.startswith(("#", "-")) and ";" not in line
+    ]
+    if not shared_pins:
+        return
+
+    staging_dir = job.staging_dir or os.environ.get(STAGING_DIR_ENV_VAR) or job.app_dir
+    with tempfile.TemporaryDirectory(prefix="shared-", dir=staging_dir) as temp_dir:
+        pins_file = os.path.join(temp_dir, "shared.txt")
+        wheels_dir = os.path.join(temp_dir, "wheels")
+        pathlib.Path(pins_file).write_text("\n".join(shared_pins) + "\n")
+        # A dependency that fails to build here is built again, and reported, by each runtime
+        _pip_wheel(job, wheels_dir, ["--no-deps", "-r", pins_file], wheel_cache.find_links_args())
+        if not os.path.isdir(wheels_dir):
+            return
+
+        pure_wheels = set()
+        for file_name in os.listdir(wheels_dir):
+            match = WHEEL_PATTERN.match(file_name)
+            # Wheels for one Python version only, eg cp39-none-any, aren't shared
+            pure = match and match.group("python_version") in ("py3", "py2.py3")
+            if pure and match.group("platform") == "any":
+                pure_wheels.add(
+                    Wheel(
+                        file_name,
+                        match.group("distribution"),
+                        match.group("python_version"),
+                        match.group("platform"),
+                    )
+                )
+        logger.info("Built %d pure wheels shared by every runtime", len(pure_wheels))
+        _update_wheel_cache(wheel_cache, pure_wheels, wheels_dir)
+
+
+def _select_runtime_jobs(args):
+    """
+    Determines which runtime sections of the app JSON to package, and with which pip.
+    """
+    if args.pip_dependencies_key:
+        runtimes = [(args.pip_dependencies_key, args.pip_path)]
+    elif args.runtime:
+        runtimes = [tuple(runtime.split("=", 1)) for runtime in args.runtime]
+    else:
+        runtimes = [
+            (key, pip_path)
+            for key, pip_path in DEFAULT_RUNTIME_PIP_PATHS.items()
+            if _should_package_pip_dependency_key(args.app_dir, key)
+        ]
+
+    jobs = []
+    for pip_dependencies_key, pip_path in runtimes:
+        if not _should_package_pip_dependency_key(args.app_dir, pip_dependencies_key):
+            logger.info(
+                "Skipping %s because it is not declared in the app manifest", pip_dependencies_key
+            )
+            continue
+        jobs.append(
+            RuntimeJob(
+                args.app_dir,
+                shutil.which(pip_path) or pip_path,
+                pip_dependencies_key,
+                args.repair_wheels,
+                args.wheel_cache_dir,
+                args.no_wheel_cache,
+                args.jobs,
+                args.staging_dir,
+                args.native,
+                None,
+                args.slim_wheels,
+            )
+        )
+    return jobs
+
+
+def _record_app_results(app_dir, jobs, results, repair_wheels):
+    """
+    Merges the results of the runtimes packaged for an app into its app JSON, and marks the app
+    as up to date if every runtime was packaged successfully.
+
+    Returns whether every runtime was packaged successfully.
+    """
+    succeeded = [r for r in results if r is not None]
+    if succeeded:
+        _merge_runtime_results(app_dir, succeeded)
+
+    if len(succeeded) != len(jobs):
+        return False
+
+    pip_dependency_keys = [job.pip_dependencies_key for job in jobs]
+    fingerprint = _dependencies_fingerprint(app_dir, pip_dependency_keys, repair_wheels)
+    _fingerprint_marker_path(fingerprint).touch()
+    return True
+
+
+def main():
+    """
+    Main entrypoint.
+
+    Every selected runtime section is resolved and built concurrently in its own worker process,
+    after which the results are merged into the app JSON at once.
+    """
+    args = parse_args()
+    recorder = PhaseRecorder()
+    try:
+        with recorder.phase("total"):
+            return _package_app(args, recorder)
+    finally:
+        _write_timing_report(args, recorder)
+
+
+def _package_app(args, recorder):
+    jobs = _select_runtime_jobs(args)
+    if not jobs:
+        logger.info("No pip dependency sections to package")
+        return
+
+    pip_dependency_keys = [job.pip_dependencies_key for job in jobs]
+    with recorder.phase("check_up_to_date"):
+        up_to_date = not args.force and _is_up_to_date(
+            args.app_dir, pip_dependency_keys, args.repair_wheels
+        )
+    if up_to_date:
+        logger.info("App dependencies are up to date")
+        return
+    if args.check_up_to_date:
+        logger.info("App dependencies need to be packaged")
+        return 1
+
+    try:
+        with recorder.phase("universal_resolution"):
+            jobs = _with_universal_resolution(args.app_dir, jobs, args)
+
+        with recorder.phase("package_runtimes"):
+            if len(jobs) == 1:
+                results = [package_runtime(jobs[0])]
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+                    results = list(executor.map(package_runtime, jobs))
+
+        for result in results:
+            if result is not None and result.timings:
+                recorder.update(result.timings)
+
+        with recorder.phase("update_app_json"):
+            packaged = _record_app_results(args.app_dir, jobs, results, args.repair_wheels)
+        if args.native and not packaged:
+            return NATIVE_FALLBACK_EXIT_CODE
     except Exception:
         logger.exception("Unexpected error")
-    finally:
-        shutil.rmtree(temp_dir)
+
+
+def _write_timing_report(args, recorder):
+    """
+    Writes the timing records of the run as JSON and/or logs them as a table, as requested.
+    """
+    if args.timing_report:
+        with open(args.timing_report, "w") as f:
+            json.dump({"app_dir": args.app_dir, **recorder.report()}, f, indent=APP_JSON_INDENT)
+            f.write("\n")
+    if args.timing_summary:
+        logger.info("Timing summary:\n%s", recorder.summary())
+
+
+def _package_app_batch(app_dirs, args, executor):
+    """
+    Packages every app with the runtime workers of all apps sharing one pool, and returns a
+    report entry per app. A failure in one app never affects the others.
+    """
+    reports, pending = [], []
+    for app_dir in app_dirs:
+        report = {"app_dir": app_dir, "status": "failed", "runtimes": {}}
+        reports.append(report)
+        try:
+            app_args = argparse.Namespace(**{**vars(args), "app_dir": app_dir})
+            app_args.pip_path = app_args.pip_dependencies_key = None
+            jobs = _select_runtime_jobs(app_args)
+            pip_dependency_keys = [job.pip_dependencies_key for job in jobs]
+            if not jobs:
+                report["status"] = "skipped"
+            elif not args.force and _is_up_to_date(
+                app_dir, pip_dependency_keys, args.repair_wheels
+            ):
+                report["status"] = "up_to_date"
+            else:
+                jobs = _with_universal_resolution(app_dir, jobs, args)
+                futures = [executor.submit(package_runtime, job) for job in jobs]
+                pending.append((report, jobs, futures))
+        except Exception as e:
+            logger.exception("Unable to schedule packaging of %s", app_dir)
+            report["error"] = str(e)
+
+    for report, jobs, futures in pending:
+        results = []
+        for job, future in zip(jobs, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.exception("Packaging %s of %s failed", job.pip_dependencies_key, job.app_dir)
+                report["error"] = str(e)
+                result = None
+            results.append(result)
+            report["runtimes"][job.pip_dependencies_key] = (
+                {"status": "failed"}
+                if result is None
+                else {
+                    "status": "packaged",
+                    "wheels": sorted(w.input_file for w in result.wheel_entries),
+                    "timings": result.timings,
+                }
+            )
+
+        try:
+            if _record_app_results(report["app_dir"], jobs, results, args.repair_wheels):
+                report["status"] = "packaged"
+        except Exception as e:
+            logger.exception("Unable to record the packaged wheels of %s", report["app_dir"])
+            report["error"] = str(e)
+
+    return reports
+
+
+def batch_main():
+    """
+    Batch entrypoint, packaging the dependencies of many apps in a single process.
+
+    The runtime sections of every app are built by one shared pool of worker processes, reusing
+    the same wheel cache and pip download cache. Writes a JSON report of the outcome for each app
+    and exits with 1 if any app failed.
+    """
+    args = parse_batch_args()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        reports = _package_app_batch(args.app_dirs, args, executor)
+
+    report = json.dumps({"apps": reports}, indent=APP_JSON_INDENT)
+    if args.report == "-":
+        print(report)
+    else:
+        with open(args.report, "w") as f:
+            f.write(report + "\n")
+
+    failed = [r["app_dir"] for r in reports if r["status"] == "failed"]
+    if failed:
+        logger.error("Failed to package %s", ", ".join(failed))
+        return 1
+
+
+def _add_packaging_arguments(parser):
+    """
+    Options shared by the single app and batch entrypoints.
+    """
+    parser.add_argument(
+        "--runtime",
+        action="append",
+        metavar="KEY=PIP",
+        help="Runtime section to package and the pip to build it with, eg "
+        "pip39_dependencies=pip3.9. May be repeated; all selected runtimes are built "
+        f"concurrently. Defaults to {' and '.join(DEFAULT_RUNTIME_PIP_PATHS)}.",
+    )
+    parser.add_argument(
+        "--repair-wheels",
+        action="store_true",
+        help="Whether to repair platform wheels with auditwheel",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Package dependencies even if nothing changed since the last successful run",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Maximum number of wheels to check and repair concurrently (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-universal",
+        dest="universal",
+        action="store_false",
+        help="Resolve every runtime section separately instead of resolving requirements.txt once "
+        "for all of them with uv",
+    )
+    parser.add_argument(
+        "--slim-wheels",
+        action="store_true",
+        help="Remove tests, docs, type stubs and bytecode from new wheels and strip debug symbols "
+        "from their shared objects",
+    )
+    parser.add_argument(
+        "--native",
+        action="store_true",
+        help=f"Download prebuilt {PLATFORM} wheels for each runtime's CPython version with the "
+        "pip of the current interpreter instead of building them with the runtime's pip, eg "
+        f"outside of a manylinux container. Exits with {NATIVE_FALLBACK_EXIT_CODE} if some "
+        "dependencies need to be built from sdists, which are then the only ones the next run in "
+        "a manylinux container builds.",
+    )
+    parser.add_argument(
+        "--staging-dir",
+        help="Directory to build wheels in before they're placed in the wheels/ folder, eg a "
+        f"tmpfs (defaults to ${STAGING_DIR_ENV_VAR} or the app directory)",
+    )
+    parser.add_argument(
+        "--wheel-cache-dir",
+        help="Location of the persistent wheel cache shared across apps "
+        "(defaults to the soar-hooks cache directory)",
+    )
+    parser.add_argument(
+        "--no-wheel-cache",
+        action="store_true",
+        help="Build every wheel from scratch without consulting or populating the wheel cache",
+    )
+
+
+def _check_runtimes(parser, args):
+    for runtime in args.runtime or []:
+        key, _, pip_path = runtime.partition("=")
+        if key not in DEFAULT_RUNTIME_PIP_PATHS or not pip_path:
+            parser.error(f"Invalid runtime {runtime!r}, expected KEY=PIP")
 
 
 def parse_args():
     help_str = " ".join(line.strip() for line in (__doc__.strip() or "").splitlines())
     parser = argparse.ArgumentParser(description=help_str)
     parser.add_argument("app_dir", help="Path to the target app directory")
-    parser.add_argument("pip_path", help="Path to the pip installation to use")
+    parser.add_argument(
+        "pip_path",
+        nargs="?",
+        help="Path to the pip installation to use when packaging a single runtime section",
+    )
     parser.add_argument(
         "pip_dependencies_key",
+        nargs="?",
         choices=[pip_dep.value for pip_dep in PipDependency],
         help="Key in the app JSON specifying pip dependencies",
     )
+    _add_packaging_arguments(parser)
     parser.add_argument(
-        "--repair-wheels",
+        "--check-up-to-date",
         action="store_true",
-        help="Whether to repair platform wheels with auditwheel",
+        help="Only check whether dependencies need to be packaged, exiting with 1 if they do",
+    )
+    parser.add_argument(
+        "--timing-report",
+        metavar="FILE",
+        help="Write the wall time, CPU time, child process CPU time and bytes written of every "
+        "packaging phase and wheel to FILE as JSON",
+    )
+    parser.add_argument(
+        "--timing-summary",
+        action="store_true",
+        help="Log a table of the time spent in every packaging phase",
+    )
+    args = parser.parse_args()
+
+    if bool(args.pip_path) != bool(args.pip_dependencies_key):
+        parser.error("pip_path and pip_dependencies_key must be provided together")
+    _check_runtimes(parser, args)
+    return args
+
+
+def parse_batch_args():
+    parser = argparse.ArgumentParser(
+        prog="package-app-dependencies-batch",
+        description="Packages the dependencies of several apps with a shared pool of workers",
+    )
+    parser.add_argument(
+        "app_dirs", nargs="+", metavar="app_dir", help="Paths to the app directories"
+    )
+    _add_packaging_arguments(parser)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Maximum number of runtime sections to package at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--report",
+        default="-",
+        help="File to write the JSON report to (default: stdout)",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    _check_runtimes(parser, args)
+    return args
 
 
 if __name__ == "__main__":
@@ -1,12 +1,47 @@
 #!/usr/bin/env bash
+# Packages the dependencies of the app in the current directory, or with
+# `--batch <app_dir>...` those of several apps at once in a single container, through
+# package-app-dependencies-batch. The JSON report of a batch is written to stdout.
 set -euo pipefail
 
 APP_DIR=$(pwd)
+BATCH_APP_DIRS=()
+if [[ "${1:-}" == "--batch" ]]; then
+	shift
+	BATCH_APP_DIRS=("$@")
+fi
 PY39_BIN="/opt/python/cp39-cp39/bin"
 PY313_BIN="/opt/python/cp313-cp313/bin"
 
 # If we're not in a docker container, push ourselves into one and execute the script there
 if ! "${PY39_BIN}/python" --version &>/dev/null; then
+	if [[ ${#BATCH_APP_DIRS[@]} -gt 0 ]]; then
+		# Only apps that changed since their last successful run go into the container
+		OUTDATED_APP_DIRS=()
+		for app_dir in "${BATCH_APP_DIRS[@]}"; do
+			if ! python -m local_hooks.package_app_dependencies "$app_dir" --repair-wheels --check-up-to-date >&2; then
+				OUTDATED_APP_DIRS+=("$(realpath "$app_dir")")
+			fi
+		done
+		if [[ ${#OUTDATED_APP_DIRS[@]} -eq 0 ]]; then
+			exit 0
+		fi
+	# Skip starting a container at all when nothing changed since the last successful run
+	elif python -m local_hooks.package_app_dependencies . --repair-wheels --check-up-to-date; then
+		exit 0
+	fi
+
+	# Opt-in: download prebuilt wheels for the container's platform from the host, and only
+	# start a container when some dependencies need to be built from sdists
+	if [[ "${SOAR_HOOKS_NATIVE:-}" == "1" && ${#BATCH_APP_DIRS[@]} -eq 0 ]]; then
+		native_status=0
+		python -m local_hooks.package_app_dependencies . --repair-wheels --native || native_status=$?
+		if [[ $native_status -ne 3 ]]; then
+			exit $native_status
+		fi
+		echo 'Building the remaining dependencies in a manylinux container'
+	fi
+
 	if ! docker info &>/dev/null; then
 		echo 'Please ensure Docker is installed and running on your machine'
 		exit 1
@@ -16,16 +51,53 @@ if ! "${PY39_BIN}/python" --version &>/dev/null; then
 	script_name=$(basename "$0")
 	PY_SITE=$(python -c 'import site; print(site.getsitepackages()[0])')
 
+	# Share the persistent wheel cache with the container so wheels built for one app are reused by others
+	CACHE_DIR="${SOAR_HOOKS_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/soar-hooks}"
+	mkdir -p "$CACHE_DIR"
+
+	DOCKER_ARGS=(
+		--rm
+		-v "$(dirname "$0")":/srv/
+		-v "$PY_SITE":/site-packages
+		-v "$CACHE_DIR":/soar-hooks-cache
+		-e "PYTHONPATH=/site-packages"
+		-e "SOAR_HOOKS_CACHE_DIR=/soar-hooks-cache"
+		# Build and repair wheels off the app bind mount, which can be a slow mount
+		--tmpfs /soar-hooks-staging
+		-e "SOAR_HOOKS_STAGING_DIR=/soar-hooks-staging"
+		-w /src
+	)
+
+	# Apps are mounted under /src, cache entries of an app are keyed by its host path
+	CONTAINER_ARGS=()
+	if [[ ${#BATCH_APP_DIRS[@]} -gt 0 ]]; then
+		HOST_DIRS=()
+		for i in "${!OUTDATED_APP_DIRS[@]}"; do
+			DOCKER_ARGS+=(-v "${OUTDATED_APP_DIRS[$i]}:/src/$i")
+			HOST_DIRS+=("/src/$i=${OUTDATED_APP_DIRS[$i]}")
+			CONTAINER_ARGS+=("/src/$i")
+		done
+		DOCKER_ARGS+=(-e "SOAR_HOOKS_HOST_DIRS=$(
+			IFS=:
+			echo "${HOST_DIRS[*]}"
+		)")
+		CONTAINER_ARGS=(--batch "${CONTAINER_ARGS[@]}")
+	else
+		DOCKER_ARGS+=(-v "$APP_DIR":/src -e "SOAR_HOOKS_HOST_DIRS=/src=$APP_DIR")
+	fi
+
+	# The versions SOAR provides constrain the build in the container as well, and are part of
+	# the fingerprint it records
+	if [[ -n "${SOAR_HOOKS_PLATFORM_CONSTRAINTS:-}" ]]; then
+		CONSTRAINTS_FILE=$(realpath "$SOAR_HOOKS_PLATFORM_CONSTRAINTS")
+		DOCKER_ARGS+=(
+			-v "$CONSTRAINTS_FILE":/soar-hooks-constraints.txt:ro
+			-e "SOAR_HOOKS_PLATFORM_CONSTRAINTS=/soar-hooks-constraints.txt"
+		)
+	fi
+
 	# Run this script inside a manylinux Docker container
-	exec docker run \
-		--rm \
-		-v "$APP_DIR":/src \
-		-v "$(dirname "$0")":/srv/ \
-		-v "$PY_SITE":/site-packages \
-		-e "PYTHONPATH=/site-packages" \
-		-w /src \
-		"$IMAGE" \
-		/bin/bash -c "/srv/$script_name"
+	exec docker run "${DOCKER_ARGS[@]}" "$IMAGE" /bin/bash "/srv/$script_name" ${CONTAINER_ARGS[@]+"${CONTAINER_ARGS[@]}"}
 fi
 
 export PATH="$PY39_BIN:$PY313_BIN:$PATH"
@@ -46,45 +118,27 @@ fi
 # Limit that path to local_hooks imports so container pip3.9/pip3.13 use their own interpreter-local pip.
 unset PYTHONPATH
 
-py39_deps='pip39_dependencies'
-py313_deps='pip313_dependencies'
-SCRIPT="python -m local_hooks.package_app_dependencies"
+if [[ ${#BATCH_APP_DIRS[@]} -gt 0 ]]; then
+	SCRIPT=(python -c 'import sys; from local_hooks.package_app_dependencies import batch_main; sys.exit(batch_main())')
+else
+	SCRIPT=(python -m local_hooks.package_app_dependencies)
+fi
 
 # Restore the hook import path only for the packager itself; child pip processes clear it again.
 run_packager() {
 	if [[ -n "${HOOKS_PYTHONPATH:-}" ]]; then
-		PYTHONPATH="$HOOKS_PYTHONPATH" ${SCRIPT} "$@"
+		PYTHONPATH="$HOOKS_PYTHONPATH" "${SCRIPT[@]}" "$@"
 	else
-		${SCRIPT} "$@"
+		"${SCRIPT[@]}" "$@"
 	fi
 }
 
-has_pip_dependency_key() {
-	local dependency_key="$1"
-	local check_dependency_key
-	check_dependency_key='from local_hooks.package_app_dependencies import _should_package_pip_dependency_key; import sys; sys.exit(not _should_package_pip_dependency_key(".", sys.argv[1]))'
-
-	if [[ -n "${HOOKS_PYTHONPATH:-}" ]]; then
-		PYTHONPATH="$HOOKS_PYTHONPATH" python -c "$check_dependency_key" "$dependency_key"
-	else
-		python -c "$check_dependency_key" "$dependency_key"
-	fi
-}
-
-package_dependencies() {
-	local dependency_key="$1"
-	local pip_path="$2"
-
-	if ! has_pip_dependency_key "$dependency_key"; then
-		echo "Skipping $dependency_key because it is not declared in the app manifest"
-		return
-	fi
-
-	env -u PYTHONPATH "$pip_path" install pip-tools
-	run_packager . "$pip_path" "$dependency_key" --repair-wheels
-}
-
-package_dependencies "$py39_deps" "$(which pip3.9)"
-package_dependencies "$py313_deps" "$(which pip3.13)"
+if [[ ${#BATCH_APP_DIRS[@]} -gt 0 ]]; then
+	# Every app of the batch shares one pool of workers and one wheel cache
+	run_packager "${BATCH_APP_DIRS[@]}" --repair-wheels
+	exit
+fi
 
-exit $?
+# Build every runtime section declared by the app manifest concurrently, using the pip3.9 and
+# pip3.13 installations on PATH, and record the results in the app JSON in a single write.
+run_packager . --repair-wheels
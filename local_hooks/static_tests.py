@@ -7,9 +7,10 @@ from typing import Optional, TYPE_CHECKING
 from collections.abc import Iterator
 from collections.abc import Iterable
 
-from .app_tests import get_test_suites, iterate_all_tests
+from .app_tests import get_test_suites, load_test_registry
 
 if TYPE_CHECKING:
+    from .app_tests.utils.app_parser import AppParser
     from .app_tests.test_suite import TestSuite
 
 
@@ -18,13 +19,22 @@ class TestRunner:
     Controller for app testing. Handles selecting and running tests, formatting output, and commiting fixes and db updates
     """
 
-    def __init__(self, *, app_directory: Path, tests: Optional[Iterable[str]] = None):
+    def __init__(
+        self,
+        *,
+        app_directory: Path,
+        tests: Optional[Iterable[str]] = None,
+        parser: Optional["AppParser"] = None,
+    ):
         self.test_run_time = int(time.time())
 
         # General Test Options
         self._app_directory = app_directory
         self._test_options = set(tests) if tests else None
         self.results = {}
+        # Every suite shares the parser, so that the app is only parsed (and an SDK app's
+        # manifest only generated) once
+        self._parser = parser
 
     def log_result(self, test_name, result, console=True):
         self.results[test_name] = result
@@ -41,8 +51,13 @@ class TestRunner:
             print(message)
 
     def _get_suites(self, local_repo_location: Path) -> Iterator["TestSuite"]:
-        for suite_cls in get_test_suites():
-            yield suite_cls(local_repo_location)
+        if self._parser is None:
+            from .app_tests.utils.app_parser import AppParser
+
+            self._parser = AppParser(local_repo_location)
+        # Suites without any selected test aren't even imported
+        for suite_cls in get_test_suites(self._test_options):
+            yield suite_cls(local_repo_location, self._parser)
 
     def _run_tests(self, local_repo_location: Path) -> int:
         # Run all tests that match our test options
@@ -107,14 +122,15 @@ def parse_args(add_help: bool = True) -> StaticTestArgs:
         title="Test Options",
         description="Instead of running all tests, provide flags for test you want to run with flags below",
     )
-    for test in iterate_all_tests():
-        group.add_argument(
-            f"--{test.pretty_name}",
-            dest="tests",
-            action="append_const",
-            const=test.pretty_name,
-            help=(test.__doc__ or "").strip(),
-        )
+    for suite in load_test_registry():
+        for test in suite["tests"]:
+            group.add_argument(
+                f"--{test['name']}",
+                dest="tests",
+                action="append_const",
+                const=test["name"],
+                help=test["doc"],
+            )
 
     args = StaticTestArgs(**vars(parser.parse_args()))
     args.app_directory = args.app_directory.resolve()
@@ -147,14 +163,24 @@ def process_test_results(results):
     return results_by_cat
 
 
-def main():
-    args = parse_args()
-    exit_code, result = TestRunner(**dataclasses.asdict(args)).run()
+def run_static_tests(
+    app_directory: Path, tests: Optional[Iterable[str]] = None, parser: Optional["AppParser"] = None
+) -> int:
+    """
+    Runs the static tests against an app and prints their results. Returns the number of
+    critical failures.
+    """
+    exit_code, result = TestRunner(app_directory=app_directory, tests=tests, parser=parser).run()
 
     print_result = process_test_results(result)
     print(json.dumps(print_result, indent=4, sort_keys=True))
     return exit_code
 
 
+def main():
+    args = parse_args()
+    return run_static_tests(**dataclasses.asdict(args))
+
+
 if __name__ == "__main__":
     exit(main())
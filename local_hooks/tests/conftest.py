@@ -0,0 +1,18 @@
+import pytest
+
+from local_hooks.helpers import CACHE_DIR_ENV_VAR, forget_uv_lock_files
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep hooks from reading or writing the developer's persistent cache."""
+    cache_dir = tmp_path_factory.mktemp("soar-hooks-cache")
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def forget_found_uv_lock_files():
+    """Keep uv.lock files found by one test from leaking into the next."""
+    yield
+    forget_uv_lock_files()
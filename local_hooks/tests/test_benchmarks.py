@@ -0,0 +1,147 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from local_hooks.app_tests.json_tests import app_schema_validator
+from local_hooks.benchmarks import Regression, hooks, startup
+from local_hooks.benchmarks.synthetic_app import AppSize, generate_app
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       150 |        150 |   _io
+import time:       350 |        500 | site
+import time:      2000 |       2000 |       django.utils
+import time:     30000 |      32000 |     django
+import time:      1000 |      33000 |   local_hooks.app_tests
+import time:      2000 |      35000 | local_hooks.static_tests
+"""
+
+
+def test_parse_importtime():
+    import_time, packages = startup.parse_importtime(IMPORTTIME)
+
+    assert import_time == pytest.approx(0.0355)
+    assert packages == pytest.approx(
+        {"_io": 0.00015, "site": 0.00035, "django": 0.032, "local_hooks": 0.003}
+    )
+
+
+def test_find_regressions():
+    baseline = {
+        "static-tests": {"wall_time": 0.2, "import_time": 0.1, "packages": {"local_hooks": 0.02}},
+        "release-notes": {"wall_time": 0.1, "import_time": 0.05, "packages": {}},
+    }
+    results = {
+        # Slower, and importing django at startup
+        "static-tests": {
+            "wall_time": 0.5,
+            "import_time": 0.12,
+            "packages": {"django": 0.3, "local_hooks": 0.02},
+        },
+        # Within the noise
+        "release-notes": {"wall_time": 0.14, "import_time": 0.05, "packages": {"jinja2": 0.01}},
+        "soar-hooks": {"wall_time": 1.0, "import_time": 1.0, "packages": {}},
+    }
+
+    regressions = startup.find_regressions(baseline, results)
+
+    assert regressions == [
+        Regression("static-tests", "wall_time", 0.2, 0.5),
+        Regression("static-tests", "import of django", None, 0.3),
+    ]
+    assert str(regressions[1]) == "static-tests: import of django is new (0.300s)"
+
+
+def test_startup_benchmark_records_baseline(tmp_path, capsys):
+    baseline_path = tmp_path / "baseline.json"
+    argv = ["--script", "release-notes", "--repeat", "1", "--baseline", str(baseline_path)]
+
+    assert startup.main(argv) == 0
+    baseline = json.loads(baseline_path.read_text())
+    assert baseline["release-notes"]["wall_time"] > 0
+    assert baseline["release-notes"]["import_time"] > 0
+    assert "release-notes" in capsys.readouterr().out
+
+    # Far slower than it really is, so that the next run can't regress
+    baseline["release-notes"]["wall_time"] = 60.0
+    baseline["release-notes"]["import_time"] = 60.0
+    baseline["release-notes"]["packages"] = {package: 1 for package in sys.modules}
+    baseline_path.write_text(json.dumps(baseline))
+    assert startup.main(argv) == 0
+    assert json.loads(baseline_path.read_text())["release-notes"]["wall_time"] == 60.0
+
+
+def test_generate_app(tmp_path: Path):
+    size = AppSize(actions=20, outputs=30, views=3, consts=500, depth=4, modules=2)
+    app_dir = generate_app(tmp_path / "app", size)
+    generate_app(tmp_path / "again", size)
+
+    app_json = json.loads((app_dir / "synthetic.json").read_text())
+    assert len(app_json["actions"]) == 21
+    assert len(app_json["actions"][1]["output"]) == 36
+    assert app_json["actions"][3]["render"]["type"] == "custom"
+    assert app_json["actions"][4]["render"]["type"] == "table"
+    assert app_schema_validator().is_valid(app_json)
+    assert len(list(app_dir.glob("synthetic_view_*.html"))) == 3
+    assert "ENDPOINT_499 = " in (app_dir / "synthetic_consts.py").read_text()
+    assert (app_dir / "lib/level_0/level_1/level_2/level_3/helper_1.py").is_file()
+    for path in app_dir.rglob("*"):
+        if path.is_file():
+            assert (
+                path.read_bytes() == (tmp_path / "again" / path.relative_to(app_dir)).read_bytes()
+            )
+
+
+def test_hooks_benchmark(tmp_path: Path, capsys):
+    baseline_path = tmp_path / "baseline.json"
+    argv = [
+        "--hook",
+        "copyright",
+        "--hook",
+        "release-notes",
+        "--scale",
+        "actions=1,5",
+        "--repeat",
+        "1",
+        "--baseline",
+        str(baseline_path),
+    ]
+
+    assert hooks.main(argv) == 0
+    baseline = json.loads(baseline_path.read_text())
+    assert set(baseline) == {"copyright", "release-notes"}
+    assert set(baseline["copyright"]) == {"actions=1", "actions=5"}
+    assert baseline["release-notes"]["actions=5"]["max_rss"] > 0
+    assert "actions=5" in capsys.readouterr().out
+
+
+def test_hooks_find_regressions():
+    previous = {"wall_time": 1.0, "max_rss": 100.0}
+    baseline = {"build-docs": {"actions=100": previous, "actions=500": previous}}
+    results = {
+        "build-docs": {
+            "actions=100": {"wall_time": 1.1, "max_rss": 200.0},
+            "actions=500": {"wall_time": 2.0, "max_rss": 101.0},
+            "actions=1000": {"wall_time": 9.0, "max_rss": 900.0},
+        }
+    }
+
+    assert [str(regression) for regression in hooks.find_regressions(baseline, results)] == [
+        "build-docs (actions=100): max_rss went from 100.000MiB to 200.000MiB",
+        "build-docs (actions=500): wall_time went from 1.000s to 2.000s",
+    ]
+
+
+def test_static_tests_pass_on_synthetic_app(tmp_path: Path):
+    app_dir = generate_app(tmp_path / "synthetic")
+
+    assert hooks.run_hook("static-tests", app_dir)["max_rss"] > 0
+
+
+def test_failing_hook_is_not_measured(tmp_path: Path):
+    (tmp_path / "release_notes").mkdir()
+
+    with pytest.raises(RuntimeError, match="release-notes exited with 1"):
+        hooks.run_hook("release-notes", tmp_path)
@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 import shutil
@@ -6,6 +7,8 @@ import subprocess
 import pytest
 from pathlib import Path
 
+from local_hooks.copyright_updates import git_changed_files, update_copyrights
+
 PRE_COMMIT_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 
 logging.getLogger().setLevel(logging.INFO)
@@ -55,3 +58,75 @@ def test_copyright_updates(app_dir: Path):
     # Check that only the expected files were modified
     modified_files = [f for f in os.listdir(app_dir) if f in expected_files]
     assert len(modified_files) == len(expected_files)
+
+
+def _write_app(app_dir: Path) -> None:
+    shutil.copytree("tests/data/copyrights/app_dir", app_dir)
+    (app_dir / "app.json").write_text(json.dumps({"license": "Copyright (c) 2019 Splunk Inc."}))
+    (app_dir / "lib").mkdir()
+    (app_dir / "lib" / "helper.py").write_text("x = 1\n")
+
+
+def test_copyright_updates_changed_files(tmp_path: Path):
+    app_dir = tmp_path / "app"
+    _write_app(app_dir)
+    other_app_file = tmp_path / "other_app.py"
+    other_app_file.write_text("y = 2\n")
+    untouched = {
+        name: (app_dir / name).read_text() for name in ("example_connector.py", "example_view.html")
+    }
+
+    updated_files = update_copyrights(
+        str(app_dir),
+        "Copyright (c) Splunk Inc.",
+        "Splunk Inc.",
+        changed_files=[app_dir / "lib" / "helper.py", other_app_file, app_dir / "deleted.py"],
+    )
+
+    assert set(updated_files) == {"LICENSE", "app.json", "lib/helper.py"}
+    assert "Licensed under the Apache License" in (app_dir / "lib" / "helper.py").read_text()
+    assert other_app_file.read_text() == "y = 2\n"
+    for name, content in untouched.items():
+        assert (app_dir / name).read_text() == content
+
+
+def test_copyright_updates_unrelated_changed_files(tmp_path: Path):
+    app_dir = tmp_path / "app"
+    _write_app(app_dir)
+    (app_dir / "README.md").write_text("# Example\n")
+    untouched = {
+        name: (app_dir / name).read_text()
+        for name in ("example_connector.py", "lib/helper.py", "README.md")
+    }
+
+    updated_files = update_copyrights(
+        str(app_dir),
+        "Copyright (c) Splunk Inc.",
+        "Splunk Inc.",
+        changed_files=[app_dir / "README.md"],
+    )
+
+    # The app JSON and LICENSE are refreshed even if none of the changed files has a copyright
+    assert set(updated_files) == {"LICENSE", "app.json"}
+    for name, content in untouched.items():
+        assert (app_dir / name).read_text() == content
+
+
+def test_git_changed_files(tmp_path: Path):
+    app_dir = tmp_path / "app"
+    _write_app(app_dir)
+    git = ["git", "-c", "user.name=hooks", "-c", "user.email=hooks@example.com"]
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "app"], cwd=tmp_path, check=True)
+
+    (app_dir / "lib" / "helper.py").write_text("x = 2\n")
+    (app_dir / "lib" / "new.py").write_text("z = 3\n")
+    (app_dir / "example_view.html").unlink()
+
+    assert sorted(git_changed_files(str(app_dir), "HEAD")) == [
+        app_dir / "lib" / "helper.py",
+        app_dir / "lib" / "new.py",
+    ]
+    # Without change information, every file is updated
+    assert git_changed_files(str(app_dir), "unknown-ref") is None
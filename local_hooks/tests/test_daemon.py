@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from local_hooks.daemon import SOCKET_ENV_VAR, call_daemon
+
+
+@pytest.fixture
+def daemon_socket(tmp_path: Path, monkeypatch):
+    socket_path = tmp_path / "hooks.sock"
+    daemon = subprocess.Popen(
+        [sys.executable, "-m", "local_hooks.driver", "serve", "--socket", str(socket_path)]
+    )
+    try:
+        for _ in range(300):
+            if socket_path.exists() or daemon.poll() is not None:
+                break
+            time.sleep(0.1)
+        assert socket_path.exists(), "hooks daemon didn't start"
+        monkeypatch.setenv(SOCKET_ENV_VAR, str(socket_path))
+        yield socket_path
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=30)
+
+
+def test_console_scripts_run_in_daemon(daemon_socket: Path, tmp_path: Path):
+    app_dir = tmp_path / "app"
+    (app_dir / "release_notes").mkdir(parents=True)
+    (app_dir / "release_notes" / "unreleased.md").write_text("**Unreleased**\n* A note\n")
+
+    assert call_daemon("release-notes", ["release-notes", str(app_dir)]) == 0
+
+    # Each request runs against the current state of the app
+    (app_dir / "release_notes" / "unreleased.md").write_text("**Unreleased**\n")
+    assert call_daemon("release-notes", ["release-notes", str(app_dir)]) == 1
+
+    result = subprocess.run(
+        ["release-notes", "."], cwd=app_dir, capture_output=True, text=True, env=os.environ
+    )
+    assert result.returncode == 1
+    assert "Release notes file is empty" in result.stderr
+
+
+def test_console_scripts_run_in_process_without_daemon(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(SOCKET_ENV_VAR, str(tmp_path / "missing.sock"))
+    assert call_daemon("release-notes", ["release-notes", str(tmp_path)]) is None
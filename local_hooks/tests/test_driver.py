@@ -0,0 +1,57 @@
+import json
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from local_hooks.driver import main
+
+SDK_APP_DIR = Path("tests/data/static_tests/sdk_app_dir")
+
+
+@patch("local_hooks.app_tests.utils.app_parser.load_sdk_apps_environment")
+@patch("local_hooks.app_tests.utils.app_parser.generate_sdk_app_manifest")
+def test_hooks_share_sdk_manifest(mock_generate_manifest, mock_load_env, tmp_path: Path):
+    app_dir = tmp_path / "sdk_app"
+    shutil.copytree(SDK_APP_DIR, app_dir)
+    mock_generate_manifest.return_value = json.loads(
+        (SDK_APP_DIR / "sdk_app_manifest.json").read_text()
+    )
+
+    exit_code = main(["run", str(app_dir), "--hook", "static-tests", "--hook", "build-docs"])
+
+    # Same exit code as the static-tests entry point for this app
+    assert exit_code == 4
+    assert (app_dir / "README.md").is_file()
+    assert mock_load_env.call_count == 1
+    assert mock_generate_manifest.call_count == 1
+
+
+def test_failing_hooks_do_not_stop_the_run(tmp_path: Path):
+    (tmp_path / "release_notes").mkdir()
+    (tmp_path / "app.py").write_text("print('app')\n")
+
+    exit_code = main(["run", str(tmp_path), "--hook", "copyright", "--hook", "release-notes"])
+
+    assert exit_code == 1
+    assert (tmp_path / "release_notes" / "unreleased.md").read_text() == "**Unreleased**\n"
+    assert "Licensed under the Apache License" in (tmp_path / "app.py").read_text()
+
+
+@patch("local_hooks.static_tests.run_static_tests", return_value=0)
+def test_skip_static_tests(mock_run_static_tests, tmp_path: Path):
+    exit_code = main(
+        ["run", str(tmp_path), "--hook", "static-tests", "--skip-static-test", "app_package_name"]
+    )
+
+    assert exit_code == 0
+    tests = mock_run_static_tests.call_args.kwargs["tests"]
+    assert "app_package_name" not in tests
+    assert "valid_app_name_and_guid" in tests
+
+
+@pytest.mark.parametrize(("code", "exit_code"), [(None, 0), (0, 0), (3, 3), ("Invalid app", 1)])
+def test_hook_exit_codes(tmp_path: Path, code, exit_code):
+    with patch("local_hooks.release_notes.check_release_notes", side_effect=SystemExit(code)):
+        assert main(["run", str(tmp_path), "--hook", "release-notes"]) == exit_code
@@ -0,0 +1,143 @@
+import json
+import os
+import subprocess
+from pathlib import Path
+
+from local_hooks import helpers
+from local_hooks.helpers import place_file
+
+
+def test_place_file(tmp_path: Path):
+    src = tmp_path / "pkg-1.0-py3-none-any.whl"
+    src.write_bytes(b"wheel")
+
+    assert place_file(src, tmp_path / "linked.whl") in ("hardlink", "reflink", "copy")
+    assert (tmp_path / "linked.whl").read_bytes() == b"wheel"
+    assert src.exists()
+
+    assert place_file(src, tmp_path / "moved.whl", move=True) == "rename"
+    assert (tmp_path / "moved.whl").read_bytes() == b"wheel"
+    assert not src.exists()
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+
+def test_sdk_app_manifest_is_cached_until_sources_change(tmp_path: Path, monkeypatch):
+    (tmp_path / "uv.lock").write_text("version = 1\n")
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'app'\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("app = 1\n")
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / ".venv" / "site.py").write_text("installed = 1\n")
+    generated = []
+
+    def fake_soarapps(command, **kwargs):
+        generated.append(command)
+        Path(command[5]).write_text(json.dumps({"name": "app", "generation": len(generated)}))
+        return subprocess.CompletedProcess(command, 0)
+
+    monkeypatch.setattr(helpers, "ensure_uv_available", lambda: None)
+    monkeypatch.setattr(helpers.subprocess, "run", fake_soarapps)
+
+    assert helpers.load_cached_sdk_app_manifest(tmp_path) is None
+    assert helpers.generate_sdk_app_manifest(tmp_path)["generation"] == 1
+    assert helpers.load_cached_sdk_app_manifest(tmp_path)["generation"] == 1
+
+    (tmp_path / ".venv" / "site.py").write_text("installed = 2\n")
+    assert helpers.load_cached_sdk_app_manifest(tmp_path)["generation"] == 1
+
+    (tmp_path / "src" / "app.py").write_text("app = 2\n")
+    assert helpers.load_cached_sdk_app_manifest(tmp_path) is None
+    assert helpers.generate_sdk_app_manifest(tmp_path)["generation"] == 2
+
+
+def test_sdk_app_environment_is_only_synced_when_stale(tmp_path: Path, monkeypatch):
+    (tmp_path / "uv.lock").write_text("version = 1\n")
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'app'\n")
+    syncs = []
+
+    def fake_uv_sync(command, **kwargs):
+        syncs.append(command)
+        (tmp_path / ".venv" / "bin").mkdir(parents=True, exist_ok=True)
+        (tmp_path / ".venv" / "pyvenv.cfg").write_text("version_info = 3.13.0\n")
+        return subprocess.CompletedProcess(command, 0)
+
+    monkeypatch.setattr(helpers, "ensure_uv_available", lambda: None)
+    monkeypatch.setattr(helpers.subprocess, "run", fake_uv_sync)
+
+    helpers.load_sdk_apps_environment(tmp_path)
+    helpers.load_sdk_apps_environment(tmp_path)
+    assert len(syncs) == 1
+
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'app'\nversion = '2'\n")
+    helpers.load_sdk_apps_environment(tmp_path)
+    assert len(syncs) == 2
+
+    (tmp_path / ".venv" / "pyvenv.cfg").write_text("version_info = 3.9.0\n")
+    helpers.load_sdk_apps_environment(tmp_path)
+    assert len(syncs) == 3
+
+
+def test_find_uv_lock_file_prefers_shallowest_project(tmp_path: Path):
+    for project in ("tests/data/sdk_app", ".venv/lib/pkg", "src/app", "a/b/c/d/e"):
+        (tmp_path / project).mkdir(parents=True)
+        (tmp_path / project / "uv.lock").write_text("")
+        (tmp_path / project / "pyproject.toml").write_text("")
+    (tmp_path / "uv.lock").write_text("")
+
+    assert helpers.find_uv_lock_file(tmp_path) == tmp_path / "src" / "app" / "uv.lock"
+
+    (tmp_path / "pyproject.toml").write_text("")
+    assert helpers.find_uv_lock_file(tmp_path) == tmp_path / "src" / "app" / "uv.lock"
+    helpers.forget_uv_lock_files()
+    assert helpers.find_uv_lock_file(tmp_path) == tmp_path / "uv.lock"
+
+
+def test_find_uv_lock_file_falls_back_to_lock_without_project(tmp_path: Path):
+    (tmp_path / "connector").mkdir()
+    (tmp_path / "connector" / "uv.lock").write_text("")
+
+    assert helpers.find_uv_lock_file(tmp_path) == tmp_path / "connector" / "uv.lock"
+    assert helpers.find_uv_lock_file(tmp_path / "connector" / "missing") is None
+
+
+def test_host_path(tmp_path: Path, monkeypatch):
+    app_dir = tmp_path / "src"
+    (app_dir / "wheels").mkdir(parents=True)
+    assert helpers.host_path(app_dir / "wheels") == str(app_dir / "wheels")
+
+    monkeypatch.setenv(helpers.HOST_DIRS_ENV_VAR, f"/other=/host/other:{app_dir}=/host/app")
+    assert helpers.host_path(app_dir) == "/host/app"
+    assert helpers.host_path(app_dir / "wheels") == "/host/app/wheels"
+    assert helpers.host_path(tmp_path) == str(tmp_path)
+
+    # Apps mounted at the same path in different containers have their own cache entries
+    app_key = helpers.path_cache_key(app_dir)
+    monkeypatch.setenv(helpers.HOST_DIRS_ENV_VAR, f"{app_dir}=/host/other-app")
+    assert helpers.path_cache_key(app_dir) != app_key
+
+
+def test_sdk_app_sources_are_hashed_once_per_manifest(tmp_path: Path, monkeypatch):
+    from local_hooks.app_tests.utils import app_parser
+
+    (tmp_path / "uv.lock").write_text("version = 1\n")
+    (tmp_path / "app.py").write_text("app = 1\n")
+    digests = []
+
+    def sdk_manifest_digest(uv_lock_dir):
+        digests.append(uv_lock_dir)
+        return "digest"
+
+    def fake_soarapps(command, **kwargs):
+        Path(command[5]).write_text(json.dumps({"name": "app"}))
+        return subprocess.CompletedProcess(command, 0)
+
+    monkeypatch.setenv("SOAR_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(helpers, "ensure_uv_available", lambda: None)
+    monkeypatch.setattr(helpers.subprocess, "run", fake_soarapps)
+    monkeypatch.setattr(helpers, "sdk_manifest_digest", sdk_manifest_digest)
+    monkeypatch.setattr(app_parser, "sdk_manifest_digest", sdk_manifest_digest)
+    monkeypatch.setattr(app_parser, "load_sdk_apps_environment", lambda uv_lock_dir: None)
+
+    assert app_parser.AppParser(tmp_path).sdk_app_json == {"name": "app"}
+    assert digests == [tmp_path]
+    assert (tmp_path / "cache" / "sdk-manifests" / "digest.json").is_file()
@@ -1,13 +1,44 @@
+import concurrent.futures
+import hashlib
 import json
 import os
 import shutil
 import subprocess
+import sys
+import zipfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 from uuid import uuid4
 
-from local_hooks.package_app_dependencies import _should_package_pip_dependency_key
+from local_hooks.tests.test_wheel_metadata import build_wheel
+from local_hooks.wheel_cache import RepairCache, WheelCache
+from local_hooks.wheel_index import WheelIndex
+from local_hooks.package_app_dependencies import (
+    AppJsonWheelEntry,
+    RuntimeJob,
+    RuntimeResult,
+    Wheel,
+    _copy_new_wheels,
+    _repair_wheels,
+    _resolve_universal,
+    _with_universal_resolution,
+    _dependencies_fingerprint,
+    _find_requirements_drift,
+    _fingerprint_marker_path,
+    _is_up_to_date,
+    _lock_file_path,
+    _merge_runtime_results,
+    _package_app_batch,
+    _prune_unreachable_wheels,
+    _select_runtime_jobs,
+    _should_package_pip_dependency_key,
+    main,
+    package_runtime,
+    parse_args,
+    parse_batch_args,
+)
 
 PRE_COMMIT_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 
@@ -19,6 +50,77 @@ def test_package_wrapper_does_not_install_os_packages():
     assert "dnf install" not in wrapper
 
 
+def docker_run_args(tmp_path, *wrapper_args, **env):
+    """
+    Arguments the wrapper passes to docker run for the py3-app, with a fake docker on PATH.
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text('#!/bin/sh\n[ "$1" = info ] && exit 0\nprintf "%s\\n" "$@" > "$ARGS_FILE"\n')
+    docker.chmod(0o755)
+    app_dir = tmp_path / "app"
+    shutil.copytree(os.path.join(PRE_COMMIT_DIR, "tests/data/py3-app"), app_dir)
+
+    subprocess.run(
+        [os.path.join(PRE_COMMIT_DIR, "package_app_dependencies.sh"), *wrapper_args],
+        cwd=app_dir,
+        env={
+            **os.environ,
+            "PATH": f"{bin_dir}:{os.environ['PATH']}",
+            "ARGS_FILE": str(tmp_path / "args"),
+            "SOAR_HOOKS_CACHE_DIR": str(tmp_path / "cache"),
+            **env,
+        },
+        check=True,
+    )
+    return (tmp_path / "args").read_text().splitlines()
+
+
+def test_package_wrapper_forwards_platform_constraints(tmp_path):
+    constraints = tmp_path / "constraints.txt"
+    constraints.write_text("six==1.16.0\n")
+
+    args = docker_run_args(tmp_path, SOAR_HOOKS_PLATFORM_CONSTRAINTS=str(constraints))
+
+    assert f"{constraints}:/soar-hooks-constraints.txt:ro" in args
+    assert "SOAR_HOOKS_PLATFORM_CONSTRAINTS=/soar-hooks-constraints.txt" in args
+
+
+def test_package_wrapper_maps_app_to_host_dir(tmp_path):
+    args = docker_run_args(tmp_path)
+
+    assert f"SOAR_HOOKS_HOST_DIRS=/src={tmp_path / 'app'}" in args
+
+
+def test_lock_files_of_apps_mounted_at_the_same_path_differ(tmp_path, monkeypatch):
+    monkeypatch.setenv("SOAR_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("SOAR_HOOKS_HOST_DIRS", f"{tmp_path}=/host/app-a")
+    app_a_lock = _lock_file_path(str(tmp_path), "pip313_dependencies")
+    monkeypatch.setenv("SOAR_HOOKS_HOST_DIRS", f"{tmp_path}=/host/app-b")
+
+    assert _lock_file_path(str(tmp_path), "pip313_dependencies") != app_a_lock
+
+
+def test_package_wrapper_batches_apps_in_one_container(tmp_path):
+    other_app_dir = tmp_path / "other-app"
+    shutil.copytree(os.path.join(PRE_COMMIT_DIR, "tests/data/py3-app"), other_app_dir)
+
+    args = docker_run_args(tmp_path, "--batch", str(tmp_path / "app"), str(other_app_dir))
+
+    assert f"{tmp_path / 'app'}:/src/0" in args
+    assert f"{other_app_dir}:/src/1" in args
+    assert f"SOAR_HOOKS_HOST_DIRS=/src/0={tmp_path / 'app'}:/src/1={other_app_dir}" in args
+    assert args[-3:] == ["--batch", "/src/0", "/src/1"]
+
+
+def test_package_wrapper_stages_wheels_on_tmpfs(tmp_path):
+    args = docker_run_args(tmp_path)
+
+    assert args[args.index("--tmpfs") + 1] == "/soar-hooks-staging"
+    assert "SOAR_HOOKS_STAGING_DIR=/soar-hooks-staging" in args
+
+
 def test_package_wrapper_respects_explicit_python_runtime(tmp_path):
     wrapper = Path(PRE_COMMIT_DIR, "package_app_dependencies.sh").read_text()
     legacy_app_dir = os.path.join(PRE_COMMIT_DIR, "tests/data/py3-app")
@@ -30,8 +132,665 @@ def test_package_wrapper_respects_explicit_python_runtime(tmp_path):
     assert _should_package_pip_dependency_key(legacy_app_dir, "pip313_dependencies")
     assert not _should_package_pip_dependency_key(python313_app_dir, "pip39_dependencies")
     assert _should_package_pip_dependency_key(python313_app_dir, "pip313_dependencies")
-    assert 'package_dependencies "$py39_deps"' in wrapper
-    assert 'package_dependencies "$py313_deps"' in wrapper
+    assert "run_packager . --repair-wheels" in wrapper
+
+    with patch.object(sys, "argv", ["package-app-dependencies", str(python313_app_dir)]):
+        jobs = _select_runtime_jobs(parse_args())
+    assert [job.pip_dependencies_key for job in jobs] == ["pip313_dependencies"]
+
+    with patch.object(sys, "argv", ["package-app-dependencies", legacy_app_dir]):
+        jobs = _select_runtime_jobs(parse_args())
+    assert [job.pip_dependencies_key for job in jobs] == [
+        "pip39_dependencies",
+        "pip313_dependencies",
+    ]
+
+
+def test_merge_runtime_results_writes_all_runtimes_at_once(tmp_path):
+    wheels_dir = tmp_path / "wheels" / "shared"
+    wheels_dir.mkdir(parents=True)
+    for name in ("old-1.0-py2.py3-none-any.whl", "kept-1.0-py2.py3-none-any.whl"):
+        (wheels_dir / name).write_text("")
+    (tmp_path / "app.json").write_text(
+        json.dumps(
+            {
+                "pip39_dependencies": {
+                    "wheel": [
+                        {
+                            "module": "old",
+                            "input_file": "wheels/shared/old-1.0-py2.py3-none-any.whl",
+                        }
+                    ]
+                },
+                "pip313_dependencies": {
+                    "wheel": [
+                        {
+                            "module": "old",
+                            "input_file": "wheels/shared/old-1.0-py2.py3-none-any.whl",
+                        }
+                    ]
+                },
+            }
+        )
+    )
+    new_entries = [AppJsonWheelEntry("kept", "wheels/shared/kept-1.0-py2.py3-none-any.whl")]
+    old_paths = {"wheels/shared/old-1.0-py2.py3-none-any.whl"}
+
+    _merge_runtime_results(
+        str(tmp_path),
+        [
+            RuntimeResult("pip39_dependencies", new_entries, old_paths),
+            RuntimeResult("pip313_dependencies", new_entries, old_paths),
+        ],
+    )
+
+    app_json = json.loads((tmp_path / "app.json").read_text())
+    expected = {"wheel": [{"module": "kept", "input_file": new_entries[0].input_file}]}
+    assert app_json["pip39_dependencies"] == expected
+    assert app_json["pip313_dependencies"] == expected
+    assert sorted(os.listdir(wheels_dir)) == ["kept-1.0-py2.py3-none-any.whl"]
+
+
+def test_repair_wheels_concurrently(tmp_path):
+    pure = Wheel("pure-1.0-py3-none-any.whl", "pure", "py3", "any")
+    native = [
+        Wheel(f"native{i}-1.0-cp39-cp39-linux_x86_64.whl", f"native{i}", "cp39", "linux_x86_64")
+        for i in range(4)
+    ]
+    all_wheels = {pure, *native}
+    for whl in all_wheels:
+        (tmp_path / whl.file_name).write_text("")
+
+    def fake_auditwheel(command, *args, **kwargs):
+        if command[1] == "show":
+            return subprocess.CompletedProcess(command, int("-any" in command[2]), "", "")
+        if command[1] == "repair":
+            out_dir = Path(command[-1])
+            out_dir.mkdir(parents=True)
+            repaired = Path(command[2]).name.replace("linux_x86_64", "manylinux_2_28_x86_64")
+            (out_dir / repaired).write_text("repaired")
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+    with (
+        patch("local_hooks.package_app_dependencies.subprocess.run", fake_auditwheel),
+        patch("local_hooks.package_app_dependencies.run_child", fake_auditwheel),
+    ):
+        _repair_wheels(sorted(all_wheels), all_wheels, str(tmp_path), jobs=3)
+
+    assert sorted(w.file_name for w in all_wheels) == sorted(os.listdir(tmp_path))
+    assert pure in all_wheels
+    assert {w.platform for w in all_wheels if w != pure} == {"manylinux_2_28_x86_64"}
+
+
+def test_repair_wheels_reuses_cached_auditwheel_outcomes(tmp_path):
+    repair_cache = RepairCache(tmp_path / "cache")
+    names = ["native-1.0-cp39-cp39-linux_x86_64.whl", "static-1.0-cp39-cp39-linux_x86_64.whl"]
+
+    def repair(wheels_dir, auditwheel):
+        wheels_dir.mkdir()
+        all_wheels = set()
+        for name in names:
+            (wheels_dir / name).write_text(name)
+            all_wheels.add(Wheel(name, name.split("-")[0], "cp39", "linux_x86_64"))
+        with (
+            patch("local_hooks.package_app_dependencies.subprocess.run", auditwheel),
+            patch("local_hooks.package_app_dependencies.run_child", auditwheel),
+        ):
+            _repair_wheels(
+                sorted(all_wheels), all_wheels, str(wheels_dir), repair_cache=repair_cache
+            )
+        return sorted(os.listdir(wheels_dir))
+
+    def fake_auditwheel(command, *args, **kwargs):
+        if command[1] == "show":
+            return subprocess.CompletedProcess(command, int("static" in command[2]), "", "")
+        if command[1] == "repair":
+            out_dir = Path(command[-1])
+            out_dir.mkdir(parents=True)
+            repaired = Path(command[2]).name.replace("linux_x86_64", "manylinux_2_28_x86_64")
+            (out_dir / repaired).write_text("repaired")
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+    def unexpected_auditwheel(command, *args, **kwargs):
+        raise AssertionError(f"auditwheel shouldn't run: {command}")
+
+    expected = [
+        "native-1.0-cp39-cp39-manylinux_2_28_x86_64.whl",
+        "static-1.0-cp39-cp39-linux_x86_64.whl",
+    ]
+    assert repair(tmp_path / "first", fake_auditwheel) == expected
+    assert repair(tmp_path / "second", unexpected_auditwheel) == expected
+    assert (
+        tmp_path / "second" / "native-1.0-cp39-cp39-manylinux_2_28_x86_64.whl"
+    ).read_text() == "repaired"
+
+
+def test_prune_wheels_only_required_by_soar_distributions(tmp_path):
+    (tmp_path / "requirements.txt").write_text("client==1.0\nrequests==2.31.0\n")
+    wheel_paths = [
+        build_wheel(tmp_path, "client", "1.0", ["requests", "attrs"]),
+        build_wheel(tmp_path, "attrs", "23.1.0", []),
+        build_wheel(tmp_path, "brotli", "1.1.0", []),
+    ]
+    wheels = set(
+        Wheel(os.path.basename(path), os.path.basename(path).split("-")[0], "py3", "any")
+        for path in wheel_paths
+    )
+    brotli = next(w for w in wheels if w.distribution == "brotli")
+
+    _prune_unreachable_wheels(
+        wheels, str(tmp_path), str(tmp_path / "requirements.txt"), "pip313_dependencies"
+    )
+
+    assert sorted(w.distribution for w in wheels) == ["attrs", "client"]
+    assert not (tmp_path / brotli.file_name).exists()
+
+
+def test_copy_new_wheels_keeps_existing_wheels(tmp_path):
+    staging_dir, app_dir = tmp_path / "staging", tmp_path / "app"
+    staging_dir.mkdir()
+    wheels = [
+        Wheel("same-1.0-py2.py3-none-any.whl", "same", "py2.py3", "any"),
+        Wheel("rebuilt-1.0-py2.py3-none-any.whl", "rebuilt", "py2.py3", "any"),
+        Wheel("new-1.0-cp39-cp39-manylinux_2_28_x86_64.whl", "new", "cp39", "manylinux"),
+    ]
+    for whl in wheels:
+        (staging_dir / whl.file_name).write_text(whl.distribution)
+    (app_dir / "wheels" / "shared").mkdir(parents=True)
+    (app_dir / "wheels" / "shared" / wheels[0].file_name).write_text("same")
+    (app_dir / "wheels" / "shared" / wheels[1].file_name).write_text("previous build")
+
+    # Existing wheels are kept without being read
+    with (
+        patch("local_hooks.package_app_dependencies.file_sha256", side_effect=AssertionError),
+        patch(
+            "local_hooks.package_app_dependencies.cached_file_sha256", side_effect=AssertionError
+        ),
+    ):
+        new_wheel_paths = _copy_new_wheels(wheels, str(staging_dir), str(app_dir))
+
+    assert new_wheel_paths == [
+        "wheels/shared/same-1.0-py2.py3-none-any.whl",
+        "wheels/shared/rebuilt-1.0-py2.py3-none-any.whl",
+        "wheels/py39/new-1.0-cp39-cp39-manylinux_2_28_x86_64.whl",
+    ]
+    assert (app_dir / new_wheel_paths[1]).read_text() == "previous build"
+    assert (app_dir / new_wheel_paths[2]).read_text() == "new"
+
+
+def test_repeat_packaging_builds_from_lockfile(tmp_path):
+    (tmp_path / "requirements.txt").write_text("Deprecated==1.2.14\n")
+    (tmp_path / "app.json").write_text('{"python_version": "3"}')
+    pip_commands = []
+
+    def fake_pip(command, **kwargs):
+        pip_commands.append(command)
+        if command[1] == "install":
+            return fake_pip_resolution(
+                command,
+                {"Deprecated": ("1.2.14", ["wrapt"]), "wrapt": ("1.17.3", [])},
+                {
+                    "Deprecated": ("Deprecated-1.2.14-py2.py3-none-any.whl", "deprecated"),
+                    "wrapt": ("wrapt-1.17.3-py3-none-any.whl", "wrapt"),
+                },
+            )
+        wheel_dir = Path(command[command.index("-w") + 1])
+        (wheel_dir / "Deprecated-1.2.14-py2.py3-none-any.whl").write_text("deprecated")
+        (wheel_dir / "wrapt-1.17.3-py3-none-any.whl").write_text("wrapt")
+        return subprocess.CompletedProcess(command, 0)
+
+    job = RuntimeJob(str(tmp_path), "pip", "pip313_dependencies", False, None, True, 1, None)
+    with patch("local_hooks.package_app_dependencies.subprocess.run", fake_pip):
+        first_result = package_runtime(job)
+        second_result = package_runtime(job)
+
+    lock_file = _lock_file_path(str(tmp_path), "pip313_dependencies")
+    lock = lock_file.read_text()
+    assert "deprecated==1.2.14 \\\n    --hash=sha256:" in lock
+    assert "    # wheels/shared/Deprecated-1.2.14-py2.py3-none-any.whl" in lock
+    assert "wrapt==1.17.3" in lock
+
+    assert "--dry-run" in pip_commands[0]
+    assert pip_commands[1][4] == "--no-deps"
+    assert ["--no-deps", "--require-hashes", "-r", str(lock_file)] == pip_commands[2][4:8]
+    assert first_result.wheel_entries == second_result.wheel_entries
+
+    (tmp_path / "requirements.txt").write_text("Deprecated==1.2.14\nwrapt==1.17.3\n")
+    with patch("local_hooks.package_app_dependencies.subprocess.run", fake_pip):
+        package_runtime(job)
+    assert "--require-hashes" not in pip_commands[4]
+
+
+def locked_hashes(lock_file):
+    """
+    Hashes accepted by each pin of a lockfile, by pinned requirement.
+    """
+    pins, pin = {}, None
+    for line in Path(lock_file).read_text().splitlines():
+        if line.startswith("    --hash=sha256:"):
+            pins[pin].add(line.split(":")[1].rstrip(" \\"))
+        elif line and not line.startswith(("#", " ")):
+            pin = line.rstrip(" \\")
+            pins[pin] = set()
+    return pins
+
+
+def test_lockfile_of_a_distribution_built_from_an_sdist_replays(tmp_path):
+    (tmp_path / "requirements.txt").write_text("Deprecated==1.2.14\n")
+    (tmp_path / "app.json").write_text('{"python_version": "3"}')
+    artifacts = {
+        "Deprecated": ("Deprecated-1.2.14-py2.py3-none-any.whl", "deprecated"),
+        "wrapt": ("wrapt-1.17.3.tar.gz", "wrapt sources"),
+    }
+    pip_commands = []
+
+    def fake_pip(command, **kwargs):
+        pip_commands.append(command)
+        if command[1] == "install":
+            return fake_pip_resolution(
+                command,
+                {"Deprecated": ("1.2.14", ["wrapt"]), "wrapt": ("1.17.3", [])},
+                artifacts,
+            )
+        if "--require-hashes" in command:
+            # Like pip, check the hashes of the downloaded artifacts rather than the built wheels
+            pins = locked_hashes(command[command.index("-r") + 1])
+            for name, (file_name, content) in artifacts.items():
+                version = file_name.split("-")[1].removesuffix(".tar.gz")
+                artifact_hash = hashlib.sha256(content.encode()).hexdigest()
+                if artifact_hash not in pins[f"{name.lower()}=={version}"]:
+                    return subprocess.CompletedProcess(command, 1)
+        wheel_dir = Path(command[command.index("-w") + 1])
+        (wheel_dir / "Deprecated-1.2.14-py2.py3-none-any.whl").write_text("deprecated")
+        (wheel_dir / "wrapt-1.17.3-cp313-cp313-linux_x86_64.whl").write_text("wrapt")
+        return subprocess.CompletedProcess(command, 0)
+
+    job = RuntimeJob(str(tmp_path), "pip", "pip313_dependencies", False, None, True, 1, None)
+    with patch("local_hooks.package_app_dependencies.subprocess.run", fake_pip):
+        package_runtime(job)
+        package_runtime(job)
+
+    lock_file = _lock_file_path(str(tmp_path), "pip313_dependencies")
+    sdist_hash = hashlib.sha256(b"wrapt sources").hexdigest()
+    assert sdist_hash in locked_hashes(lock_file)["wrapt==1.17.3"]
+    assert len(pip_commands) == 3
+    assert ["--no-deps", "--require-hashes", "-r", str(lock_file)] == pip_commands[2][4:8]
+
+
+def test_lockfile_is_not_written_without_artifact_hashes(tmp_path):
+    (tmp_path / "requirements.txt").write_text("Deprecated==1.2.14\n")
+    (tmp_path / "app.json").write_text('{"python_version": "3"}')
+
+    def fake_pip(command, **kwargs):
+        if command[1] == "install":
+            return fake_pip_resolution(
+                command,
+                {"Deprecated": ("1.2.14", ["wrapt"]), "wrapt": ("1.17.3", [])},
+                {"Deprecated": ("Deprecated-1.2.14-py2.py3-none-any.whl", "deprecated")},
+            )
+        wheel_dir = Path(command[command.index("-w") + 1])
+        (wheel_dir / "Deprecated-1.2.14-py2.py3-none-any.whl").write_text("deprecated")
+        (wheel_dir / "wrapt-1.17.3-py3-none-any.whl").write_text("wrapt")
+        return subprocess.CompletedProcess(command, 0)
+
+    job = RuntimeJob(str(tmp_path), "pip", "pip313_dependencies", False, None, True, 1, None)
+    with patch("local_hooks.package_app_dependencies.subprocess.run", fake_pip):
+        assert package_runtime(job) is not None
+
+    assert not _lock_file_path(str(tmp_path), "pip313_dependencies").exists()
+
+
+def fake_pip_resolution(command, distributions, artifacts=None):
+    """
+    Writes the report of a pip install --dry-run resolving to the given distributions, each
+    mapped to its version and requirements, and downloaded from the given artifacts, each mapped
+    to its file name and content.
+    """
+    report = {"install": []}
+    for name, (version, requires) in distributions.items():
+        item = {"metadata": {"name": name, "version": version, "requires_dist": requires}}
+        if name in (artifacts or {}):
+            file_name, content = artifacts[name]
+            item["download_info"] = {
+                "url": f"https://files.pythonhosted.org/packages/{file_name}",
+                "archive_info": {
+                    "hashes": {"sha256": hashlib.sha256(content.encode()).hexdigest()}
+                },
+            }
+        report["install"].append(item)
+    Path(command[command.index("--report") + 1]).write_text(json.dumps(report))
+    return subprocess.CompletedProcess(command, 0)
+
+
+def test_soar_provided_distributions_are_never_built(tmp_path):
+    (tmp_path / "requirements.txt").write_text("client==1.0\nrequests==2.31.0\n")
+    (tmp_path / "app.json").write_text('{"python_version": "3"}')
+    constraints_file = tmp_path / "soar-constraints.txt"
+    constraints_file.write_text("requests==2.31.0\nurllib3==1.26.7\n")
+    built_requirements = []
+
+    def fake_pip(command, **kwargs):
+        if command[1] == "install":
+            assert command[command.index("-c") + 1] == str(constraints_file)
+            return fake_pip_resolution(
+                command,
+                {
+                    "client": ("1.0", ["requests", "attrs; python_version < '3.10'"]),
+                    "requests": ("2.31.0", ["urllib3", "idna"]),
+                    "urllib3": ("1.26.7", []),
+                    "idna": ("3.4", ["attrs"]),
+                    "attrs": ("23.1.0", []),
+                },
+            )
+        built_requirements.append(Path(command[command.index("-r") + 1]).read_text())
+        wheel_dir = Path(command[command.index("-w") + 1])
+        (wheel_dir / "client-1.0-py3-none-any.whl").write_text("client")
+        return subprocess.CompletedProcess(command, 0)
+
+    job = RuntimeJob(str(tmp_path), "pip", "pip313_dependencies", False, None, True, 1, None)
+    with (
+        patch.dict(os.environ, {"SOAR_HOOKS_PLATFORM_CONSTRAINTS": str(constraints_file)}),
+        patch("local_hooks.package_app_dependencies.subprocess.run", fake_pip),
+    ):
+        result = package_runtime(job)
+
+    assert built_requirements == ["client==1.0\n"]
+    assert [entry.module for entry in result.wheel_entries] == ["client"]
+
+
+def test_batch_isolates_failing_apps(tmp_path):
+    app_dirs = []
+    for name in ("good", "failing", "broken"):
+        app_dirs.append(str(tmp_path / name))
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "requirements.txt").write_text("dnspython==1.16.0\n")
+    for name in ("good", "failing"):
+        (tmp_path / name / "app.json").write_text('{"python_version": "3.13"}')
+
+    def fake_package_runtime(job):
+        if job.app_dir.endswith("failing"):
+            raise RuntimeError("pip crashed")
+        wheel = "wheels/shared/dnspython-1.16.0-py2.py3-none-any.whl"
+        Path(job.app_dir, wheel).parent.mkdir(parents=True)
+        Path(job.app_dir, wheel).write_text("wheel")
+        return RuntimeResult(
+            job.pip_dependencies_key, [AppJsonWheelEntry("dnspython", wheel)], set()
+        )
+
+    with (
+        patch.object(sys, "argv", ["package-app-dependencies-batch", *app_dirs]),
+        patch("local_hooks.package_app_dependencies.package_runtime", fake_package_runtime),
+        concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor,
+    ):
+        reports = _package_app_batch(app_dirs, parse_batch_args(), executor)
+
+    assert [r["status"] for r in reports] == ["packaged", "failed", "failed"]
+    assert reports[0]["runtimes"]["pip313_dependencies"]["status"] == "packaged"
+    assert reports[1]["error"] == "pip crashed"
+    assert "dnspython" in (tmp_path / "good" / "app.json").read_text()
+
+
+def build_platform_wheel(directory: Path, name: str, tag: str, requires_dist=()) -> None:
+    dist_info = f"{name}-1.0.dist-info"
+    metadata = f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n"
+    metadata += "".join(f"Requires-Dist: {r}\n" for r in requires_dist)
+    with zipfile.ZipFile(directory / f"{name}-1.0-{tag}.whl", "w") as whl:
+        whl.writestr(f"{name}/__init__.py", "")
+        whl.writestr(f"{dist_info}/METADATA", metadata)
+        whl.writestr(
+            f"{dist_info}/WHEEL", f"Wheel-Version: 1.0\nRoot-Is-Purelib: false\nTag: {tag}\n"
+        )
+        whl.writestr(f"{dist_info}/RECORD", "")
+
+
+def test_native_mode_downloads_wheels_for_the_target_runtime(tmp_path, monkeypatch):
+    index_wheels_dir = tmp_path / "index" / "files"
+    index_wheels_dir.mkdir(parents=True)
+    for tag in ("cp39-cp39-manylinux_2_17_x86_64", "cp313-cp313-manylinux_2_28_x86_64"):
+        build_platform_wheel(index_wheels_dir, "fastlib", tag, ["purelib"])
+    build_platform_wheel(index_wheels_dir, "fastlib", "cp39-cp39-win_amd64")
+    build_platform_wheel(index_wheels_dir, "purelib", "py3-none-any")
+    index = WheelIndex(tmp_path / "index", tmp_path / "index-cache")
+    index.update()
+    monkeypatch.setenv("PIP_CONFIG_FILE", os.devnull)
+    monkeypatch.setenv("PIP_INDEX_URL", index.url)
+
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "app.json").write_text('{"python_version": ["3.9", "3.13"]}')
+    (app_dir / "requirements.txt").write_text("fastlib==1.0\n")
+    job = RuntimeJob(str(app_dir), "pip3.9", "pip39_dependencies", True, None, True, 1, None, True)
+
+    result = package_runtime(job)
+
+    assert sorted(w.input_file for w in result.wheel_entries) == [
+        "wheels/py3/purelib-1.0-py3-none-any.whl",
+        "wheels/py39/fastlib-1.0-cp39-cp39-manylinux_2_17_x86_64.whl",
+    ]
+
+    (app_dir / "requirements.txt").write_text("fastlib==1.0\nsdistonly==1.0\n")
+    assert package_runtime(job) is None
+
+
+def test_native_mode_leaves_only_dependencies_without_wheels_to_the_container(
+    tmp_path, monkeypatch
+):
+    index_wheels_dir = tmp_path / "index" / "files"
+    index_wheels_dir.mkdir(parents=True)
+    build_platform_wheel(
+        index_wheels_dir, "fastlib", "cp39-cp39-manylinux_2_17_x86_64", ["purelib"]
+    )
+    build_platform_wheel(index_wheels_dir, "purelib", "py3-none-any")
+    index = WheelIndex(tmp_path / "index", tmp_path / "index-cache")
+    index.update()
+    monkeypatch.setenv("PIP_CONFIG_FILE", os.devnull)
+    monkeypatch.setenv("PIP_INDEX_URL", index.url)
+
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "app.json").write_text('{"python_version": "3.9"}')
+    (app_dir / "requirements.txt").write_text("fastlib==1.0\nsdistonly==1.0\n")
+    pins_file = tmp_path / "universal.txt"
+    pins_file.write_text(
+        "fastlib==1.0\npurelib==1.0\nsdistonly==1.0\ntomli==2.0.1 ; python_version >= '3.11'\n"
+    )
+    job = RuntimeJob(
+        str(app_dir),
+        "pip3.9",
+        "pip39_dependencies",
+        False,
+        None,
+        True,
+        1,
+        None,
+        True,
+        str(pins_file),
+    )
+
+    assert package_runtime(job) is None
+
+    def fake_container_pip(command, **kwargs):
+        # Only the dependency without a prebuilt wheel is built, without resolving again
+        leftovers_file = command[command.index("-r") + 1]
+        assert command[1] == "wheel" and "--no-deps" in command
+        assert Path(leftovers_file).read_text().splitlines()[2:] == ["sdistonly==1.0"]
+        build_platform_wheel(Path(command[3]), "sdistonly", "py3-none-any")
+        return subprocess.CompletedProcess(command, 0)
+
+    container_job = job._replace(native=False, resolved_requirements=None)
+    with patch("local_hooks.package_app_dependencies.subprocess.run", fake_container_pip):
+        result = package_runtime(container_job)
+
+    # Platform wheels are removed without repairing them
+    assert sorted(w.input_file for w in result.wheel_entries) == [
+        "wheels/py3/purelib-1.0-py3-none-any.whl",
+        "wheels/py3/sdistonly-1.0-py3-none-any.whl",
+    ]
+
+
+def test_universal_resolution_is_shared_by_runtimes(tmp_path):
+    (tmp_path / "requirements.txt").write_text('tomli; python_version < "3.11"\n')
+    (tmp_path / "app.json").write_text('{"python_version": ["3.9", "3.13"]}')
+    uv_commands = []
+
+    def fake_uv(command, **kwargs):
+        uv_commands.append(command)
+        return subprocess.CompletedProcess(
+            command, 0, "tomli==2.0.1 ; python_full_version < '3.11'\n", ""
+        )
+
+    with (
+        patch.object(sys, "argv", ["package-app-dependencies", str(tmp_path)]),
+        patch("local_hooks.package_app_dependencies._find_uv", return_value="uv"),
+        patch("local_hooks.package_app_dependencies.subprocess.run", fake_uv),
+    ):
+        args = parse_args()
+        jobs = _with_universal_resolution(str(tmp_path), _select_runtime_jobs(args), args)
+        keys = [job.pip_dependencies_key for job in jobs]
+        assert _resolve_universal(str(tmp_path), keys) == Path(jobs[0].resolved_requirements)
+
+    assert len(uv_commands) == 1
+    assert uv_commands[0][:6] == ["uv", "pip", "compile", "--universal", "--python-version", "3.9"]
+    assert set(job.resolved_requirements for job in jobs) == {jobs[0].resolved_requirements}
+    assert (
+        Path(jobs[0].resolved_requirements)
+        .read_text()
+        .endswith("tomli==2.0.1 ; python_full_version < '3.11'\n")
+    )
+
+
+def test_pure_wheels_of_the_universal_resolution_are_built_once(tmp_path, monkeypatch):
+    (tmp_path / "requirements.txt").write_text("purelib\nfastlib\ntomli\n")
+    (tmp_path / "app.json").write_text('{"python_version": ["3.9", "3.13"]}')
+    monkeypatch.setenv("SOAR_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    pip_commands = []
+
+    def fake_uv_and_pip(command, **kwargs):
+        if command[0] == "uv":
+            return subprocess.CompletedProcess(
+                command,
+                0,
+                "purelib==1.0\nfastlib==1.0\ntomli==2.0.1 ; python_full_version < '3.11'\n",
+                "",
+            )
+        pip_commands.append(Path(command[command.index("-r") + 1]).read_text())
+        wheels_dir = Path(command[command.index("-w") + 1])
+        wheels_dir.mkdir()
+        (wheels_dir / "purelib-1.0-py3-none-any.whl").write_text("purelib")
+        (wheels_dir / "fastlib-1.0-cp39-cp39-linux_x86_64.whl").write_text("fastlib")
+        return subprocess.CompletedProcess(command, 0)
+
+    with (
+        patch.object(sys, "argv", ["package-app-dependencies", str(tmp_path)]),
+        patch("local_hooks.package_app_dependencies._find_uv", return_value="uv"),
+        patch("local_hooks.package_app_dependencies.subprocess.run", fake_uv_and_pip),
+    ):
+        args = parse_args()
+        _with_universal_resolution(str(tmp_path), _select_runtime_jobs(args), args)
+
+    # Only the pins without markers are built, once for every runtime
+    assert pip_commands == ["purelib==1.0\nfastlib==1.0\n"]
+    wheel_cache = WheelCache.default()
+    assert wheel_cache.get("purelib-1.0-py3-none-any.whl") is not None
+    assert wheel_cache.get("fastlib-1.0-cp39-cp39-linux_x86_64.whl") is None
+
+
+def test_universal_resolution_falls_back_when_uv_cannot_run(tmp_path):
+    (tmp_path / "requirements.txt").write_text("tomli\n")
+
+    with (
+        patch("local_hooks.package_app_dependencies._find_uv", return_value="uv"),
+        patch(
+            "local_hooks.package_app_dependencies.subprocess.run",
+            side_effect=OSError(8, "Exec format error"),
+        ),
+    ):
+        assert _resolve_universal(str(tmp_path), ["pip39_dependencies"]) is None
+
+
+def test_universal_resolutions_of_apps_mounted_at_the_same_path_differ(tmp_path, monkeypatch):
+    (tmp_path / "requirements.txt").write_text("tomli\n")
+    monkeypatch.setenv("SOAR_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    uv_commands = []
+
+    def fake_uv(command, **kwargs):
+        uv_commands.append(command)
+        return subprocess.CompletedProcess(command, 0, "tomli==2.0.1\n", "")
+
+    keys = ["pip39_dependencies", "pip313_dependencies"]
+    with (
+        patch("local_hooks.package_app_dependencies._find_uv", return_value="uv"),
+        patch("local_hooks.package_app_dependencies.subprocess.run", fake_uv),
+    ):
+        monkeypatch.setenv("SOAR_HOOKS_HOST_DIRS", f"{tmp_path}=/host/app-a")
+        app_a_resolution = _resolve_universal(str(tmp_path), keys)
+        assert _resolve_universal(str(tmp_path), keys) == app_a_resolution
+        monkeypatch.setenv("SOAR_HOOKS_HOST_DIRS", f"{tmp_path}=/host/app-b")
+        assert _resolve_universal(str(tmp_path), keys) != app_a_resolution
+
+    # Resolved once for each app
+    assert len(uv_commands) == 2
+
+
+def make_packaged_app(app_dir: Path, requirements: str) -> None:
+    wheel_path = "wheels/shared/dnspython-1.16.0-py2.py3-none-any.whl"
+    (app_dir / "wheels" / "shared").mkdir(parents=True)
+    (app_dir / wheel_path).write_text("wheel")
+    (app_dir / "requirements.txt").write_text(requirements)
+    (app_dir / "app.json").write_text(
+        json.dumps(
+            {
+                key: {"wheel": [{"module": "dnspython", "input_file": wheel_path}]}
+                for key in ("pip39_dependencies", "pip313_dependencies")
+            }
+        )
+    )
+
+
+def run_packager(app_dir: Path, *flags: str):
+    argv = ["package-app-dependencies", str(app_dir), "--repair-wheels", *flags]
+    with (
+        patch.object(sys, "argv", argv),
+        patch("local_hooks.package_app_dependencies.package_runtime") as package_runtime,
+    ):
+        return main(), package_runtime
+
+
+def test_unchanged_dependencies_skip_packaging(tmp_path):
+    make_packaged_app(tmp_path, "dnspython==1.16.0\nbeautifulsoup4==4.9.1\n")
+    keys = ["pip39_dependencies", "pip313_dependencies"]
+    _fingerprint_marker_path(_dependencies_fingerprint(str(tmp_path), keys, True)).touch()
+
+    # Comments and reordering don't affect the fingerprint
+    (tmp_path / "requirements.txt").write_text(
+        "# SOAR provides bs4\nbeautifulsoup4==4.9.1\ndnspython==1.16.0  # dns lookups\n"
+    )
+    exit_code, package_runtime = run_packager(tmp_path, "--check-up-to-date")
+    assert exit_code is None
+    package_runtime.assert_not_called()
+
+    (tmp_path / "requirements.txt").write_text("dnspython==1.16.0\nrequests==2.31.0\n")
+    exit_code, package_runtime = run_packager(tmp_path, "--check-up-to-date")
+    assert exit_code == 1
+
+
+def test_requirements_drift_disables_fast_path(tmp_path):
+    make_packaged_app(tmp_path, "dnspython==2.0.0\n")
+    keys = ["pip39_dependencies", "pip313_dependencies"]
+    _fingerprint_marker_path(_dependencies_fingerprint(str(tmp_path), keys, True)).touch()
+
+    assert _find_requirements_drift(str(tmp_path), keys) == [
+        f"dnspython==2.0.0 is pinned in requirements.txt, but {key} references 1.16.0"
+        for key in keys
+    ]
+    assert not _is_up_to_date(str(tmp_path), keys, True)
+
+
+def test_requirements_drift_compares_normalized_versions(tmp_path):
+    make_packaged_app(tmp_path, "DNSPython==1.16\n")
+    keys = ["pip39_dependencies", "pip313_dependencies"]
+
+    assert _find_requirements_drift(str(tmp_path), keys) == []
 
 
 @pytest.fixture(
@@ -9,6 +9,7 @@ from unittest.mock import patch
 import pytest
 from pathlib import Path
 
+from local_hooks.app_tests import generate_test_registry, load_test_registry
 from local_hooks.app_tests.json_tests import JSONTests
 
 PRE_COMMIT_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
@@ -157,3 +158,42 @@ def test_connector_template_exemption_requires_exact_placeholder(tmp_path: Path)
     }
 
     assert suite._is_connector_template_placeholder() is False
+
+
+def test_test_registry_is_up_to_date():
+    # Regenerate with python -m local_hooks.app_tests
+    assert load_test_registry() == generate_test_registry()
+
+
+@pytest.mark.parametrize(
+    "app_dir",
+    ["tests/data/static_tests/app_dir"],
+    indirect=["app_dir"],
+)
+def test_only_selected_suites_are_imported(app_dir: Path):
+    script = (
+        "import sys\nfrom pathlib import Path\n"
+        "from local_hooks.static_tests import run_static_tests\n"
+        "run_static_tests(Path(sys.argv[1]), tests=['main_module'])\n"
+        "print(sorted(m for m in sys.modules if m.startswith('local_hooks.app_tests.')))\n"
+    )
+
+    result = subprocess.run(
+        ["python", "-c", script, str(app_dir)], capture_output=True, text=True, check=True
+    )
+
+    assert "local_hooks.app_tests.json_tests" in result.stdout
+    assert "local_hooks.app_tests.code_tests" not in result.stdout
+    assert "local_hooks.app_tests.security_tests" not in result.stdout
+
+
+def test_app_parser_is_imported_lazily():
+    script = (
+        "import sys\n"
+        "import local_hooks.static_tests\n"
+        "print('local_hooks.app_tests.utils.app_parser' in sys.modules)\n"
+    )
+
+    result = subprocess.run(["python", "-c", script], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
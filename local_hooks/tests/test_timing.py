@@ -0,0 +1,62 @@
+import subprocess
+import sys
+import time
+
+from local_hooks.timing import PhaseRecorder, run_child
+
+
+def test_phase_recorder():
+    recorder = PhaseRecorder(runtime="pip313_dependencies")
+    with recorder.phase("pip_wheel"):
+        subprocess.run([sys.executable, "-c", "sum(range(10**6))"], check=True)
+    recorder.record_wheel("pkg-1.0-py3-none-any.whl", "copy", 0.5, method="hardlink")
+    recorder.update({"phases": [{"phase": "update_app_json", "wall_time": 0.1}]})
+
+    report = recorder.report()
+    phase = report["phases"][0]
+    assert phase["runtime"] == "pip313_dependencies"
+    assert phase["phase"] == "pip_wheel"
+    assert phase["wall_time"] > 0
+    assert phase["child_cpu_time"] > 0
+    assert report["phases"][1] == {"phase": "update_app_json", "wall_time": 0.1}
+    assert report["wheels"] == [
+        {
+            "runtime": "pip313_dependencies",
+            "wheel": "pkg-1.0-py3-none-any.whl",
+            "phase": "copy",
+            "wall_time": 0.5,
+            "method": "hardlink",
+        }
+    ]
+
+    summary = PhaseRecorder(runtime="pip39_dependencies")
+    summary.update({"phases": report["phases"][:1]})
+    assert "pip313_dependencies/pip_wheel" in summary.summary().splitlines()[1]
+
+
+def test_phase_recorder_wheel(tmp_path):
+    wheel_path = tmp_path / "pkg-1.0-cp313-cp313-linux_x86_64.whl"
+    wheel_path.write_bytes(b"0" * 1024)
+    recorder = PhaseRecorder(runtime="pip313_dependencies")
+    with recorder.wheel(str(wheel_path), "auditwheel") as details:
+        result = run_child([sys.executable, "-c", "print(sum(range(10**6)))"], details)
+        # Not run through run_child, so not counted for the wheel
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "sum(range(10**7))"], check=True)
+        other_child_time = time.perf_counter() - start
+        details["repaired"] = True
+
+    assert result.returncode == 0
+    assert result.stdout == f"{sum(range(10**6))}\n"
+
+    (record,) = recorder.report()["wheels"]
+    assert record["runtime"] == "pip313_dependencies"
+    assert record["wheel"] == wheel_path.name
+    assert record["phase"] == "auditwheel"
+    assert record["repaired"] is True
+    assert record["wheel_size"] == 1024
+    assert record["wall_time"] > 0
+    assert 0 < record["child_cpu_time"] < other_child_time
+    assert record["child_bytes_written"] >= 0
+    assert record["cpu_time"] >= 0
+    assert record["bytes_written"] >= 0
@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+from local_hooks.wheel_cache import RepairCache, WheelCache
+
+WHEEL_NAME = "example-1.0.0-py3-none-any.whl"
+
+
+def make_wheel(directory: Path, name: str = WHEEL_NAME, content: bytes = b"wheel") -> Path:
+    path = directory / name
+    path.write_bytes(content)
+    return path
+
+
+def test_add_stores_wheel_once(tmp_path: Path):
+    cache = WheelCache(tmp_path / "cache")
+    wheel = make_wheel(tmp_path)
+
+    assert cache.add(wheel)
+    assert not cache.add(wheel)
+
+    cached = cache.get(WHEEL_NAME)
+    assert cached is not None
+    assert cached.read_bytes() == b"wheel"
+    assert cache.find_links_args() == ["-f", str(cache.links_dir)]
+
+
+def test_add_keeps_first_build_of_a_wheel(tmp_path: Path):
+    cache = WheelCache(tmp_path / "cache")
+    cache.add(make_wheel(tmp_path))
+
+    rebuilt_dir = tmp_path / "rebuilt"
+    rebuilt_dir.mkdir()
+    assert not cache.add(make_wheel(rebuilt_dir, content=b"non-reproducible rebuild"))
+
+    assert cache.get(WHEEL_NAME).read_bytes() == b"wheel"
+
+
+def test_evict_removes_least_recently_used_wheels(tmp_path: Path):
+    cache = WheelCache(tmp_path / "cache", max_size=10)
+    old = make_wheel(tmp_path, "old-1.0-py3-none-any.whl", b"0123456789")
+    new = make_wheel(tmp_path, "new-1.0-py3-none-any.whl", b"9876543210")
+    cache.add(old)
+    cache.add(new)
+
+    old_link = cache.links_dir / old.name
+    os.utime(old_link, (1, 1))
+    for object_path in cache.objects_dir.glob(f"*/{old.name}"):
+        os.utime(object_path, (1, 1))
+
+    assert cache.evict() == [old.name]
+    assert cache.get(old.name) is None
+    assert cache.get(new.name) is not None
+    assert cache.size() == 10
+
+
+def test_repair_cache_records_first_outcome(tmp_path: Path):
+    cache = RepairCache(tmp_path / "cache")
+    repaired = make_wheel(tmp_path, "example-1.0.0-cp39-cp39-manylinux_2_28_x86_64.whl")
+
+    assert cache.get("abc") is None
+    cache.put("abc", RepairCache.REPAIRED, [repaired])
+    cache.put("abc", RepairCache.KEEP)
+    cache.put("def", RepairCache.KEEP)
+
+    verdict, paths = cache.get("abc")
+    assert verdict == RepairCache.REPAIRED
+    assert [p.read_bytes() for p in paths] == [b"wheel"]
+    assert cache.get("def") == (RepairCache.KEEP, [])
+    assert sorted(os.listdir(tmp_path / "cache")) == ["abc", "def"]
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from local_hooks.helpers import file_sha256
+from local_hooks.wheel_index import WheelIndex
+
+
+def test_update_index(tmp_path: Path):
+    wheels_dir = tmp_path / "wheels"
+    for sub_dir, file_name in [
+        ("shared", "Typing_Extensions-4.0.0-py3-none-any.whl"),
+        ("py39", "cffi-1.15.0-cp39-cp39-manylinux_2_28_x86_64.whl"),
+        ("py313", "cffi-1.17.1-cp313-cp313-manylinux_2_28_x86_64.whl"),
+    ]:
+        (wheels_dir / sub_dir).mkdir(parents=True, exist_ok=True)
+        (wheels_dir / sub_dir / file_name).write_text(file_name)
+    index = WheelIndex(wheels_dir, tmp_path / "index")
+
+    assert sorted(index.update()) == ["cffi", "typing-extensions"]
+    assert index.update() == []
+
+    cffi_page = (index.simple_dir / "cffi" / "index.html").read_text()
+    for wheel_path in wheels_dir.glob("py3*/*.whl"):
+        assert f"{wheel_path.as_uri()}#sha256={file_sha256(wheel_path)}" in cffi_page
+    assert 'href="typing-extensions/"' in (index.simple_dir / "index.html").read_text()
+    assert index.index_url_args() == ["--extra-index-url", index.url]
+
+    (wheels_dir / "shared" / "Typing_Extensions-4.0.0-py3-none-any.whl").unlink()
+    assert index.update() == ["typing-extensions"]
+    assert not (index.simple_dir / "typing-extensions").exists()
+
+
+def test_indexes_of_apps_mounted_at_the_same_path_differ(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("SOAR_HOOKS_CACHE_DIR", str(tmp_path / "cache"))
+    wheels_dir = tmp_path / "src" / "wheels"
+    monkeypatch.setenv("SOAR_HOOKS_HOST_DIRS", f"{tmp_path / 'src'}=/host/app-a")
+    app_a_index = WheelIndex.for_wheels_dir(wheels_dir)
+    monkeypatch.setenv("SOAR_HOOKS_HOST_DIRS", f"{tmp_path / 'src'}=/host/app-b")
+    app_b_index = WheelIndex.for_wheels_dir(wheels_dir)
+
+    assert app_a_index.url != app_b_index.url
+    assert WheelIndex.for_wheels_dir(wheels_dir).url == app_b_index.url
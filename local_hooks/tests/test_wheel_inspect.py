@@ -0,0 +1,157 @@
+import struct
+import sys
+import sysconfig
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from local_hooks.wheel_inspect import (
+    SHT_GNU_VERNEED,
+    WheelVerdict,
+    compatible_platform_tags,
+    inspect_wheel,
+    parse_elf,
+)
+
+PLATFORM = "manylinux_2_28_x86_64"
+
+
+def build_elf(needed: list[str], glibc_versions: list[str]) -> bytes:
+    """Build a minimal 64-bit shared object with a dynamic section and version requirements."""
+    dynstr = b"\0"
+    offsets = {}
+    for name in [*needed, *glibc_versions]:
+        offsets[name] = len(dynstr)
+        dynstr += name.encode() + b"\0"
+
+    dynamic = b"".join(struct.pack("<qQ", 1, offsets[lib]) for lib in needed)
+    dynamic += struct.pack("<qQ", 0, 0)
+
+    verneed = struct.pack("<HHIII", 1, len(glibc_versions), offsets[needed[0]], 16, 0)
+    for index, version in enumerate(glibc_versions):
+        vna_next = 16 if index < len(glibc_versions) - 1 else 0
+        verneed += struct.pack("<IHHII", 0, 0, index + 2, offsets[version], vna_next)
+
+    dynstr_offset = 64
+    dynamic_offset = dynstr_offset + len(dynstr)
+    verneed_offset = dynamic_offset + len(dynamic)
+    shoff = verneed_offset + len(verneed)
+
+    sections = [
+        (0, 0, 0, 0, 0),
+        (3, dynstr_offset, len(dynstr), 0, 0),
+        (6, dynamic_offset, len(dynamic), 1, 0),
+        (SHT_GNU_VERNEED, verneed_offset, len(verneed), 1, 1),
+    ]
+    header = struct.pack(
+        "<4sBBBBB7sHHIQQQIHHHHHH",
+        b"\x7fELF",
+        2,
+        1,
+        1,
+        0,
+        0,
+        b"\0" * 7,
+        3,
+        62,
+        1,
+        0,
+        0,
+        shoff,
+        0,
+        64,
+        0,
+        0,
+        64,
+        len(sections),
+        0,
+    )
+    section_headers = b"".join(
+        struct.pack("<IIQQQQIIQQ", 0, sh_type, 0, 0, offset, size, link, info, 0, 0)
+        for sh_type, offset, size, link, info in sections
+    )
+    return header + dynstr + dynamic + verneed + section_headers
+
+
+def build_wheel(directory: Path, file_name: str, members: dict[str, bytes]) -> str:
+    path = directory / file_name
+    with zipfile.ZipFile(path, "w") as whl:
+        for name, content in members.items():
+            whl.writestr(name, content)
+    return str(path)
+
+
+def test_parse_elf():
+    elf_info = parse_elf(build_elf(["libc.so.6", "libm.so.6"], ["GLIBC_2.17", "GLIBC_2.2.5"]))
+
+    assert elf_info.needed == ["libc.so.6", "libm.so.6"]
+    assert elf_info.symbol_versions == {"GLIBC_2.17", "GLIBC_2.2.5"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Requires ELF extension modules")
+def test_parse_elf_extension_module():
+    extension = Path(sysconfig.get_paths()["platstdlib"], "lib-dynload")
+    shared_object = next(extension.glob("*.so"), None)
+    if shared_object is None:
+        pytest.skip("Python was built without shared extension modules")
+
+    elf_info = parse_elf(shared_object.read_bytes())
+
+    assert all(lib.startswith(("lib", "ld-")) for lib in elf_info.needed)
+
+
+def test_pure_wheel(tmp_path: Path):
+    wheel = build_wheel(tmp_path, "pure-1.0-py3-none-any.whl", {"pure/__init__.py": b""})
+
+    assert inspect_wheel(wheel, PLATFORM) is WheelVerdict.PURE
+
+
+def test_any_wheel_with_shared_objects(tmp_path: Path):
+    wheel = build_wheel(
+        tmp_path,
+        "bundled-1.0-py3-none-any.whl",
+        {"bundled/__init__.py": b"", "bundled/libfoo.so": build_elf(["libc.so.6"], [])},
+    )
+
+    assert inspect_wheel(wheel, PLATFORM) is WheelVerdict.PURE
+
+
+@pytest.mark.parametrize(
+    ("platform_tag", "needed", "glibc_versions", "verdict"),
+    [
+        ("manylinux_2_17_x86_64.manylinux2014_x86_64", ["libc.so.6"], ["GLIBC_2.17"], "compliant"),
+        ("manylinux_2_28_x86_64", ["libc.so.6", "libbundled.so.1"], ["GLIBC_2.28"], "compliant"),
+        ("linux_x86_64", ["libc.so.6"], ["GLIBC_2.17"], "needs_repair"),
+        ("manylinux_2_34_x86_64", ["libc.so.6"], ["GLIBC_2.17"], "needs_repair"),
+        ("manylinux_2_28_x86_64", ["libc.so.6"], ["GLIBC_2.34"], "needs_repair"),
+        ("manylinux_2_28_x86_64", ["libc.so.6", "libssl.so.3"], ["GLIBC_2.17"], "needs_repair"),
+    ],
+)
+def test_platform_wheel(tmp_path: Path, platform_tag, needed, glibc_versions, verdict):
+    wheel = build_wheel(
+        tmp_path,
+        f"native-1.0-cp39-cp39-{platform_tag}.whl",
+        {
+            "native/_ext.cpython-39-x86_64-linux-gnu.so": build_elf(needed, glibc_versions),
+            "native.libs/libbundled.so.1": build_elf(["libc.so.6"], ["GLIBC_2.17"]),
+        },
+    )
+
+    assert inspect_wheel(wheel, PLATFORM) is WheelVerdict(verdict)
+
+
+def test_uninspectable_wheel(tmp_path: Path):
+    wheel = tmp_path / "broken-1.0-cp39-cp39-linux_x86_64.whl"
+    wheel.write_text("not a zip file")
+
+    assert inspect_wheel(str(wheel), PLATFORM) is None
+
+
+def test_compatible_platform_tags():
+    tags = compatible_platform_tags(PLATFORM)
+
+    assert tags[0] == PLATFORM
+    assert "manylinux_2_17_x86_64" in tags
+    assert tags[-3:] == ["manylinux2014_x86_64", "manylinux2010_x86_64", "manylinux1_x86_64"]
+    assert "manylinux_2_34_x86_64" not in tags
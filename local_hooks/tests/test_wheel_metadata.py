@@ -0,0 +1,51 @@
+import zipfile
+from pathlib import Path
+
+from packaging.requirements import Requirement
+
+from local_hooks.wheel_metadata import (
+    marker_environment,
+    reachable_distributions,
+    read_requires_dist,
+)
+
+
+def build_wheel(directory: Path, name: str, version: str, requires_dist: list[str]) -> str:
+    path = directory / f"{name}-{version}-py3-none-any.whl"
+    metadata = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    metadata += "".join(f"Requires-Dist: {requirement}\n" for requirement in requires_dist)
+    with zipfile.ZipFile(path, "w") as whl:
+        whl.writestr(f"{name}/__init__.py", "")
+        whl.writestr(f"{name}-{version}.dist-info/METADATA", metadata)
+    return str(path)
+
+
+def test_read_requires_dist(tmp_path: Path):
+    wheel = build_wheel(
+        tmp_path, "client", "1.0", ["requests>=2", 'tomli; python_version < "3.11"']
+    )
+
+    assert [str(r) for r in read_requires_dist(wheel)] == [
+        "requests>=2",
+        'tomli; python_version < "3.11"',
+    ]
+    assert read_requires_dist(str(tmp_path / "missing-1.0-py3-none-any.whl")) is None
+
+
+def test_reachable_distributions():
+    requires = {
+        "client": [
+            Requirement("requests>=2"),
+            Requirement('tomli; python_version < "3.11"'),
+            Requirement('Async_Lib; extra == "async"'),
+        ],
+        "requests": [Requirement("urllib3"), Requirement("idna")],
+        "async-lib": [Requirement("idna")],
+    }
+
+    assert reachable_distributions(
+        [Requirement("client")], requires, marker_environment("3.9"), excluded=["requests"]
+    ) == {"client", "tomli"}
+    assert reachable_distributions(
+        [Requirement("client[async]")], requires, marker_environment("3.13"), excluded=["requests"]
+    ) == {"client", "async-lib", "idna"}
@@ -0,0 +1,110 @@
+import base64
+import hashlib
+import zipfile
+from pathlib import Path
+
+from local_hooks.wheel_slim import SlimWheelCache, slim_wheel
+
+MEMBERS = {
+    "pkg/__init__.py": b"from pkg import core\n",
+    "pkg/core.py": b"VALUE = 1\n" * 100,
+    "pkg/core.pyi": b"VALUE: int\n",
+    "pkg/py.typed": b"",
+    "pkg/__pycache__/core.cpython-39.pyc": b"\0" * 100,
+    "pkg/tests/test_core.py": b"def test_core(): pass\n" * 100,
+    "pkg/docs/index.rst": b"Docs\n" * 100,
+    "pkg-1.0.dist-info/METADATA": b"Metadata-Version: 2.1\nName: pkg\nVersion: 1.0\n",
+    "pkg-1.0.dist-info/WHEEL": b"Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    "pkg-1.0.dist-info/RECORD": b"",
+}
+
+
+def build_wheel(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as whl:
+        for name, content in MEMBERS.items():
+            whl.writestr(name, content)
+    return path
+
+
+def test_slim_wheel(tmp_path: Path):
+    wheel = build_wheel(tmp_path / "pkg-1.0-py3-none-any.whl")
+
+    assert slim_wheel(wheel, tmp_path / "slim.whl") == 5
+
+    with zipfile.ZipFile(tmp_path / "slim.whl") as whl:
+        assert sorted(whl.namelist()) == [
+            "pkg-1.0.dist-info/METADATA",
+            "pkg-1.0.dist-info/RECORD",
+            "pkg-1.0.dist-info/WHEEL",
+            "pkg/__init__.py",
+            "pkg/core.py",
+        ]
+        records = whl.read("pkg-1.0.dist-info/RECORD").decode().splitlines()
+
+    digest = base64.urlsafe_b64encode(hashlib.sha256(MEMBERS["pkg/core.py"]).digest())
+    assert f"pkg/core.py,sha256={digest.rstrip(b'=').decode()},1000" in records
+    assert records[-1] == "pkg-1.0.dist-info/RECORD,,"
+
+
+def test_slimmed_wheels_are_cached(tmp_path: Path):
+    cache = SlimWheelCache(tmp_path / "cache")
+    wheel = build_wheel(tmp_path / "pkg-1.0-py3-none-any.whl")
+    slim_wheel(wheel, tmp_path / "slim.whl")
+
+    result = cache.slim(wheel)
+    assert result.removed_members == 5
+    assert result.size_after < result.size_before
+
+    # The slimmed wheel is linked to the cache, don't overwrite it in place
+    wheel.unlink()
+    build_wheel(wheel)
+    assert cache.slim(wheel).removed_members is None
+    assert cache.slim(wheel).removed_members is None
+    assert zipfile.ZipFile(wheel).namelist() == zipfile.ZipFile(tmp_path / "slim.whl").namelist()
+
+
+def test_slim_wheel_keeps_importable_data_dirs(tmp_path: Path):
+    members = {
+        "pkg/__init__.py": b"",
+        "pkg/client.py": b"from pkg.docs import document\nfrom .examples.demo import run\n",
+        "pkg/docs/__init__.py": b"",
+        "pkg/docs/document.py": b"def document(): pass\n",
+        "pkg/docs/images/logo.png": b"\0" * 100,
+        "pkg/examples/demo.py": b"def run(): pass\n",
+        "pkg/tests/test_client.py": b"from pkg import client\n",
+        "pkg-1.0.dist-info/RECORD": b"",
+    }
+    wheel = tmp_path / "pkg-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as whl:
+        for name, content in members.items():
+            whl.writestr(name, content)
+
+    # The docs package and the examples namespace package imported by the client are kept
+    assert slim_wheel(wheel, tmp_path / "slim.whl") == 1
+
+    with zipfile.ZipFile(tmp_path / "slim.whl") as whl:
+        assert "pkg/docs/document.py" in whl.namelist()
+        assert "pkg/docs/images/logo.png" in whl.namelist()
+        assert "pkg/examples/demo.py" in whl.namelist()
+        assert "pkg/tests/test_client.py" not in whl.namelist()
+
+
+def test_slim_wheel_keeps_sourceless_bytecode(tmp_path: Path):
+    members = {
+        "pkg/__init__.py": b"",
+        "pkg/core.py": b"VALUE = 1\n",
+        "pkg/core.pyc": b"\0" * 100,
+        "pkg/compiled.pyc": b"\0" * 100,
+        "pkg/__pycache__/core.cpython-39.pyc": b"\0" * 100,
+        "pkg-1.0.dist-info/RECORD": b"",
+    }
+    wheel = tmp_path / "pkg-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as whl:
+        for name, content in members.items():
+            whl.writestr(name, content)
+
+    assert slim_wheel(wheel, tmp_path / "slim.whl") == 2
+
+    with zipfile.ZipFile(tmp_path / "slim.whl") as whl:
+        assert "pkg/compiled.pyc" in whl.namelist()
+        assert "pkg/core.pyc" not in whl.namelist()
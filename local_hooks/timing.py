@@ -0,0 +1,202 @@
+"""
+Phase level timing and resource accounting, used to report where the time of a hook run goes.
+
+Each phase records its wall time, the CPU time of the current process, the CPU time of the child
+processes it waited for (eg pip or auditwheel) and the bytes written by the process and its
+waited children, as reported by /proc/self/io where available.
+
+Each wheel within a phase records the CPU time and bytes written of the thread handling it, where
+the platform tells threads apart, along with its size. Wheels are repaired concurrently, so the
+child processes of a wheel, eg auditwheel, are measured on their own when run with run_child.
+"""
+
+import contextlib
+import os
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Optional
+
+PHASE_METRICS = ("wall_time", "cpu_time", "child_cpu_time", "bytes_written")
+# ru_oublock counts blocks of 512 bytes
+BLOCK_SIZE = 512
+RUSAGE_CURRENT = getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF)
+
+
+def _bytes_written() -> Optional[int]:
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _rusage() -> tuple[float, int]:
+    """
+    CPU time of the current thread, and bytes it wrote.
+    """
+    current = resource.getrusage(RUSAGE_CURRENT)
+    return current.ru_utime + current.ru_stime, current.ru_oublock * BLOCK_SIZE
+
+
+def run_child(command: list[str], details: Optional[dict] = None) -> subprocess.CompletedProcess:
+    """
+    Runs a command with its output captured as text, like subprocess.run with capture_output and
+    text. The CPU time and bytes written by this process alone, as reported by wait4, are added
+    to the child_cpu_time and child_bytes_written of :param: details, eg of a wheel record.
+    """
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=stdout, stderr=stderr)
+        _, status, rusage = os.wait4(process.pid, 0)
+        # Let Popen know the process was reaped
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stdout.seek(0)
+        stderr.seek(0)
+        result = subprocess.CompletedProcess(
+            command,
+            process.returncode,
+            stdout.read().decode(errors="replace"),
+            stderr.read().decode(errors="replace"),
+        )
+
+    if details is not None:
+        details["child_cpu_time"] = round(
+            details.get("child_cpu_time", 0.0) + rusage.ru_utime + rusage.ru_stime, 6
+        )
+        details["child_bytes_written"] = (
+            details.get("child_bytes_written", 0) + rusage.ru_oublock * BLOCK_SIZE
+        )
+    return result
+
+
+def _elapsed(start: float, end: float) -> float:
+    # Summing user and system times can make equal readings differ by a rounding error
+    return max(round(end - start, 6), 0.0)
+
+
+class PhaseRecorder:
+    """
+    Collects timing records for phases of a run, and for individual wheels within them.
+
+    Labels, eg the runtime section being packaged, are added to every record.
+    """
+
+    def __init__(self, **labels: str) -> None:
+        self.labels = labels
+        self.phases: list[dict] = []
+        self.wheels: list[dict] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        times, wall_time, bytes_written = os.times(), time.perf_counter(), _bytes_written()
+        try:
+            yield
+        finally:
+            end_times, end_bytes_written = os.times(), _bytes_written()
+            self.phases.append(
+                {
+                    **self.labels,
+                    "phase": name,
+                    "wall_time": _elapsed(wall_time, time.perf_counter()),
+                    "cpu_time": _elapsed(
+                        times.user + times.system, end_times.user + end_times.system
+                    ),
+                    "child_cpu_time": _elapsed(
+                        times.children_user + times.children_system,
+                        end_times.children_user + end_times.children_system,
+                    ),
+                    "bytes_written": (
+                        end_bytes_written - bytes_written
+                        if bytes_written is not None and end_bytes_written is not None
+                        else None
+                    ),
+                }
+            )
+
+    @contextlib.contextmanager
+    def wheel(self, wheel_path: str, phase: str, **details):
+        """
+        Records the time and resources spent on a single wheel, eg repairing or copying it, and
+        the size of the wheel it started from. Yields the details of the record, which can be
+        completed with the outcome, and with the resources of child processes by run_child. Safe
+        to use from several threads.
+        """
+        try:
+            wheel_size = os.path.getsize(wheel_path)
+        except OSError:
+            wheel_size = None
+        cpu_time, bytes_written = _rusage()
+        start = time.perf_counter()
+        try:
+            yield details
+        finally:
+            wall_time = time.perf_counter() - start
+            end_cpu_time, end_bytes_written = _rusage()
+            self.record_wheel(
+                os.path.basename(wheel_path),
+                phase,
+                wall_time,
+                cpu_time=_elapsed(cpu_time, end_cpu_time),
+                bytes_written=max(end_bytes_written - bytes_written, 0),
+                wheel_size=wheel_size,
+                **details,
+            )
+
+    def record_wheel(self, wheel: str, phase: str, wall_time: float, **details) -> None:
+        """
+        Records the time spent on a single wheel, eg repairing or copying it. Safe to call from
+        several threads.
+        """
+        with self._lock:
+            self.wheels.append(
+                {
+                    **self.labels,
+                    "wheel": wheel,
+                    "phase": phase,
+                    "wall_time": round(wall_time, 6),
+                    **details,
+                }
+            )
+
+    def update(self, report: dict) -> None:
+        """
+        Adds the records of a report produced by another recorder, eg in a worker process.
+        """
+        self.phases.extend(report.get("phases", []))
+        self.wheels.extend(report.get("wheels", []))
+
+    def report(self) -> dict:
+        return {"phases": self.phases, "wheels": self.wheels}
+
+    def summary(self) -> str:
+        """
+        Human readable table of the recorded phases.
+        """
+        rows = [("phase", "wall (s)", "cpu (s)", "children cpu (s)", "written (MiB)")]
+        for record in self.phases:
+            label = "/".join(str(v) for k, v in record.items() if k not in PHASE_METRICS)
+            written = record["bytes_written"]
+            rows.append(
+                (
+                    label,
+                    f"{record['wall_time']:.3f}",
+                    f"{record['cpu_time']:.3f}",
+                    f"{record['child_cpu_time']:.3f}",
+                    "-" if written is None else f"{written / 1024**2:.2f}",
+                )
+            )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in rows
+        )
@@ -0,0 +1,207 @@
+"""
+Persistent, content-addressed store of wheels shared by every app packaged on this machine.
+
+Each wheel is stored once under objects/<sha256>/<wheel file name>, and exposed to pip through a
+flat links/ directory of hardlinks named after the wheel file. Wheel file names already encode
+the distribution, version, python tag, abi and platform of a wheel, so passing the links/
+directory to pip with a single -f flag lets it reuse any wheel that was previously built or
+repaired for an identical pin instead of building it again. Least recently used wheels are
+evicted once the store grows past its size cap.
+
+The outcome of auditwheel for each wheel is cached separately, see RepairCache.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+from local_hooks.helpers import file_sha256, get_cache_dir, place_file
+
+logger = logging.getLogger(__name__)
+
+MAX_SIZE_ENV_VAR = "SOAR_HOOKS_WHEEL_CACHE_MAX_SIZE"
+DEFAULT_MAX_SIZE = 2 * 1024**3
+
+
+class WheelCache:
+    """
+    Content-addressed wheelhouse with LRU eviction.
+    """
+
+    def __init__(self, root: Union[str, Path], max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self._root = Path(root)
+        self._max_size = max_size
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.links_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def default(cls, max_size: Optional[int] = None) -> "WheelCache":
+        if max_size is None:
+            max_size = int(os.environ.get(MAX_SIZE_ENV_VAR, DEFAULT_MAX_SIZE))
+        return cls(get_cache_dir("wheels"), max_size=max_size)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @property
+    def objects_dir(self) -> Path:
+        return self._root / "objects"
+
+    @property
+    def links_dir(self) -> Path:
+        return self._root / "links"
+
+    def find_links_args(self) -> list[str]:
+        """
+        pip arguments making every cached wheel available as a build candidate.
+        """
+        return ["-f", str(self.links_dir)]
+
+    def _object_path(self, sha256: str, file_name: str) -> Path:
+        return self.objects_dir / sha256 / file_name
+
+    def get(self, file_name: str) -> Optional[Path]:
+        """
+        Returns the cached wheel with the given file name, if any, marking it as recently used.
+        """
+        link_path = self.links_dir / file_name
+        if not link_path.is_file():
+            return None
+        self._touch(link_path)
+        return link_path
+
+    def add(self, wheel_path: Union[str, Path]) -> bool:
+        """
+        Stores a wheel in the cache.
+
+        Returns False if an identical wheel was already cached, in which case it's only marked
+        as recently used. A wheel with the same file name but different content never replaces
+        the cached one, so repeated builds of an unchanged pin keep resolving to the same bytes.
+        """
+        wheel_path = Path(wheel_path)
+        link_path = self.links_dir / wheel_path.name
+        if link_path.is_file():
+            self._touch(link_path)
+            return False
+
+        sha256 = file_sha256(wheel_path)
+        object_path = self._object_path(sha256, wheel_path.name)
+        if not object_path.is_file():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            place_file(wheel_path, object_path)
+
+        place_file(object_path, link_path)
+        return True
+
+    def _touch(self, link_path: Path) -> None:
+        try:
+            os.utime(link_path)
+        except OSError:
+            logger.debug("Unable to update access time of %s", link_path)
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.objects_dir.glob("*/*.whl"))
+
+    def evict(self) -> list[str]:
+        """
+        Removes least recently used wheels until the cache fits within its size cap.
+
+        Returns the file names of the evicted wheels.
+        """
+        entries = []
+        for object_path in self.objects_dir.glob("*/*.whl"):
+            link_path = self.links_dir / object_path.name
+            last_used = object_path.stat().st_mtime
+            if link_path.is_file():
+                last_used = max(last_used, link_path.stat().st_mtime)
+            entries.append((last_used, object_path.stat().st_size, object_path, link_path))
+
+        total_size = sum(size for _, size, _, _ in entries)
+        evicted = []
+        for _, size, object_path, link_path in sorted(entries, key=lambda e: e[0]):
+            if total_size <= self._max_size:
+                break
+
+            logger.info("Evicting %s from the wheel cache", object_path.name)
+            if link_path.is_file() and (
+                os.path.samefile(link_path, object_path)
+                or file_sha256(link_path) == object_path.parent.name
+            ):
+                link_path.unlink()
+            object_path.unlink()
+            try:
+                object_path.parent.rmdir()
+            except OSError:
+                pass
+            total_size -= size
+            evicted.append(object_path.name)
+
+        return evicted
+
+
+class RepairCache:
+    """
+    Persistent auditwheel outcomes, keyed by the sha256 digest of the checked wheel.
+
+    Each entry is a <sha256>/ directory holding a verdict.json file, and for repaired wheels the
+    repaired wheel files. Entries are written in a temporary directory and renamed into place, so
+    concurrent packaging runs never see a partial entry, and the first run to finish wins.
+    """
+
+    KEEP = "keep"
+    REPAIRED = "repaired"
+
+    def __init__(self, root: Union[str, Path]) -> None:
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def default(cls, platform: str) -> "RepairCache":
+        return cls(get_cache_dir("auditwheel", platform))
+
+    def get(self, sha256: str) -> Optional[tuple[str, list[Path]]]:
+        """
+        Returns the verdict for a wheel and its repaired wheel files, if it was checked before.
+        """
+        entry_dir = self._root / sha256
+        try:
+            verdict = json.loads((entry_dir / "verdict.json").read_text())
+            repaired_paths = [entry_dir / name for name in verdict["repaired"]]
+            if verdict["verdict"] not in (self.KEEP, self.REPAIRED):
+                raise ValueError(f"Unknown verdict {verdict['verdict']}")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug("Ignoring unreadable auditwheel cache entry %s: %s", entry_dir, e)
+            return None
+
+        if not all(path.is_file() for path in repaired_paths):
+            return None
+        return verdict["verdict"], repaired_paths
+
+    def put(self, sha256: str, verdict: str, repaired_paths: list[Union[str, Path]] = ()) -> None:
+        """
+        Records the verdict for a wheel, along with copies of its repaired wheel files.
+        """
+        entry_dir = self._root / sha256
+        if entry_dir.is_dir():
+            return
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{sha256}.", dir=self._root))
+        try:
+            for path in repaired_paths:
+                place_file(path, tmp_dir / Path(path).name)
+            (tmp_dir / "verdict.json").write_text(
+                json.dumps({"verdict": verdict, "repaired": [Path(p).name for p in repaired_paths]})
+            )
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            # Most likely another run recorded the same wheel first
+            logger.debug("Not caching the auditwheel outcome of %s: %s", sha256, e)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
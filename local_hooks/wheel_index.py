@@ -0,0 +1,181 @@
+"""
+Local PEP 503 simple repository over the wheels/ folder of an app.
+
+Passing every wheels/ subdirectory to pip with -f makes it list and parse every local wheel on
+each resolution. Instead, a simple index with one page per project is maintained in the
+persistent cache, so that pip only reads the page of each project it looks up. Every link
+carries the sha256 digest of its wheel, computed once per file thanks to the persistent hash
+cache, and only the pages of projects whose wheels changed are rewritten.
+
+The index can be consumed by pip or uv with --extra-index-url, and served to several builds at
+once, eg with `python -m http.server` from its simple/ directory.
+"""
+
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import html
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Union
+
+from packaging.utils import InvalidWheelFilename, canonicalize_name, parse_wheel_filename
+
+from local_hooks.helpers import cached_file_sha256, get_cache_dir, host_path
+
+logger = logging.getLogger(__name__)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+  <head>
+    <meta name="pypi:repository-version" content="1.0">
+    <title>{title}</title>
+  </head>
+  <body>
+{links}
+  </body>
+</html>
+"""
+
+
+def _project_name(wheel_file_name: str) -> str:
+    try:
+        return parse_wheel_filename(wheel_file_name)[0]
+    except InvalidWheelFilename:
+        return canonicalize_name(wheel_file_name.split("-", 1)[0])
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    try:
+        if path.read_text() == content:
+            return False
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+class WheelIndex:
+    """
+    PEP 503 simple index of the wheels found in the subdirectories of a wheels/ folder.
+    """
+
+    def __init__(self, wheels_dir: Union[str, Path], index_dir: Union[str, Path]) -> None:
+        self._wheels_dir = Path(wheels_dir).absolute()
+        self._index_dir = Path(index_dir).absolute()
+
+    @classmethod
+    def for_wheels_dir(cls, wheels_dir: Union[str, Path]) -> "WheelIndex":
+        """
+        The index of a wheels/ folder, stored in the persistent cache.
+
+        Containers mount every app at the same path, so the index is keyed by the host path of the
+        folder, and by its path here since its pages link to the wheels by path.
+        """
+        real_path = os.path.realpath(wheels_dir)
+        key = hashlib.sha256(f"{host_path(wheels_dir)}\n{real_path}".encode()).hexdigest()[:16]
+        return cls(wheels_dir, get_cache_dir("indexes", key))
+
+    @property
+    def simple_dir(self) -> Path:
+        return self._index_dir / "simple"
+
+    @property
+    def url(self) -> str:
+        return f"{self.simple_dir.as_uri()}/"
+
+    def index_url_args(self) -> list[str]:
+        """
+        pip arguments making the indexed wheels available as build candidates.
+        """
+        return ["--extra-index-url", self.url]
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Locks a file next to the index rather than in it, so that it's held while the index
+        # directory itself is created
+        self._index_dir.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._index_dir.with_name(f"{self._index_dir.name}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._index_dir.mkdir(exist_ok=True)
+            yield
+
+    def _wheels_by_project(self) -> dict[str, list[Path]]:
+        wheels = defaultdict(list)
+        if not self._wheels_dir.is_dir():
+            return wheels
+
+        for sub_dir in sorted(self._wheels_dir.iterdir()):
+            if not sub_dir.is_dir():
+                continue
+            for wheel_path in sorted(sub_dir.glob("*.whl")):
+                wheels[_project_name(wheel_path.name)].append(wheel_path.resolve())
+        return wheels
+
+    def update(self) -> list[str]:
+        """
+        Brings the index in line with the current content of the wheels/ folder.
+
+        Returns the names of the projects whose pages were added, rewritten or removed.
+        """
+        with self._locked():
+            wheels = self._wheels_by_project()
+            changed = []
+
+            for project, wheel_paths in wheels.items():
+                links = "\n".join(
+                    f'    <a href="{html.escape(path.as_uri())}#sha256={cached_file_sha256(path)}">'
+                    f"{html.escape(path.name)}</a><br>"
+                    for path in wheel_paths
+                )
+                page = PAGE_TEMPLATE.format(title=f"Links for {project}", links=links)
+                if _write_if_changed(self.simple_dir / project / "index.html", page):
+                    changed.append(project)
+
+            if self.simple_dir.is_dir():
+                for project_dir in self.simple_dir.iterdir():
+                    if project_dir.is_dir() and project_dir.name not in wheels:
+                        (project_dir / "index.html").unlink(missing_ok=True)
+                        project_dir.rmdir()
+                        changed.append(project_dir.name)
+
+            links = "\n".join(
+                f'    <a href="{project}/">{project}</a><br>' for project in sorted(wheels)
+            )
+            _write_if_changed(
+                self.simple_dir / "index.html",
+                PAGE_TEMPLATE.format(title="Simple index", links=links),
+            )
+
+        if changed:
+            logger.info("Updated the local wheel index for %s", ", ".join(sorted(changed)))
+        return changed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Maintains a PEP 503 simple index over the wheels/ folder of an app"
+    )
+    parser.add_argument("wheels_dir", help="wheels/ folder of the app")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Updates the index of a wheels/ folder and prints its URL.
+    """
+    args = parse_args()
+    index = WheelIndex.for_wheels_dir(args.wheels_dir)
+    index.update()
+    print(index.url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+In-process inspection of built wheels, deciding whether they need to be repaired by auditwheel
+without starting an auditwheel process for every wheel.
+
+Only the zip central directory of a wheel and its shared object members are read. The dynamic
+section (DT_NEEDED entries) and the symbol version requirements (.gnu.version_r) of each ELF
+file are checked against the manylinux policy of the target platform, mirroring the checks
+`auditwheel show` makes.
+"""
+
+import logging
+import re
+import struct
+import zipfile
+from collections import namedtuple
+from enum import Enum, unique
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ELF_MAGIC = b"\x7fELF"
+ELF_CLASS_32, ELF_CLASS_64 = 1, 2
+ELF_DATA_LSB, ELF_DATA_MSB = 1, 2
+SHT_DYNAMIC = 6
+SHT_GNU_VERNEED = 0x6FFFFFFE
+DT_NULL, DT_NEEDED = 0, 1
+
+SHARED_OBJECT_PATTERN = re.compile(r"\.so(\.\d+)*$")
+MANYLINUX_TAG_PATTERN = re.compile(r"^manylinux_(?P<major>\d+)_(?P<minor>\d+)_(?P<arch>.+)$")
+LEGACY_MANYLINUX_TAGS = {
+    "manylinux1": (2, 5),
+    "manylinux2010": (2, 12),
+    "manylinux2014": (2, 17),
+}
+
+# Libraries and symbol versions a manylinux wheel may depend on, from the auditwheel policies
+# https://github.com/pypa/auditwheel/blob/main/src/auditwheel/policy/manylinux-policy.json
+MANYLINUX_POLICIES = {
+    "manylinux_2_28_x86_64": {
+        "glibc": (2, 28),
+        "lib_whitelist": frozenset(
+            [
+                "libgcc_s.so.1",
+                "libstdc++.so.6",
+                "libm.so.6",
+                "libdl.so.2",
+                "librt.so.1",
+                "libc.so.6",
+                "libnsl.so.1",
+                "libutil.so.1",
+                "libpthread.so.0",
+                "libresolv.so.2",
+                "libX11.so.6",
+                "libXext.so.6",
+                "libXrender.so.1",
+                "libICE.so.6",
+                "libSM.so.6",
+                "libGL.so.1",
+                "libgobject-2.0.so.0",
+                "libgthread-2.0.so.0",
+                "libglib-2.0.so.0",
+                "libz.so.1",
+                "libexpat.so.1",
+                "ld-linux-x86-64.so.2",
+            ]
+        ),
+        "symbol_versions": {
+            "GLIBC": (2, 28),
+            "CXXABI": (1, 3, 11),
+            "GLIBCXX": (3, 4, 25),
+            "GCC": (7, 0, 0),
+        },
+    },
+}
+
+ElfInfo = namedtuple("ElfInfo", ["needed", "symbol_versions"])
+
+
+@unique
+class WheelVerdict(Enum):
+    """
+    Outcome of inspecting a wheel.
+    """
+
+    PURE = "pure"
+    COMPLIANT = "compliant"
+    NEEDS_REPAIR = "needs_repair"
+
+
+def _read_c_string(data: bytes, offset: int) -> str:
+    end = data.index(b"\0", offset)
+    return data[offset:end].decode("utf-8", "replace")
+
+
+def parse_elf(data: bytes) -> ElfInfo:
+    """
+    Returns the shared libraries an ELF file depends on and the versioned symbols it requires
+    from them, eg "GLIBC_2.17".
+
+    Raises ValueError if data isn't a well formed ELF file.
+    """
+    if data[:4] != ELF_MAGIC or len(data) < 64:
+        raise ValueError("Not an ELF file")
+
+    elf_class, elf_data = data[4], data[5]
+    if elf_class not in (ELF_CLASS_32, ELF_CLASS_64) or elf_data not in (
+        ELF_DATA_LSB,
+        ELF_DATA_MSB,
+    ):
+        raise ValueError("Unsupported ELF class or data encoding")
+
+    is_64 = elf_class == ELF_CLASS_64
+    order = "<" if elf_data == ELF_DATA_LSB else ">"
+
+    try:
+        if is_64:
+            e_shoff, e_shentsize, e_shnum = (
+                struct.unpack_from(f"{order}Q", data, 0x28)[0],
+                *struct.unpack_from(f"{order}HH", data, 0x3A),
+            )
+            section_format, dyn_format = f"{order}IIQQQQIIQQ", f"{order}qQ"
+        else:
+            e_shoff, e_shentsize, e_shnum = (
+                struct.unpack_from(f"{order}I", data, 0x20)[0],
+                *struct.unpack_from(f"{order}HH", data, 0x2E),
+            )
+            section_format, dyn_format = f"{order}IIIIIIIIII", f"{order}iI"
+
+        # (type, offset, size, link, info) of every section
+        sections = []
+        for index in range(e_shnum):
+            fields = struct.unpack_from(section_format, data, e_shoff + index * e_shentsize)
+            sections.append((fields[1], fields[4], fields[5], fields[6], fields[7]))
+
+        needed = []
+        symbol_versions = set()
+        for sh_type, sh_offset, sh_size, sh_link, sh_info in sections:
+            if sh_type == SHT_DYNAMIC:
+                strtab_offset = sections[sh_link][1]
+                dyn_size = struct.calcsize(dyn_format)
+                for offset in range(sh_offset, sh_offset + sh_size, dyn_size):
+                    d_tag, d_val = struct.unpack_from(dyn_format, data, offset)
+                    if d_tag == DT_NULL:
+                        break
+                    if d_tag == DT_NEEDED:
+                        needed.append(_read_c_string(data, strtab_offset + d_val))
+            elif sh_type == SHT_GNU_VERNEED:
+                strtab_offset = sections[sh_link][1]
+                verneed_offset = sh_offset
+                for _ in range(sh_info):
+                    _, vn_cnt, _, vn_aux, vn_next = struct.unpack_from(
+                        f"{order}HHIII", data, verneed_offset
+                    )
+                    vernaux_offset = verneed_offset + vn_aux
+                    for _ in range(vn_cnt):
+                        _, _, _, vna_name, vna_next = struct.unpack_from(
+                            f"{order}IHHII", data, vernaux_offset
+                        )
+                        symbol_versions.add(_read_c_string(data, strtab_offset + vna_name))
+                        vernaux_offset += vna_next
+                    verneed_offset += vn_next
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Malformed ELF file: {e}") from None
+
+    return ElfInfo(needed, symbol_versions)
+
+
+def _version_tuple(version: str) -> Optional[tuple[int, ...]]:
+    try:
+        return tuple(int(part) for part in version.split("."))
+    except ValueError:
+        return None
+
+
+def _platform_tag_glibc(platform_tag: str, arch: str) -> Optional[tuple[int, int]]:
+    """
+    The glibc version a manylinux platform tag promises compatibility with, if any.
+    """
+    for legacy_tag, glibc in LEGACY_MANYLINUX_TAGS.items():
+        if platform_tag == f"{legacy_tag}_{arch}":
+            return glibc
+
+    match = MANYLINUX_TAG_PATTERN.match(platform_tag)
+    if match and match.group("arch") == arch:
+        return int(match.group("major")), int(match.group("minor"))
+    return None
+
+
+def compatible_platform_tags(platform: str) -> list[str]:
+    """
+    Every manylinux platform tag installable on the given platform, most specific first, eg for
+    pip download --platform, which doesn't expand PEP 600 tags to older glibc versions itself.
+    """
+    match = MANYLINUX_TAG_PATTERN.match(platform)
+    if not match:
+        return [platform]
+
+    major, minor, arch = int(match.group("major")), int(match.group("minor")), match.group("arch")
+    tags = [f"manylinux_{major}_{m}_{arch}" for m in range(minor, 4, -1)]
+    for legacy_tag, glibc in sorted(
+        LEGACY_MANYLINUX_TAGS.items(), key=lambda t: t[1], reverse=True
+    ):
+        if glibc <= (major, minor):
+            tags.append(f"{legacy_tag}_{arch}")
+    return tags
+
+
+def is_elf_compliant(elf_info: ElfInfo, bundled_libs: set[str], policy: dict) -> bool:
+    """
+    Whether an ELF file only depends on libraries and symbol versions allowed by the policy,
+    or on libraries bundled in the wheel itself.
+    """
+    for lib in elf_info.needed:
+        if lib not in policy["lib_whitelist"] and lib not in bundled_libs:
+            return False
+
+    for symbol_version in elf_info.symbol_versions:
+        name, _, version = symbol_version.partition("_")
+        if name not in policy["symbol_versions"]:
+            # Versioned symbols of bundled libraries, eg OPENSSL_3.0.0
+            continue
+        version_tuple = _version_tuple(version)
+        if version_tuple is None or version_tuple > policy["symbol_versions"][name]:
+            return False
+    return True
+
+
+def inspect_wheel(wheel_path: str, platform: str) -> Optional[WheelVerdict]:
+    """
+    Classifies a wheel as pure, already compliant with the manylinux platform, or in need of
+    repair by auditwheel.
+
+    Returns None if the wheel can't be classified in-process, eg for an unknown platform policy
+    or a malformed archive, in which case auditwheel should be consulted.
+    """
+    try:
+        with zipfile.ZipFile(wheel_path) as whl:
+            members = [info for info in whl.infolist() if not info.is_dir()]
+            shared_objects = [
+                info for info in members if SHARED_OBJECT_PATTERN.search(info.filename)
+            ]
+            platform_tags = wheel_path[: -len(".whl")].rsplit("-", 1)[-1].split(".")
+            # Shared objects of a wheel tagged any, eg bundled for ctypes, aren't for auditwheel,
+            # which refuses to show or repair anything but platform wheels
+            if not shared_objects or all(tag == "any" for tag in platform_tags):
+                return WheelVerdict.PURE
+
+            policy = MANYLINUX_POLICIES.get(platform)
+            if policy is None:
+                return None
+
+            arch = platform.split("_", 3)[-1]
+            tag_glibcs = [_platform_tag_glibc(tag, arch) for tag in platform_tags]
+            if not any(glibc is not None and glibc <= policy["glibc"] for glibc in tag_glibcs):
+                # eg linux_x86_64 wheels built from source, which need to be retagged
+                return WheelVerdict.NEEDS_REPAIR
+
+            bundled_libs = set(info.filename.rsplit("/", 1)[-1] for info in members)
+            for info in shared_objects:
+                elf_info = parse_elf(whl.read(info))
+                if not is_elf_compliant(elf_info, bundled_libs, policy):
+                    return WheelVerdict.NEEDS_REPAIR
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        logger.debug("Unable to inspect %s: %s", wheel_path, e)
+        return None
+
+    return WheelVerdict.COMPLIANT
@@ -0,0 +1,97 @@
+"""
+Dependency metadata of built wheels.
+
+The Requires-Dist fields of the METADATA file of each wheel describe the dependency graph of the
+built distributions, which is walked from the requirements of the app to find the wheels it
+actually needs on a given runtime.
+"""
+
+import email.parser
+import logging
+import zipfile
+from collections.abc import Iterable
+from typing import Optional
+
+from packaging.markers import default_environment
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+
+logger = logging.getLogger(__name__)
+
+
+def read_requires_dist(wheel_path: str) -> Optional[list[Requirement]]:
+    """
+    Returns the requirements declared in the METADATA of a wheel, or None if it can't be read.
+    """
+    try:
+        with zipfile.ZipFile(wheel_path) as whl:
+            metadata_files = [
+                name
+                for name in whl.namelist()
+                if name.count("/") == 1 and name.endswith(".dist-info/METADATA")
+            ]
+            if len(metadata_files) != 1:
+                raise ValueError(f"Expected a single METADATA file, found {len(metadata_files)}")
+            metadata = email.parser.BytesParser().parsebytes(
+                whl.read(metadata_files[0]), headersonly=True
+            )
+        return [Requirement(line) for line in metadata.get_all("Requires-Dist", [])]
+    except (OSError, ValueError, zipfile.BadZipFile, InvalidRequirement) as e:
+        logger.debug("Unable to read the dependencies of %s: %s", wheel_path, e)
+        return None
+
+
+def marker_environment(python_version: str) -> dict[str, str]:
+    """
+    Environment to evaluate markers against for a CPython runtime on manylinux x86_64.
+    """
+    environment = default_environment()
+    environment.update(
+        {
+            "implementation_name": "cpython",
+            "os_name": "posix",
+            "platform_machine": "x86_64",
+            "platform_python_implementation": "CPython",
+            "platform_system": "Linux",
+            "python_full_version": f"{python_version}.0",
+            "python_version": python_version,
+            "sys_platform": "linux",
+        }
+    )
+    return environment
+
+
+def reachable_distributions(
+    roots: Iterable[Requirement],
+    requires_by_distribution: dict[str, list[Requirement]],
+    environment: dict[str, str],
+    excluded: Iterable[str] = (),
+) -> set[str]:
+    """
+    Returns the canonical names of the distributions required, directly or transitively, by the
+    roots, including the extras they request.
+
+    Excluded distributions aren't part of the result, and the graph isn't walked through them.
+    """
+    excluded = set(canonicalize_name(name) for name in excluded)
+    reachable, visited = set(), set()
+    queue = list(roots)
+    while queue:
+        requirement = queue.pop()
+        name = canonicalize_name(requirement.name)
+        if name in excluded:
+            continue
+
+        reachable.add(name)
+        for extra in ("", *sorted(requirement.extras)):
+            if (name, extra) in visited:
+                continue
+            visited.add((name, extra))
+
+            for dependency in requires_by_distribution.get(name, []):
+                if dependency.marker is None:
+                    if not extra:
+                        queue.append(dependency)
+                elif dependency.marker.evaluate({**environment, "extra": extra}):
+                    queue.append(dependency)
+    return reachable
@@ -0,0 +1,211 @@
+"""
+Slimming of bundled wheels: removes members an app never needs at runtime, ie test suites,
+documentation and examples that aren't importable packages, type stubs and bytecode compiled from
+sources shipped alongside, and strips debug symbols from shared objects.
+
+Slimmed wheels get a regenerated RECORD, and are cached by the digest of the original wheel so
+that each wheel is only ever slimmed once.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+from typing import Optional, Union
+
+from local_hooks.helpers import file_sha256, get_cache_dir, place_file
+
+logger = logging.getLogger(__name__)
+
+# Bump when the slimming rules change, so previously slimmed wheels aren't reused
+SLIM_VERSION = "3"
+
+# Directories removed only when they aren't Python packages that the wheel's code may import,
+# eg botocore/docs is a package imported by botocore/client.py
+REMOVED_DATA_DIRS = frozenset(["tests", "test", "docs", "doc", "examples"])
+IMPORT_PATTERN = re.compile(r"^\s*(?:from|import)\s+[^\n]*", re.MULTILINE)
+REMOVED_FILE_PATTERN = re.compile(r"(\.pyi|/py\.typed)$")
+# Only removed next to their source: sourceless wheels ship some modules as bytecode alone
+BYTECODE_PATTERN = re.compile(r"\.py[co]$")
+SHARED_OBJECT_PATTERN = re.compile(r"\.so(\.\d+)*$")
+RECORD_SIGNATURE_PATTERN = re.compile(r"\.dist-info/RECORD\.(jws|p7s)$")
+
+SlimResult = namedtuple("SlimResult", ["path", "size_before", "size_after", "removed_members"])
+
+
+def _is_under(member: str, dirs: set[str]) -> bool:
+    parts = member.split("/")[:-1]
+    return any("/".join(parts[: i + 1]) in dirs for i in range(len(parts)))
+
+
+def _is_imported(directory: str, imports: dict[str, list[str]]) -> bool:
+    """
+    Whether a directory is imported, as a module path, by the import statements of source files.
+    """
+    parent, _, name = directory.rpartition("/")
+    absolute = re.compile(rf"\b{re.escape(directory.replace('/', '.'))}\b")
+    relative = re.compile(
+        rf"from\s+\.{re.escape(name)}\b|from\s+\.\s+import\s.*\b{re.escape(name)}\b"
+    )
+    for source, statements in imports.items():
+        in_parent = source.rpartition("/")[0] == parent
+        for statement in statements:
+            if absolute.search(statement) or (in_parent and relative.search(statement)):
+                return True
+    return False
+
+
+def _removed_dirs(src: zipfile.ZipFile) -> set[str]:
+    """
+    Data directories of a wheel that can be removed: neither packages, ie without __init__.py,
+    nor imported by the code left in the wheel.
+    """
+    names = [info.filename for info in src.infolist() if not info.is_dir()]
+    candidates = set()
+    for name in names:
+        parts = name.split("/")[:-1]
+        for i, part in enumerate(parts):
+            if part in REMOVED_DATA_DIRS:
+                candidates.add("/".join(parts[: i + 1]))
+    removed = {directory for directory in candidates if f"{directory}/__init__.py" not in names}
+    if not removed:
+        return removed
+
+    imports = {
+        name: IMPORT_PATTERN.findall(src.read(name).decode(errors="replace"))
+        for name in names
+        if name.endswith(".py")
+    }
+    # Keeping a directory keeps its sources, whose imports may keep other directories
+    while True:
+        kept_imports = {
+            name: statements for name, statements in imports.items() if not _is_under(name, removed)
+        }
+        imported = {directory for directory in removed if _is_imported(directory, kept_imports)}
+        if not imported:
+            return removed
+        removed -= imported
+
+
+def _is_removed(member: str, removed_dirs: set[str], names: set[str]) -> bool:
+    if member.partition("/")[0].endswith(".dist-info"):
+        return bool(RECORD_SIGNATURE_PATTERN.search(member))
+    if REMOVED_FILE_PATTERN.search(member):
+        return True
+    if BYTECODE_PATTERN.search(member) and member[:-1] in names:
+        return True
+    return "__pycache__" in member.split("/")[:-1] or _is_under(member, removed_dirs)
+
+
+def _record_hash(data: bytes) -> str:
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+    return f"sha256={digest}"
+
+
+def _strip_shared_object(data: bytes, strip_path: str) -> bytes:
+    with tempfile.NamedTemporaryFile(suffix=".so") as tmp:
+        tmp.write(data)
+        tmp.flush()
+        result = subprocess.run([strip_path, "--strip-debug", tmp.name], capture_output=True)
+        if result.returncode != 0:
+            logger.debug("Unable to strip %s: %s", tmp.name, result.stderr.decode())
+            return data
+        return Path(tmp.name).read_bytes()
+
+
+def slim_wheel(
+    wheel_path: Union[str, Path], output_path: Union[str, Path], strip_path: Optional[str] = None
+) -> int:
+    """
+    Writes a copy of a wheel without the members unneeded at runtime to output_path, with debug
+    symbols stripped from shared objects if a strip executable is given.
+
+    Returns the number of removed members.
+    """
+    removed_members = 0
+    with (
+        zipfile.ZipFile(wheel_path) as src,
+        zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as dst,
+    ):
+        record_name = None
+        records = []
+        removed_dirs = _removed_dirs(src)
+        names = set(src.namelist())
+        for info in src.infolist():
+            if info.is_dir():
+                continue
+            if info.filename.endswith(".dist-info/RECORD") and info.filename.count("/") == 1:
+                record_name = info.filename
+                continue
+            if _is_removed(info.filename, removed_dirs, names):
+                removed_members += 1
+                continue
+
+            data = src.read(info)
+            if strip_path and SHARED_OBJECT_PATTERN.search(info.filename):
+                data = _strip_shared_object(data, strip_path)
+
+            # Keep permissions, eg executable scripts
+            member = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            member.external_attr = info.external_attr
+            member.compress_type = zipfile.ZIP_DEFLATED
+            dst.writestr(member, data)
+            records.append(f"{info.filename},{_record_hash(data)},{len(data)}")
+
+        if record_name is None:
+            raise ValueError(f"{wheel_path} has no RECORD file")
+        records.append(f"{record_name},,")
+        dst.writestr(record_name, "\n".join(records) + "\n")
+
+    return removed_members
+
+
+class SlimWheelCache:
+    """
+    Slimmed wheels keyed by the digest of the original wheel.
+    """
+
+    def __init__(self, root: Union[str, Path, None] = None) -> None:
+        self._root = Path(root) if root is not None else get_cache_dir("slim-wheels")
+        self._strip_path = shutil.which("strip")
+
+    def _cached_path(self, sha256: str, file_name: str) -> Path:
+        strip = "strip" if self._strip_path else "nostrip"
+        return self._root / f"{sha256}-{SLIM_VERSION}-{strip}" / file_name
+
+    def slim(self, wheel_path: Union[str, Path]) -> SlimResult:
+        """
+        Replaces a wheel with its slimmed version, slimming it only if it wasn't cached yet.
+        """
+        wheel_path = Path(wheel_path)
+        size_before = wheel_path.stat().st_size
+        cached_path = self._cached_path(file_sha256(wheel_path), wheel_path.name)
+        removed_members = None
+
+        if not cached_path.is_file():
+            cached_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cached_path.with_name(f".{cached_path.name}.{os.getpid()}.tmp")
+            try:
+                removed_members = slim_wheel(wheel_path, tmp_path, self._strip_path)
+                if tmp_path.stat().st_size >= size_before:
+                    # Nothing worth removing, keep the original wheel byte for byte
+                    place_file(wheel_path, tmp_path)
+                os.replace(tmp_path, cached_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+            # Slimming a slimmed wheel again is a no-op
+            slimmed_path = self._cached_path(file_sha256(cached_path), wheel_path.name)
+            if not slimmed_path.is_file():
+                slimmed_path.parent.mkdir(parents=True, exist_ok=True)
+                place_file(cached_path, slimmed_path)
+
+        place_file(cached_path, wheel_path)
+        return SlimResult(str(wheel_path), size_before, wheel_path.stat().st_size, removed_members)